@@ -0,0 +1,369 @@
+"""
+API de KPIs
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Servicio HTTP liviano (asyncio, sin dependencias externas) que expone en JSON
+los datos que muestra el dashboard: métricas principales, sectores,
+históricos y KPIs financieros. Lee desde el mismo almacén que app.py y
+calcula las métricas con la misma función que mostrar_metricas.
+
+Cada respuesta se serializa una sola vez por versión de los datos: el cuerpo
+JSON, su variante gzip y su ETag quedan en memoria y solo se reconstruyen
+cuando cambia la versión de algún dataset en el almacén. Soporta conexiones
+keep-alive, If-None-Match (304) y Accept-Encoding: gzip.
+
+/api/clientes/<cliente> entrega la ficha RFM de un cliente desde el índice
+de clientes, que se mantiene en memoria y se recarga cuando cambia su
+versión; cada consulta es una búsqueda O(1) en el índice.
+
+Uso (desde el directorio de la aplicación):
+    python api.py
+    python api.py --host 0.0.0.0 --puerto 8502
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import time
+from email.utils import formatdate
+from urllib.parse import unquote
+
+from scripts.analyze_employment_data import calcular_metricas_principales
+from scripts.customer_index import DATASET_INDICE_CLIENTES, IndiceClientes
+from scripts.storage import obtener_almacen
+
+PUERTO_DEFECTO = 8502
+# Cada cuánto se revisa la versión de los datasets (evita un stat por request)
+SEGUNDOS_REVISION = 1.0
+TAMANO_MAXIMO_ENCABEZADOS = 16384
+TIMEOUT_INACTIVIDAD = 30
+
+DATASET_FINANZAS = "analisis_resultados"
+PREFIJO_CLIENTES = "/api/clientes/"
+
+RAZONES = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    503: "Service Unavailable",
+}
+
+
+# ============================================================
+# Recursos expuestos
+# ============================================================
+
+def _leer(dataset):
+    return obtener_almacen().leer(dataset)
+
+
+def recurso_metricas():
+    return calcular_metricas_principales(_leer("estadisticas_mensuales"), _leer("datos_sectores"))
+
+
+def recurso_finanzas_kpis():
+    return _leer(DATASET_FINANZAS)["kpis"]
+
+
+# ruta -> (datasets de los que depende, función que construye el contenido)
+RECURSOS = {
+    "/api/metricas": (("estadisticas_mensuales", "datos_sectores"), recurso_metricas),
+    "/api/sectores": (("datos_sectores",), lambda: _leer("datos_sectores")),
+    "/api/historicos": (("datos_historicos",), lambda: _leer("datos_historicos")),
+    "/api/finanzas": ((DATASET_FINANZAS,), lambda: _leer(DATASET_FINANZAS)),
+    "/api/finanzas/kpis": ((DATASET_FINANZAS,), recurso_finanzas_kpis),
+}
+
+
+# ============================================================
+# Caché de respuestas serializadas
+# ============================================================
+
+class RespuestaCacheada:
+    """Cuerpo JSON ya serializado, su variante gzip y su ETag"""
+
+    __slots__ = ("version", "cuerpo", "cuerpo_gzip", "etag", "revisada")
+
+    def __init__(self, version, contenido):
+        self.version = version
+        self.cuerpo = json.dumps(contenido, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.cuerpo_gzip = gzip.compress(self.cuerpo, compresslevel=6)
+        self.etag = '"' + hashlib.sha1(self.cuerpo).hexdigest() + '"'
+        self.revisada = time.monotonic()
+
+
+class CacheRespuestas:
+    """Mantiene una respuesta por ruta y la reconstruye cuando cambian los datos
+
+    La versión de los datasets se revisa como máximo cada SEGUNDOS_REVISION;
+    la reconstrucción (lectura + serialización) corre en un hilo para no
+    bloquear el loop, y un lock por ruta evita reconstrucciones duplicadas.
+    """
+
+    def __init__(self, recursos=RECURSOS, segundos_revision=SEGUNDOS_REVISION):
+        self.recursos = recursos
+        self.segundos_revision = segundos_revision
+        self.respuestas = {}
+        self._locks = {ruta: asyncio.Lock() for ruta in recursos}
+
+    def _version(self, ruta):
+        almacen = obtener_almacen()
+        return tuple(almacen.version(dataset) for dataset in self.recursos[ruta][0])
+
+    def _construir(self, ruta, version):
+        return RespuestaCacheada(version, self.recursos[ruta][1]())
+
+    async def obtener(self, ruta):
+        respuesta = self.respuestas.get(ruta)
+        if respuesta is not None and time.monotonic() - respuesta.revisada < self.segundos_revision:
+            return respuesta
+
+        async with self._locks[ruta]:
+            # Otra corrutina pudo haberla revisado mientras esperábamos el lock
+            respuesta = self.respuestas.get(ruta)
+            if respuesta is not None and time.monotonic() - respuesta.revisada < self.segundos_revision:
+                return respuesta
+
+            loop = asyncio.get_running_loop()
+            version = await loop.run_in_executor(None, self._version, ruta)
+            if respuesta is not None and respuesta.version == version:
+                respuesta.revisada = time.monotonic()
+                return respuesta
+
+            respuesta = await loop.run_in_executor(None, self._construir, ruta, version)
+            self.respuestas[ruta] = respuesta
+            return respuesta
+
+
+class IndiceClientesCacheado:
+    """Índice de clientes en memoria, recargado cuando cambia su versión
+
+    Igual que CacheRespuestas, la versión se revisa como máximo cada
+    SEGUNDOS_REVISION y la carga corre en un hilo.
+    """
+
+    def __init__(self, segundos_revision=SEGUNDOS_REVISION):
+        self.segundos_revision = segundos_revision
+        self.version = None
+        self.indice = None
+        self.revisado = 0.0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _cargar():
+        indice = IndiceClientes.desde_dict(obtener_almacen().leer(DATASET_INDICE_CLIENTES))
+        # Reclasifica aquí, en el hilo, si el índice guardado lo necesita
+        indice.contar_segmentos()
+        return indice
+
+    async def obtener(self):
+        """Retorna (versión, índice); FileNotFoundError si no hay índice guardado"""
+        if self.indice is not None and time.monotonic() - self.revisado < self.segundos_revision:
+            return self.version, self.indice
+
+        async with self._lock:
+            if self.indice is not None and time.monotonic() - self.revisado < self.segundos_revision:
+                return self.version, self.indice
+
+            loop = asyncio.get_running_loop()
+            version = await loop.run_in_executor(None, obtener_almacen().version, DATASET_INDICE_CLIENTES)
+            if version is None:
+                raise FileNotFoundError(f"{DATASET_INDICE_CLIENTES} no existe")
+            if self.indice is None or version != self.version:
+                self.indice = await loop.run_in_executor(None, self._cargar)
+                self.version = version
+            self.revisado = time.monotonic()
+            return self.version, self.indice
+
+
+# ============================================================
+# Servidor HTTP
+# ============================================================
+
+def _encabezados_respuesta(estado, encabezados, mantener):
+    lineas = [f"HTTP/1.1 {estado} {RAZONES[estado]}"]
+    lineas += [f"{clave}: {valor}" for clave, valor in encabezados]
+    lineas.append(f"Date: {formatdate(usegmt=True)}")
+    lineas.append("Connection: keep-alive" if mantener else "Connection: close")
+    return ("\r\n".join(lineas) + "\r\n\r\n").encode('latin-1')
+
+
+def _respuesta_error(estado, mensaje, mantener, extra=()):
+    cuerpo = json.dumps({"error": mensaje}, ensure_ascii=False).encode('utf-8')
+    encabezados = [("Content-Type", "application/json; charset=utf-8"),
+                   ("Content-Length", len(cuerpo)), *extra]
+    return _encabezados_respuesta(estado, encabezados, mantener) + cuerpo
+
+
+def _acepta_gzip(valor):
+    """Indica si Accept-Encoding admite gzip (con q > 0)
+
+    Una entrada explícita para gzip manda sobre el comodín '*'.
+    """
+    calidades = {}
+    for codificacion in valor.split(','):
+        nombre, *parametros = codificacion.split(';')
+        calidad = 1.0
+        for parametro in parametros:
+            clave, _, numero = parametro.partition('=')
+            if clave.strip().lower() == 'q':
+                try:
+                    calidad = float(numero)
+                except ValueError:
+                    calidad = 0.0
+        calidades[nombre.strip().lower()] = calidad
+    return calidades.get('gzip', calidades.get('*', 0.0)) > 0
+
+
+def _parsear_solicitud(datos):
+    """Retorna (método, ruta, versión, encabezados en minúsculas) o None si es inválida"""
+    try:
+        texto = datos.decode('latin-1')
+        linea, *resto = texto.split("\r\n")
+        metodo, objetivo, version = linea.split(" ")
+    except ValueError:
+        return None
+    encabezados = {}
+    for linea in resto:
+        if not linea:
+            continue
+        clave, separador, valor = linea.partition(":")
+        if not separador:
+            return None
+        encabezados[clave.strip().lower()] = valor.strip()
+    ruta = objetivo.split("?", 1)[0]
+    if len(ruta) > 1:
+        ruta = ruta.rstrip("/")
+    return metodo, ruta, version, encabezados
+
+
+class ServidorAPI:
+    """Atiende las conexiones y resuelve cada solicitud desde la caché"""
+
+    def __init__(self, cache=None, indice_clientes=None):
+        self.cache = cache or CacheRespuestas()
+        self.indice_clientes = indice_clientes or IndiceClientesCacheado()
+        self.inicio = time.time()
+        self.solicitudes = 0
+
+    def _salud(self):
+        return json.dumps({
+            "estado": "ok",
+            "segundos_activo": round(time.time() - self.inicio, 1),
+            "solicitudes": self.solicitudes,
+            "rutas": sorted([*self.cache.recursos, PREFIJO_CLIENTES + "<cliente>"]),
+        }).encode('utf-8')
+
+    async def responder(self, metodo, ruta, encabezados, mantener):
+        if ruta == "/api/salud":
+            cuerpo = self._salud()
+            return _encabezados_respuesta(200, [
+                ("Content-Type", "application/json; charset=utf-8"),
+                ("Content-Length", len(cuerpo)),
+                ("Cache-Control", "no-store"),
+            ], mantener) + (cuerpo if metodo == "GET" else b"")
+
+        es_cliente = ruta.startswith(PREFIJO_CLIENTES) and len(ruta) > len(PREFIJO_CLIENTES)
+        if ruta not in self.cache.recursos and not es_cliente:
+            return _respuesta_error(404, f"Ruta no encontrada: {ruta}", mantener)
+        if metodo not in ("GET", "HEAD"):
+            return _respuesta_error(405, "Solo se admiten GET y HEAD", mantener, [("Allow", "GET, HEAD")])
+
+        try:
+            if es_cliente:
+                cliente = unquote(ruta[len(PREFIJO_CLIENTES):])
+                version, indice = await self.indice_clientes.obtener()
+                ficha = indice.buscar(cliente)
+                if ficha is None:
+                    return _respuesta_error(404, f"Cliente no encontrado: {cliente}", mantener)
+                respuesta = RespuestaCacheada(version, ficha)
+            else:
+                respuesta = await self.cache.obtener(ruta)
+        except (OSError, KeyError, ValueError) as e:
+            return _respuesta_error(503, f"Datos no disponibles: {e}", mantener)
+
+        comunes = [("ETag", respuesta.etag), ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+        if_none_match = encabezados.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*"
+                              or respuesta.etag in (e.strip() for e in if_none_match.split(","))):
+            return _encabezados_respuesta(304, comunes, mantener)
+
+        if _acepta_gzip(encabezados.get("accept-encoding", "")):
+            cuerpo = respuesta.cuerpo_gzip
+            comunes.append(("Content-Encoding", "gzip"))
+        else:
+            cuerpo = respuesta.cuerpo
+        cabecera = _encabezados_respuesta(200, [
+            ("Content-Type", "application/json; charset=utf-8"),
+            ("Content-Length", len(cuerpo)),
+            *comunes,
+        ], mantener)
+        return cabecera + (cuerpo if metodo == "GET" else b"")
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión, con keep-alive hasta que el cliente la cierre"""
+        try:
+            while True:
+                try:
+                    datos = await asyncio.wait_for(lector.readuntil(b"\r\n\r\n"), TIMEOUT_INACTIVIDAD)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    escritor.write(_respuesta_error(400, "Encabezados demasiado grandes", False))
+                    break
+
+                solicitud = _parsear_solicitud(datos)
+                if solicitud is None:
+                    escritor.write(_respuesta_error(400, "Solicitud inválida", False))
+                    break
+                metodo, ruta, version, encabezados = solicitud
+                self.solicitudes += 1
+
+                conexion = encabezados.get("connection", "").lower()
+                mantener = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+                # No se aceptan cuerpos: si el cliente envía uno, se cierra tras responder
+                if encabezados.get("content-length", "0") != "0" or "transfer-encoding" in encabezados:
+                    mantener = False
+
+                escritor.write(await self.responder(metodo, ruta, encabezados, mantener))
+                await escritor.drain()
+                if not mantener:
+                    break
+        finally:
+            try:
+                escritor.close()
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def servir(host, puerto):
+    servidor_api = ServidorAPI()
+    servidor = await asyncio.start_server(servidor_api.atender, host, puerto,
+                                          limit=TAMANO_MAXIMO_ENCABEZADOS)
+    print(f"🚀 API de KPIs escuchando en http://{host}:{puerto}")
+    for ruta in ["/api/salud", *sorted(servidor_api.cache.recursos), PREFIJO_CLIENTES + "<cliente>"]:
+        print(f"   • {ruta}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API JSON con los KPIs del dashboard")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar")
+    parser.add_argument("--puerto", type=int, default=PUERTO_DEFECTO, help="Puerto TCP")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        print("\n👋 API detenida")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,26 @@ Aplicación web interactiva con Streamlit
 """
 
 import streamlit as st
-import json
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 
+from scripts.analyze_employment_data import calcular_metricas_principales
+from scripts.histograms import (DATASET_HISTOGRAMAS, combinar_histogramas, etiquetas_tramos,
+                                percentil_histograma, valores_dimension)
+from scripts.instrumentation import marcar_ejecucion, medir_seccion, registro
+from scripts.search_index import LARGO_MINIMO_TERMINO, LIMITE_CONTEO, IndiceBusqueda, consulta_buscable
+from scripts.storage import DATASETS_EMPLEO, cargar_datos_empleo, filtrar_ofertas, obtener_almacen
+
+# Periodos de publicación disponibles en el filtro de ofertas (días hacia atrás)
+PERIODOS_PUBLICACION = {
+    "Todas las fechas": None,
+    "Últimos 7 días": 7,
+    "Últimos 30 días": 30,
+}
+
 # Configuración de la página
 st.set_page_config(
     page_title="Dashboard Empleabilidad Chile",
@@ -48,22 +61,20 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def cargar_datos():
+@st.cache_resource
+def obtener_almacen_app():
+    """Almacén de datos compartido entre reruns y sesiones (reutiliza la conexión)"""
+    return obtener_almacen()
+
+def generar_y_cargar_datos():
     """Carga todos los datos necesarios, generándolos si no existen"""
-    import os
-    
-    # Verificar si los archivos existen, si no, generarlos
-    archivos_necesarios = [
-        'scripts/estadisticas_mensuales.json',
-        'scripts/datos_sectores.json',
-        'scripts/ofertas_laborales.json',
-        'scripts/datos_historicos.json'
-    ]
+    marcar_ejecucion("cargar_datos")
+    almacen = obtener_almacen_app()
     
-    archivos_faltantes = [f for f in archivos_necesarios if not os.path.exists(f)]
+    # Verificar si los conjuntos de datos existen, si no, generarlos
+    datasets_faltantes = [d for d in (*DATASETS_EMPLEO, DATASET_HISTOGRAMAS) if not almacen.existe(d)]
     
-    if archivos_faltantes:
+    if datasets_faltantes:
         st.info("⏳ Generando datos del mercado laboral...")
         # Importar y ejecutar el script de generación
         from scripts.generate_employment_data import main as generar_datos
@@ -71,24 +82,42 @@ def cargar_datos():
         st.success("✅ Datos generados correctamente")
     
     try:
-        with open('scripts/estadisticas_mensuales.json', 'r', encoding='utf-8') as f:
-            estadisticas = json.load(f)
-        
-        with open('scripts/datos_sectores.json', 'r', encoding='utf-8') as f:
-            sectores = json.load(f)
-        
-        with open('scripts/ofertas_laborales.json', 'r', encoding='utf-8') as f:
-            ofertas = json.load(f)
-        
-        with open('scripts/datos_historicos.json', 'r', encoding='utf-8') as f:
-            historicos = json.load(f)
-        
-        return estadisticas, sectores, ofertas, historicos
+        # Con consultas indexadas (SQLite) la tabla y los resúmenes consultan la base:
+        # las ofertas no se cargan en memoria
+        return cargar_datos_empleo(almacen, ofertas=not almacen.consultas_indexadas)
     except FileNotFoundError as e:
         st.error(f"⚠️ Error al cargar datos: {e}")
         st.info("Por favor, verifica que el directorio 'scripts' existe.")
         st.stop()
 
+@st.cache_data
+def leer_datos():
+    """Copia de los datos en cada proceso (backends json, sqlite y parquet)"""
+    return generar_y_cargar_datos()
+
+@st.cache_resource
+def abrir_datos_compartidos(versiones):
+    """Vistas de solo lectura sobre los archivos mapeados (backend mmap)
+
+    Las páginas las comparte el sistema operativo entre todos los workers del
+    host; las versiones invalidan el caché cuando se regeneran los datos.
+    """
+    return generar_y_cargar_datos()
+
+@medir_seccion("cargar_datos", cacheada=True,
+               contar_filas=lambda datos: sum(len(conjunto) for conjunto in datos if conjunto is not None))
+def cargar_datos():
+    """Datos del dashboard: vistas mapeadas compartidas si el backend lo permite"""
+    almacen = obtener_almacen_app()
+    if almacen.vistas_compartidas:
+        return abrir_datos_compartidos(tuple(almacen.version(d) for d in DATASETS_EMPLEO))
+    return leer_datos()
+
+def limpiar_cache_datos():
+    """Descarta los datos cacheados (los benchmarks miden la carga en frío)"""
+    leer_datos.clear()
+    abrir_datos_compartidos.clear()
+
 def mostrar_header():
     """Muestra el encabezado del dashboard"""
     col1, col2 = st.columns([3, 1])
@@ -102,49 +131,45 @@ def mostrar_header():
         if st.button("📊 Exportar Datos", use_container_width=True):
             st.info("Función de exportación disponible próximamente")
 
+@medir_seccion("mostrar_metricas",
+               contar_filas=lambda _, estadisticas, sectores: len(estadisticas) + len(sectores))
 def mostrar_metricas(estadisticas, sectores):
     """Muestra las métricas principales"""
-    ultima_estadistica = estadisticas[-1]
-    penultima_estadistica = estadisticas[-2] if len(estadisticas) > 1 else estadisticas[-1]
+    metricas = calcular_metricas_principales(estadisticas, sectores)
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        cambio_desempleo = ultima_estadistica["tasa_desempleo"] - penultima_estadistica["tasa_desempleo"]
         st.metric(
             label="Tasa de Desempleo",
-            value=f"{ultima_estadistica['tasa_desempleo']}%",
-            delta=f"{cambio_desempleo:.1f}%",
+            value=f"{metricas['tasa_desempleo']}%",
+            delta=f"{metricas['cambio_desempleo']:.1f}%",
             delta_color="inverse"
         )
     
     with col2:
-        cambio_sueldo = ultima_estadistica["sueldo_promedio"] - penultima_estadistica["sueldo_promedio"]
         st.metric(
             label="Sueldo Promedio",
-            value=f"${ultima_estadistica['sueldo_promedio']:,}",
-            delta=f"${cambio_sueldo:,}"
+            value=f"${metricas['sueldo_promedio']:,}",
+            delta=f"${metricas['cambio_sueldo']:,}"
         )
     
     with col3:
-        total_ofertas = sum(s["ofertas_activas"] for s in sectores)
         st.metric(
             label="Ofertas Activas",
-            value=f"{total_ofertas:,}",
+            value=f"{metricas['ofertas_activas']:,}",
             delta="+12.5%"
         )
     
     with col4:
         st.metric(
             label="Empleos Creados (Mes)",
-            value=f"{ultima_estadistica['empleos_creados']:,}",
+            value=f"{metricas['empleos_creados']:,}",
             delta="+8.2%"
         )
 
-def mostrar_tendencias_historicas(historicos):
-    """Muestra gráfico de tendencias de 10 años"""
-    st.subheader("📈 Tendencias Históricas del Mercado Laboral (2015-2024)")
-    
+def construir_figura_historica(historicos):
+    """Construye el gráfico de tendencias de 10 años con tres ejes"""
     df = pd.DataFrame(historicos)
     
     # Crear gráfico con tres ejes
@@ -220,6 +245,72 @@ def mostrar_tendencias_historicas(historicos):
         )
     )
     
+    return fig
+
+def construir_figura_mensual(estadisticas):
+    """Construye el gráfico de tendencias mensuales"""
+    df_est = pd.DataFrame(estadisticas)
+    
+    fig1 = go.Figure()
+    fig1.add_trace(go.Scatter(
+        x=df_est['mes'], y=df_est['empleos_creados'],
+        name='Empleos Creados',
+        line=dict(color='#22c55e', width=3),
+        fill='tonexty'
+    ))
+    fig1.add_trace(go.Scatter(
+        x=df_est['mes'], y=df_est['tasa_desempleo'] * 3000,
+        name='Tasa Desempleo (x3000)',
+        line=dict(color='#ef4444', width=3)
+    ))
+    
+    fig1.update_layout(
+        height=400,
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#1a1a1a',
+        font=dict(color='#ffffff'),
+        xaxis=dict(gridcolor='#2a2a2a'),
+        yaxis=dict(gridcolor='#2a2a2a'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    
+    return fig1
+
+def construir_figura_sectores(sectores):
+    """Construye el gráfico de empleos por sector"""
+    df_sec = pd.DataFrame(sectores).sort_values('empleos_totales', ascending=True)
+    
+    fig2 = go.Figure(go.Bar(
+        x=df_sec['empleos_totales'],
+        y=df_sec['sector'],
+        orientation='h',
+        marker=dict(
+            color=df_sec['empleos_totales'],
+            colorscale='Blues',
+            showscale=False
+        ),
+        text=df_sec['empleos_totales'].apply(lambda x: f'{x:,}'),
+        textposition='outside'
+    ))
+    
+    fig2.update_layout(
+        height=400,
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#1a1a1a',
+        font=dict(color='#ffffff'),
+        xaxis=dict(title='Número de Empleos', gridcolor='#2a2a2a'),
+        yaxis=dict(title='', gridcolor='#2a2a2a')
+    )
+    
+    return fig2
+
+@medir_seccion("mostrar_tendencias_historicas", contar_filas=lambda _, historicos: len(historicos))
+def mostrar_tendencias_historicas(historicos):
+    """Muestra gráfico de tendencias de 10 años"""
+    st.subheader("📈 Tendencias Históricas del Mercado Laboral (2015-2024)")
+    
+    fig = construir_figura_historica(historicos)
+    
     st.plotly_chart(fig, use_container_width=True)
     
     # Métricas resumidas
@@ -234,73 +325,161 @@ def mostrar_tendencias_historicas(historicos):
         total_ofertas = sum(h['ofertas_publicadas'] for h in historicos)
         st.metric("Ofertas Acumuladas", f"{total_ofertas:,}")
 
+@medir_seccion("mostrar_graficos",
+               contar_filas=lambda _, estadisticas, sectores: len(estadisticas) + len(sectores))
 def mostrar_graficos(estadisticas, sectores):
     """Muestra los gráficos principales"""
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("💼 Tendencias Mensuales")
-        df_est = pd.DataFrame(estadisticas)
-        
-        fig1 = go.Figure()
-        fig1.add_trace(go.Scatter(
-            x=df_est['mes'], y=df_est['empleos_creados'],
-            name='Empleos Creados',
-            line=dict(color='#22c55e', width=3),
-            fill='tonexty'
-        ))
-        fig1.add_trace(go.Scatter(
-            x=df_est['mes'], y=df_est['tasa_desempleo'] * 3000,
-            name='Tasa Desempleo (x3000)',
-            line=dict(color='#ef4444', width=3)
-        ))
-        
-        fig1.update_layout(
-            height=400,
-            plot_bgcolor='#1a1a1a',
-            paper_bgcolor='#1a1a1a',
-            font=dict(color='#ffffff'),
-            xaxis=dict(gridcolor='#2a2a2a'),
-            yaxis=dict(gridcolor='#2a2a2a'),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
+        fig1 = construir_figura_mensual(estadisticas)
         
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         st.subheader("🏢 Empleos por Sector")
-        df_sec = pd.DataFrame(sectores).sort_values('empleos_totales', ascending=True)
-        
-        fig2 = go.Figure(go.Bar(
-            x=df_sec['empleos_totales'],
-            y=df_sec['sector'],
-            orientation='h',
-            marker=dict(
-                color=df_sec['empleos_totales'],
-                colorscale='Blues',
-                showscale=False
-            ),
-            text=df_sec['empleos_totales'].apply(lambda x: f'{x:,}'),
-            textposition='outside'
-        ))
-        
-        fig2.update_layout(
-            height=400,
-            plot_bgcolor='#1a1a1a',
-            paper_bgcolor='#1a1a1a',
-            font=dict(color='#ffffff'),
-            xaxis=dict(title='Número de Empleos', gridcolor='#2a2a2a'),
-            yaxis=dict(title='', gridcolor='#2a2a2a')
-        )
+        fig2 = construir_figura_sectores(sectores)
         
         st.plotly_chart(fig2, use_container_width=True)
 
+@st.cache_data
+def cargar_histogramas(version):
+    """Carga los histogramas de sueldos precalculados (la versión invalida el caché)"""
+    return obtener_almacen_app().leer(DATASET_HISTOGRAMAS)
+
+def construir_figura_distribucion(conteos, limites):
+    """Construye el gráfico de distribución de sueldos por tramo"""
+    fig = go.Figure(go.Bar(
+        x=etiquetas_tramos(limites),
+        y=conteos,
+        marker=dict(color='#a855f7'),
+        text=[c if c else '' for c in conteos],
+        textposition='outside'
+    ))
+    
+    fig.update_layout(
+        height=400,
+        plot_bgcolor='#1a1a1a',
+        paper_bgcolor='#1a1a1a',
+        font=dict(color='#ffffff'),
+        xaxis=dict(title='Sueldo ofrecido', gridcolor='#2a2a2a'),
+        yaxis=dict(title='Ofertas', gridcolor='#2a2a2a'),
+        bargap=0.05
+    )
+    
+    return fig
+
+@medir_seccion("mostrar_distribucion_sueldos", contar_filas=lambda grupos: grupos)
+def mostrar_distribucion_sueldos():
+    """Muestra la distribución de sueldos a partir de los histogramas precalculados"""
+    st.subheader("💰 Distribución de Sueldos Ofrecidos")
+    
+    histogramas = cargar_histogramas(obtener_almacen_app().version(DATASET_HISTOGRAMAS))
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sector = st.selectbox("Sector", ["Todos"] + valores_dimension(histogramas, 'sector'),
+                              key="histograma_sector")
+    with col2:
+        region = st.selectbox("Región", ["Todas"] + valores_dimension(histogramas, 'region'),
+                              key="histograma_region")
+    with col3:
+        contrato = st.selectbox("Tipo de contrato", ["Todos"] + valores_dimension(histogramas, 'tipo_contrato'),
+                                key="histograma_contrato")
+    
+    # Cualquier combinación de filtros es la suma de los grupos que coinciden
+    combinado = combinar_histogramas(
+        histogramas,
+        sector=None if sector == "Todos" else sector,
+        region=None if region == "Todas" else region,
+        tipo_contrato=None if contrato == "Todos" else contrato
+    )
+    
+    if not combinado["total"]:
+        st.info("No hay ofertas para los filtros seleccionados")
+        return len(histogramas["grupos"])
+    
+    limites = histogramas["limites"]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Ofertas", f"{combinado['total']:,}")
+    with col2:
+        st.metric("Sueldo Promedio", f"${combinado['suma'] // combinado['total']:,}")
+    with col3:
+        st.metric("Sueldo Mediano (aprox.)", f"${percentil_histograma(combinado['conteos'], 0.5, limites):,}")
+    
+    st.plotly_chart(construir_figura_distribucion(combinado["conteos"], limites), use_container_width=True)
+    
+    return len(histogramas["grupos"])
+
+@st.cache_data
+def opciones_filtro(campo, version):
+    """Valores disponibles para un filtro de ofertas (la versión invalida el caché)"""
+    return obtener_almacen_app().valores_distintos('ofertas_laborales', campo)
+
+@st.cache_resource
+def construir_indice_busqueda(version):
+    """Índice de búsqueda de ofertas, construido una vez por versión de los datos"""
+    estadisticas, sectores, ofertas, historicos = cargar_datos()
+    if ofertas is None:
+        # Backends con consultas indexadas: las ofertas se leen solo al buscar
+        ofertas = obtener_almacen_app().leer('ofertas_laborales')
+    return IndiceBusqueda(ofertas)
+
+@medir_seccion("mostrar_tabla_ofertas", contar_filas=lambda filas, ofertas: filas)
 def mostrar_tabla_ofertas(ofertas):
     """Muestra tabla de ofertas laborales"""
     st.subheader("💼 Ofertas Laborales Recientes")
     
-    # Filtrar solo ofertas activas
-    ofertas_activas = [o for o in ofertas if o["estado"] == "Activa"][:15]
+    almacen = obtener_almacen_app()
+    version = almacen.version('ofertas_laborales')
+    
+    busqueda = st.text_input(
+        "Buscar",
+        placeholder="Cargo, empresa o sector (ej: data, Codelco, ingeniero)",
+        key="busqueda_ofertas"
+    ).strip()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sector = st.selectbox("Sector", ["Todos"] + opciones_filtro('sector', version), key="filtro_sector")
+    with col2:
+        region = st.selectbox("Región", ["Todas"] + opciones_filtro('region', version), key="filtro_region")
+    with col3:
+        periodo = st.selectbox("Publicación", list(PERIODOS_PUBLICACION), key="filtro_periodo")
+    
+    dias = PERIODOS_PUBLICACION[periodo]
+    filtros = {
+        "sector": None if sector == "Todos" else sector,
+        "region": None if region == "Todas" else region,
+        "estado": "Activa",
+        "desde": (datetime.now() - timedelta(days=dias)).strftime("%Y-%m-%d") if dias else None,
+        "limite": 15
+    }
+    
+    # Filtrar solo ofertas activas (en SQLite el filtro se resuelve con índices)
+    if busqueda and not consulta_buscable(busqueda):
+        st.caption(f"✏️ Escribe al menos {LARGO_MINIMO_TERMINO} letras para buscar")
+        busqueda = ""
+    
+    if busqueda:
+        # Coincidencias en orden de relevancia, calculadas a medida que se recorren:
+        # la página se detiene al completar el límite y el conteo reutiliza lo calculado
+        indice = construir_indice_busqueda(version)
+        coincidentes = indice.combinaciones_coincidentes(busqueda)
+        ofertas_activas = filtrar_ofertas(indice.ofertas_de(coincidentes), **filtros)
+        total = indice.contar_ofertas(coincidentes, limite=LIMITE_CONTEO)
+        cantidad = f"Más de {LIMITE_CONTEO:,}" if total == LIMITE_CONTEO else f"{total:,}"
+        st.caption(f"🔎 {cantidad} ofertas coinciden con \"{busqueda}\" (antes de filtros)")
+    elif almacen.consultas_indexadas:
+        ofertas_activas = almacen.consultar_ofertas(**filtros)
+    else:
+        ofertas_activas = filtrar_ofertas(ofertas, **filtros)
+    
+    if not ofertas_activas:
+        st.info("No hay ofertas activas para los filtros seleccionados")
+        return 0
     
     df = pd.DataFrame(ofertas_activas)
     df['sueldo'] = df['sueldo'].apply(lambda x: f"${x:,}")
@@ -315,9 +494,40 @@ def mostrar_tabla_ofertas(ofertas):
         height=400,
         hide_index=True
     )
+    
+    return len(ofertas_activas)
+
+def modo_debug():
+    """El panel de rendimiento se activa con ?debug=1 o DASHBOARD_DEBUG=1"""
+    if os.environ.get("DASHBOARD_DEBUG") == "1":
+        return True
+    return st.experimental_get_query_params().get("debug", ["0"])[0] == "1"
+
+def mostrar_panel_debug():
+    """Muestra en la barra lateral los tiempos por sección de este rerun y sus percentiles"""
+    resumen = registro.resumen()
+    filas = []
+    for muestra in registro.muestras_ejecucion():
+        datos = resumen[muestra["seccion"]]
+        filas.append({
+            "Sección": muestra["seccion"],
+            "ms": round(muestra["segundos"] * 1000, 2),
+            "Caché": muestra["cache"] or "-",
+            "Filas": muestra["filas"],
+            "p50 ms": round(datos["p50"] * 1000, 2),
+            "p99 ms": round(datos["p99"] * 1000, 2),
+        })
+    
+    with st.sidebar:
+        st.subheader("🛠️ Rendimiento por Sección")
+        st.dataframe(pd.DataFrame(filas), use_container_width=True, hide_index=True)
+        total = sum(m["segundos"] for m in registro.muestras_ejecucion())
+        st.caption(f"Total instrumentado: {total * 1000:.1f} ms")
 
 def main():
     """Función principal de la aplicación"""
+    registro.iniciar_ejecucion()
+    
     # Cargar datos
     estadisticas, sectores, ofertas, historicos = cargar_datos()
     
@@ -334,6 +544,9 @@ def main():
     mostrar_graficos(estadisticas, sectores)
     st.divider()
     
+    mostrar_distribucion_sueldos()
+    st.divider()
+    
     mostrar_tabla_ofertas(ofertas)
     
     # Footer
@@ -345,6 +558,11 @@ def main():
         <p>Desarrollado con Python & Streamlit</p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Métricas por sección: panel opcional y archivo para Prometheus (por intervalos)
+    if modo_debug():
+        mostrar_panel_debug()
+    registro.escribir_prometheus_periodico()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,422 @@
+"""
+Suite de Benchmarks de Escala
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este script mide generadores, cargadores, analizadores y constructores de
+gráficos a distintos volúmenes de datos. Por cada caso registra tiempo,
+filas por segundo y la memoria que agrega la función medida (RSS pico al
+terminar menos RSS pico antes de medir, sin el intérprete ni la preparación
+de datos), guarda los resultados en JSON y los compara con una línea base
+para detectar regresiones de tiempo o de memoria.
+Un caso que falla o excede el tiempo máximo también cuenta como regresión.
+
+La línea base versionada (benchmarks/linea_base.json) cubre 1e3 y 1e5 filas;
+los tamaños sin línea base solo se reportan.
+
+Cada caso corre en un subproceso propio, con sus datos en un directorio
+temporal, para que la memoria pico de un caso no contamine a los demás.
+
+Uso (desde el directorio de la aplicación):
+    python benchmarks/benchmark_escala.py
+    python benchmarks/benchmark_escala.py --tamanos 1000 100000 --casos calcular_kpis
+    python benchmarks/benchmark_escala.py --guardar-linea-base
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_BENCHMARKS = os.path.join(DIRECTORIO_APP, 'benchmarks')
+RUTA_RESULTADOS = os.path.join(DIRECTORIO_BENCHMARKS, 'resultados.json')
+RUTA_LINEA_BASE = os.path.join(DIRECTORIO_BENCHMARKS, 'linea_base.json')
+
+TAMANOS_DEFECTO = [1_000, 100_000, 1_000_000, 10_000_000]
+TOLERANCIA_DEFECTO = 0.20
+TOLERANCIA_RSS_DEFECTO = 0.25
+# Márgenes absolutos: en casos de milisegundos o pocos MB el ruido supera la tolerancia
+MARGEN_SEGUNDOS = 0.01
+MARGEN_RSS_MB = 10
+TIMEOUT_DEFECTO = 3600
+# El tiempo de un caso es el mejor de varias repeticiones (menos sensible al ruido)
+REPETICIONES_DEFECTO = 5
+# Latencia máxima de una búsqueda en la tabla de ofertas (primera página y total acotado)
+OBJETIVO_BUSQUEDA_MS = 50
+CONSULTAS_BUSQUEDA = ["data", "educacion", "ingeniero", "codelco", "minas", "ana de",
+                      "supervisor chile", "analista codelco"]
+
+
+def _rss_pico_mb():
+    """Memoria residente pico del proceso actual en MB (ru_maxrss está en KB en Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _repetir(registros, n):
+    """Repite cíclicamente una lista pequeña hasta completar n registros"""
+    return list(itertools.islice(itertools.cycle(registros), n))
+
+
+# ============================================================
+# Preparación de datos (no cronometrada)
+# ============================================================
+
+def _ofertas(n):
+    from scripts.generate_employment_data import generar_ofertas_laborales
+    return generar_ofertas_laborales(n)
+
+
+def _transacciones(n):
+    from scripts.generate_financial_data import generar_transacciones
+    return generar_transacciones(n)
+
+
+def _escribir_datos_empleo(n, almacen=None):
+    from scripts.generate_employment_data import (generar_datos_historicos, generar_datos_por_sector,
+                                                  generar_estadisticas_mensuales)
+    from scripts.histograms import DATASET_HISTOGRAMAS, construir_histogramas
+    from scripts.storage import obtener_almacen
+    almacen = almacen or obtener_almacen()
+    ofertas = _ofertas(n)
+    almacen.escribir("ofertas_laborales", ofertas)
+    almacen.escribir(DATASET_HISTOGRAMAS, construir_histogramas(ofertas))
+    almacen.escribir("estadisticas_mensuales", generar_estadisticas_mensuales())
+    almacen.escribir("datos_sectores", generar_datos_por_sector())
+    almacen.escribir("datos_historicos", generar_datos_historicos())
+
+
+def _escribir_datos_finanzas(n):
+    from scripts.generate_financial_data import generar_metricas_mensuales, productos
+    from scripts.storage import obtener_almacen
+    almacen = obtener_almacen()
+    almacen.escribir("transacciones", _transacciones(n))
+    almacen.escribir("metricas_mensuales", generar_metricas_mensuales())
+    almacen.escribir("productos", productos)
+
+
+# ============================================================
+# Casos: cada uno prepara sus datos y retorna la función a medir
+# ============================================================
+
+def caso_generar_ofertas_laborales(n):
+    from scripts.generate_employment_data import generar_ofertas_laborales
+    return lambda: generar_ofertas_laborales(n)
+
+
+def caso_generar_transacciones(n):
+    from scripts.generate_financial_data import generar_transacciones
+    return lambda: generar_transacciones(n)
+
+
+def caso_generar_ofertas_registros(n):
+    from scripts.generate_employment_data import generar_ofertas_laborales
+    return lambda: generar_ofertas_laborales(n, como_registros=True)
+
+
+def caso_generar_transacciones_registros(n):
+    from scripts.generate_financial_data import generar_transacciones
+    return lambda: generar_transacciones(n, como_registros=True)
+
+
+def caso_cargar_datos_app(n):
+    _escribir_datos_empleo(n)
+    import app
+
+    def cargar():
+        app.limpiar_cache_datos()
+        return app.cargar_datos()
+    return cargar
+
+
+def caso_abrir_datos_mapeados(n):
+    from scripts.storage import cargar_datos_empleo, obtener_almacen
+    _escribir_datos_empleo(n, almacen=obtener_almacen("mmap"))
+    return lambda: cargar_datos_empleo(obtener_almacen("mmap"))
+
+
+def caso_cargar_datos_empleo(n):
+    _escribir_datos_empleo(n)
+    from scripts.analyze_employment_data import cargar_datos
+    return cargar_datos
+
+
+def caso_cargar_datos_finanzas(n):
+    _escribir_datos_finanzas(n)
+    from scripts.analyze_financial_data import cargar_datos
+    return cargar_datos
+
+
+def caso_analizar_ofertas(n):
+    from scripts.analyze_employment_data import analizar_ofertas
+    ofertas = _ofertas(n)
+
+    def analizar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return analizar_ofertas(ofertas)
+    return analizar
+
+
+def caso_calcular_kpis(n):
+    from scripts.analyze_financial_data import calcular_kpis
+    from scripts.generate_financial_data import generar_metricas_mensuales
+    transacciones = _transacciones(n)
+    metricas = generar_metricas_mensuales()
+    return lambda: calcular_kpis(transacciones, metricas)
+
+
+def caso_analizar_productos_top(n):
+    from scripts.analyze_financial_data import analizar_productos_top
+    transacciones = _transacciones(n)
+    return lambda: analizar_productos_top(transacciones)
+
+
+def caso_analizar_productos_top_aproximado(n):
+    from scripts.analyze_financial_data import analizar_productos_top
+    transacciones = _transacciones(n)
+    return lambda: analizar_productos_top(transacciones, aproximado=True)
+
+
+def caso_construir_figura_historica(n):
+    from scripts.generate_employment_data import generar_datos_historicos
+    import app
+    historicos = _repetir(generar_datos_historicos(), n)
+    return lambda: app.construir_figura_historica(historicos)
+
+
+def caso_construir_figura_mensual(n):
+    from scripts.generate_employment_data import generar_estadisticas_mensuales
+    import app
+    estadisticas = _repetir(generar_estadisticas_mensuales(), n)
+    return lambda: app.construir_figura_mensual(estadisticas)
+
+
+def caso_construir_figura_sectores(n):
+    from scripts.generate_employment_data import generar_datos_por_sector
+    import app
+    sectores = _repetir(generar_datos_por_sector(), n)
+    return lambda: app.construir_figura_sectores(sectores)
+
+
+def caso_buscar_ofertas(n):
+    from scripts.search_index import LIMITE_CONTEO, IndiceBusqueda
+    from scripts.storage import filtrar_ofertas
+    # Como en datos reales, cada oferta es una combinación distinta (cargos únicos)
+    ofertas = [{**oferta, "cargo": f"{oferta['cargo']} {i}"} for i, oferta in enumerate(_ofertas(n))]
+    indice = IndiceBusqueda(ofertas)
+
+    def medir(consulta):
+        inicio = time.perf_counter()
+        coincidentes = indice.combinaciones_coincidentes(consulta)
+        filtrar_ofertas(indice.ofertas_de(coincidentes), estado="Activa", limite=15)
+        indice.contar_ofertas(coincidentes, limite=LIMITE_CONTEO)
+        return (time.perf_counter() - inicio) * 1000
+
+    def buscar():
+        # Cada consulta como en la tabla de la app; sobre el objetivo el caso falla
+        lentas = [f"{consulta!r} {milisegundos:.1f} ms" for consulta in CONSULTAS_BUSQUEDA
+                  if (milisegundos := min(medir(consulta) for _ in range(3))) > OBJETIVO_BUSQUEDA_MS]
+        if lentas:
+            raise RuntimeError(f"Búsquedas sobre {OBJETIVO_BUSQUEDA_MS} ms: {', '.join(lentas)}")
+    return buscar
+
+
+CASOS = {
+    "generar_ofertas_laborales": caso_generar_ofertas_laborales,
+    "generar_transacciones": caso_generar_transacciones,
+    "generar_ofertas_registros": caso_generar_ofertas_registros,
+    "generar_transacciones_registros": caso_generar_transacciones_registros,
+    "cargar_datos_app": caso_cargar_datos_app,
+    "cargar_datos_empleo": caso_cargar_datos_empleo,
+    "cargar_datos_finanzas": caso_cargar_datos_finanzas,
+    "abrir_datos_mapeados": caso_abrir_datos_mapeados,
+    "analizar_ofertas": caso_analizar_ofertas,
+    "calcular_kpis": caso_calcular_kpis,
+    "analizar_productos_top": caso_analizar_productos_top,
+    "analizar_productos_top_aproximado": caso_analizar_productos_top_aproximado,
+    "construir_figura_historica": caso_construir_figura_historica,
+    "construir_figura_mensual": caso_construir_figura_mensual,
+    "construir_figura_sectores": caso_construir_figura_sectores,
+    "buscar_ofertas": caso_buscar_ofertas,
+}
+
+
+# ============================================================
+# Ejecución
+# ============================================================
+
+def ejecutar_caso(nombre, n, repeticiones=REPETICIONES_DEFECTO):
+    """Prepara y mide un caso en el proceso actual (el mejor tiempo de las repeticiones)"""
+    funcion = CASOS[nombre](n)
+    rss_base = _rss_pico_mb()
+
+    segundos = None
+    for _ in range(repeticiones):
+        # Que la basura de una repetición no se recolecte durante la siguiente
+        gc.collect()
+        inicio = time.perf_counter()
+        funcion()
+        transcurrido = time.perf_counter() - inicio
+        segundos = transcurrido if segundos is None else min(segundos, transcurrido)
+    rss_pico = _rss_pico_mb()
+
+    return {
+        "caso": nombre,
+        "filas": n,
+        "segundos": round(segundos, 6),
+        "filas_por_segundo": round(n / segundos, 1) if segundos > 0 else None,
+        "rss_base_mb": round(rss_base, 1),
+        "rss_pico_mb": round(rss_pico, 1),
+        "rss_caso_mb": round(rss_pico - rss_base, 1)
+    }
+
+
+def ejecutar_en_subproceso(nombre, n, timeout=TIMEOUT_DEFECTO, repeticiones=REPETICIONES_DEFECTO):
+    """Ejecuta un caso en un subproceso aislado con datos en un directorio temporal"""
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as directorio:
+        # Semilla de hash fija: la disposición de dicts y sets no varía entre corridas
+        entorno = dict(os.environ, DATOS_DIRECTORIO=directorio, PYTHONHASHSEED="0")
+        try:
+            proceso = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--interno", nombre, str(n), str(repeticiones)],
+                cwd=DIRECTORIO_APP, env=entorno, capture_output=True, text=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return {"caso": nombre, "filas": n, "error": f"timeout ({timeout} s)"}
+
+    if proceso.returncode != 0:
+        ultima_linea = (proceso.stderr.strip().splitlines() or ["error desconocido"])[-1]
+        return {"caso": nombre, "filas": n, "error": ultima_linea}
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def comparar_con_linea_base(resultados, linea_base, tolerancia=TOLERANCIA_DEFECTO,
+                            tolerancia_rss=TOLERANCIA_RSS_DEFECTO):
+    """Retorna los casos que fallaron o superan la línea base en tiempo o en memoria
+
+    La memoria que se compara es la que agrega la función medida
+    (rss_caso_mb): el RSS pico del proceso incluye el intérprete y los datos
+    preparados, y ocultaría una regresión del caso. Solo se comparan los
+    casos y tamaños presentes en la línea base.
+    """
+    referencia = {(r["caso"], r["filas"]): r for r in linea_base if "error" not in r}
+    regresiones = []
+    for r in resultados:
+        base = referencia.get((r["caso"], r["filas"]))
+        if base is None:
+            continue
+        if "error" in r:
+            regresiones.append({"caso": r["caso"], "filas": r["filas"], "error": r["error"]})
+            continue
+        for metrica, tolerancia_metrica, margen in (("segundos", tolerancia, MARGEN_SEGUNDOS),
+                                                    ("rss_caso_mb", tolerancia_rss, MARGEN_RSS_MB)):
+            limite = base[metrica] * (1 + tolerancia_metrica) + margen
+            if r[metrica] > limite:
+                regresiones.append({
+                    "caso": r["caso"],
+                    "filas": r["filas"],
+                    "metrica": metrica,
+                    "valor": r[metrica],
+                    "valor_base": base[metrica],
+                    "variacion": round((r[metrica] / base[metrica] - 1) * 100, 1)
+                })
+    return regresiones
+
+
+def imprimir_regresion(r):
+    if "error" in r:
+        print(f"   • {r['caso']} ({r['filas']:,} filas): falló ({r['error']})")
+    elif r["metrica"] == "segundos":
+        print(f"   • {r['caso']} ({r['filas']:,} filas): {r['valor_base']:.4f} s → "
+              f"{r['valor']:.4f} s ({r['variacion']:+.1f}%)")
+    else:
+        print(f"   • {r['caso']} ({r['filas']:,} filas): memoria del caso {r['valor_base']:,.1f} MB → "
+              f"{r['valor']:,.1f} MB ({r['variacion']:+.1f}%)")
+
+
+def imprimir_resultado(r):
+    if "error" in r:
+        print(f"   ❌ {r['caso']:<34} {r['filas']:>12,}  {r['error']}")
+    else:
+        print(f"   • {r['caso']:<34} {r['filas']:>12,}  {r['segundos']:>10.4f} s  "
+              f"{r['filas_por_segundo'] or 0:>14,.0f} filas/s  {r['rss_caso_mb']:>9,.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de escala del proyecto")
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=list(CASOS),
+                        help="Casos a ejecutar (por defecto, todos)")
+    parser.add_argument("--tamanos", nargs="+", type=int, default=TAMANOS_DEFECTO,
+                        help="Cantidades de filas a medir")
+    parser.add_argument("--salida", default=RUTA_RESULTADOS, help="Archivo JSON de resultados")
+    parser.add_argument("--linea-base", default=RUTA_LINEA_BASE, help="Archivo JSON de línea base")
+    parser.add_argument("--guardar-linea-base", action="store_true",
+                        help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_DEFECTO,
+                        help="Aumento de tiempo tolerado antes de marcar regresión (0.2 = 20%%)")
+    parser.add_argument("--tolerancia-rss", type=float, default=TOLERANCIA_RSS_DEFECTO,
+                        help="Aumento de memoria del caso tolerado antes de marcar regresión (0.25 = 25%%)")
+    parser.add_argument("--timeout", type=int, default=TIMEOUT_DEFECTO,
+                        help="Tiempo máximo por caso en segundos")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES_DEFECTO,
+                        help="Repeticiones por caso; se reporta el mejor tiempo")
+    parser.add_argument("--interno", nargs=3, metavar=("CASO", "FILAS", "REPETICIONES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        # Modo subproceso: medir un caso y emitir el resultado como JSON
+        sys.path.insert(0, DIRECTORIO_APP)
+        nombre, n, repeticiones = args.interno
+        resultado = ejecutar_caso(nombre, int(n), int(repeticiones))
+        print(json.dumps(resultado))
+        return 0
+
+    print("⏱️  Ejecutando benchmarks de escala...")
+    print(f"   {'Caso':<36} {'Filas':>12}  {'Tiempo':>12}  {'Throughput':>22}  {'Memoria caso':>12}")
+
+    resultados = []
+    for n in args.tamanos:
+        for nombre in args.casos:
+            resultado = ejecutar_en_subproceso(nombre, n, args.timeout, args.repeticiones)
+            imprimir_resultado(resultado)
+            resultados.append(resultado)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Resultados guardados en {args.salida}")
+
+    if args.guardar_linea_base:
+        with open(args.linea_base, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"✅ Línea base actualizada en {args.linea_base}")
+        return 0
+
+    if not os.path.exists(args.linea_base):
+        print("ℹ️  No hay línea base; usa --guardar-linea-base para crearla")
+        return 0
+
+    with open(args.linea_base, 'r', encoding='utf-8') as f:
+        linea_base = json.load(f)
+    regresiones = comparar_con_linea_base(resultados, linea_base, args.tolerancia, args.tolerancia_rss)
+
+    if regresiones:
+        print(f"\n⚠️  {len(regresiones)} regresiones sobre la línea base "
+              f"(tolerancia {args.tolerancia:.0%} en tiempo, {args.tolerancia_rss:.0%} en memoria):")
+        for r in regresiones:
+            imprimir_regresion(r)
+        return 1
+
+    print("\n✅ Sin regresiones respecto de la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
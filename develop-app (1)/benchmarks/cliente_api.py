@@ -0,0 +1,133 @@
+"""
+Cliente de Carga para la API de KPIs
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este script hace de servicio consumidor local: abre N conexiones keep-alive
+contra api.py y envía solicitudes durante un tiempo fijo, reportando
+solicitudes por segundo, percentiles de latencia y códigos de respuesta.
+Con --etag reenvía el ETag recibido (If-None-Match), como haría un cliente
+que solo quiere enterarse de cambios.
+
+Uso (con la API corriendo):
+    python benchmarks/cliente_api.py --conexiones 50 --segundos 10
+    python benchmarks/cliente_api.py --ruta /api/finanzas/kpis --etag --gzip
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_APP)
+
+from scripts.instrumentation import percentil
+
+RUTAS_DEFECTO = ["/api/metricas", "/api/sectores", "/api/historicos", "/api/finanzas/kpis"]
+
+
+async def _leer_respuesta(lector):
+    """Lee una respuesta HTTP/1.1 con Content-Length; retorna (estado, encabezados)"""
+    cabecera = await lector.readuntil(b"\r\n\r\n")
+    lineas = cabecera.decode('latin-1').split("\r\n")
+    estado = int(lineas[0].split(" ")[1])
+    encabezados = {}
+    for linea in lineas[1:]:
+        clave, separador, valor = linea.partition(":")
+        if separador:
+            encabezados[clave.strip().lower()] = valor.strip()
+    largo = int(encabezados.get("content-length", 0))
+    if largo:
+        await lector.readexactly(largo)
+    return estado, encabezados
+
+
+async def conexion(host, puerto, rutas, hasta, usar_etag, usar_gzip, latencias, estados):
+    """Una conexión keep-alive que envía solicitudes hasta el instante indicado"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    etags = {}
+    i = 0
+    try:
+        while time.perf_counter() < hasta:
+            ruta = rutas[i % len(rutas)]
+            i += 1
+            encabezados = f"GET {ruta} HTTP/1.1\r\nHost: {host}\r\n"
+            if usar_gzip:
+                encabezados += "Accept-Encoding: gzip\r\n"
+            if usar_etag and ruta in etags:
+                encabezados += f"If-None-Match: {etags[ruta]}\r\n"
+
+            inicio = time.perf_counter()
+            escritor.write((encabezados + "\r\n").encode('latin-1'))
+            estado, respuesta = await _leer_respuesta(lector)
+            latencias.append(time.perf_counter() - inicio)
+            estados[estado] = estados.get(estado, 0) + 1
+
+            if "etag" in respuesta:
+                etags[ruta] = respuesta["etag"]
+            if respuesta.get("connection", "").lower() == "close":
+                break
+    finally:
+        escritor.close()
+
+
+async def ejecutar(host, puerto, rutas, conexiones, segundos, usar_etag, usar_gzip):
+    latencias = []
+    estados = {}
+    inicio = time.perf_counter()
+    hasta = inicio + segundos
+    tareas = [conexion(host, puerto, rutas, hasta, usar_etag, usar_gzip, latencias, estados)
+              for _ in range(conexiones)]
+    fallos = [r for r in await asyncio.gather(*tareas, return_exceptions=True) if isinstance(r, Exception)]
+    transcurrido = time.perf_counter() - inicio
+    ordenadas = sorted(latencias)
+
+    return {
+        "solicitudes": len(latencias),
+        "segundos": round(transcurrido, 3),
+        "solicitudes_por_segundo": round(len(latencias) / transcurrido, 1) if transcurrido > 0 else 0.0,
+        "p50_ms": round(percentil(ordenadas, 0.5) * 1000, 3),
+        "p90_ms": round(percentil(ordenadas, 0.9) * 1000, 3),
+        "p99_ms": round(percentil(ordenadas, 0.99) * 1000, 3),
+        "estados": estados,
+        "fallos": [str(f) for f in fallos]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cliente de carga para la API de KPIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8502)
+    parser.add_argument("--ruta", nargs="+", default=RUTAS_DEFECTO, help="Rutas a consultar en rotación")
+    parser.add_argument("--conexiones", type=int, default=20, help="Conexiones keep-alive simultáneas")
+    parser.add_argument("--segundos", type=float, default=5.0, help="Duración de la prueba")
+    parser.add_argument("--etag", action="store_true", help="Enviar If-None-Match con el último ETag")
+    parser.add_argument("--gzip", action="store_true", help="Pedir respuestas comprimidas")
+    args = parser.parse_args()
+
+    print(f"🚀 {args.conexiones} conexiones contra http://{args.host}:{args.puerto} "
+          f"durante {args.segundos:.0f} s...")
+    reporte = asyncio.run(ejecutar(args.host, args.puerto, args.ruta, args.conexiones,
+                                   args.segundos, args.etag, args.gzip))
+
+    print("\n" + "=" * 60)
+    print("📡 REPORTE DE CARGA DE LA API")
+    print("=" * 60)
+    print(f"   • Solicitudes: {reporte['solicitudes']:,} en {reporte['segundos']:.2f} s "
+          f"({reporte['solicitudes_por_segundo']:,.0f} solicitudes/s)")
+    print(f"   • Latencia: p50 {reporte['p50_ms']} ms | p90 {reporte['p90_ms']} ms | "
+          f"p99 {reporte['p99_ms']} ms")
+    print(f"   • Códigos: " + ", ".join(f"{c}: {n:,}" for c, n in sorted(reporte["estados"].items())))
+
+    if reporte["fallos"]:
+        print(f"\n⚠️  {len(reporte['fallos'])} conexiones fallaron:")
+        for fallo in reporte["fallos"][:5]:
+            print(f"   • {fallo}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""
+Prueba de Carga con Sesiones Concurrentes
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este script simula N usuarios simultáneos del dashboard usando AppTest de
+Streamlit (sin navegador ni servidor). Cada sesión carga la aplicación, pulsa
+"Exportar Datos" y cambia los filtros de la tabla de ofertas. Al final reporta
+throughput, percentiles de latencia por acción, tasa de aciertos de caché por
+sección y memoria de las sesiones.
+
+Cada usuario simulado corre en un proceso propio: AppTest.run modifica el
+Runtime global de Streamlit, así que dos sesiones en hilos del mismo proceso
+se pisarían. Las sesiones parten juntas (una barrera espera a que todas hayan
+importado Streamlit). Como cada proceso tiene sus propios cachés, la tasa de
+aciertos es la de una sesión que se repite, no la de un servidor compartido,
+y la memoria por sesión incluye una copia propia de los datos en caché; el
+reporte lo advierte. Una sesión cuyo proceso muere sin reportar (por falta
+de memoria o un fallo del intérprete) o que excede --timeout cuenta como
+error, en vez de dejar la prueba esperando.
+
+Uso (desde el directorio de la aplicación):
+    python benchmarks/prueba_carga.py --sesiones 20 --iteraciones 5
+    python benchmarks/prueba_carga.py --sesiones 50 --salida carga.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import sys
+import time
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_APP)
+
+from scripts.instrumentation import percentil
+
+RUTA_APP = os.path.join(DIRECTORIO_APP, 'app.py')
+ETIQUETA_EXPORTAR = "📊 Exportar Datos"
+FILTROS = ("filtro_sector", "filtro_region", "filtro_periodo")
+TIMEOUT_RERUN = 60
+# Tiempo máximo de espera a que todas las sesiones estén listas para partir
+TIMEOUT_INICIO = 300
+# Tiempo máximo de la prueba completa, en segundos
+TIMEOUT_PRUEBA = 3600
+# Cada cuánto se revisa si algún proceso murió sin reportar
+INTERVALO_REVISION = 1.0
+NOTA_CACHES = ("Cada sesión corre en su propio proceso con sus propios cachés st.cache_*: "
+               "la tasa de aciertos y la memoria por sesión no modelan un servidor compartido")
+
+
+def _rss_actual_mb():
+    """Memoria residente actual en MB (usa /proc en Linux, si no el pico)"""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def preparar_datos():
+    """Genera los datos del dashboard si faltan, antes de lanzar las sesiones
+
+    Si no, cada proceso los generaría al mismo tiempo en su carga inicial.
+    """
+    from scripts.histograms import DATASET_HISTOGRAMAS
+    from scripts.storage import DATASETS_EMPLEO, obtener_almacen
+    almacen = obtener_almacen()
+    if any(not almacen.existe(d) for d in (*DATASETS_EMPLEO, DATASET_HISTOGRAMAS)):
+        from scripts.generate_employment_data import main as generar_datos
+        generar_datos()
+
+
+def simular_sesion(numero, iteraciones, latencias, semilla):
+    """Una sesión: carga inicial y luego clics y cambios de filtro
+
+    latencias acumula los segundos de cada acción (acción → lista).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    def medir(accion, funcion):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        latencias.setdefault(accion, []).append(time.perf_counter() - inicio)
+        return resultado
+
+    aleatorio = random.Random(semilla + numero)
+    at = AppTest.from_file(RUTA_APP, default_timeout=TIMEOUT_RERUN)
+    medir("carga_inicial", at.run)
+
+    for _ in range(iteraciones):
+        boton = next(b for b in at.button if b.label == ETIQUETA_EXPORTAR)
+        medir("exportar_datos", boton.click().run)
+
+        clave = aleatorio.choice(FILTROS)
+        selector = at.selectbox(key=clave)
+        medir(f"cambiar_{clave}", selector.select(aleatorio.choice(selector.options)).run)
+
+        if at.exception:
+            raise RuntimeError(f"Sesión {numero}: {at.exception[0].message}")
+
+
+def _proceso_sesion(numero, iteraciones, semilla, barrera, cola):
+    """Cuerpo de cada proceso: espera a las demás sesiones, simula la suya y reporta"""
+    resultado = {"numero": numero, "latencias": {}, "fallo": None, "cache": {}}
+    try:
+        # Importar Streamlit antes de la barrera: su costo no cuenta como latencia
+        import streamlit.testing.v1  # noqa: F401
+        from scripts.instrumentation import registro
+
+        resultado["rss_inicial_mb"] = _rss_actual_mb()
+        barrera.wait(TIMEOUT_INICIO)
+        resultado["inicio"] = time.time()
+        try:
+            simular_sesion(numero, iteraciones, resultado["latencias"], semilla)
+        finally:
+            resultado["fin"] = time.time()
+            resultado["cache"] = {
+                seccion: {"hit": datos["hit"], "miss": datos["miss"]}
+                for seccion, datos in registro.resumen().items() if datos["hit"] or datos["miss"]
+            }
+    except Exception as e:
+        resultado["fallo"] = f"Sesión {numero}: {type(e).__name__}: {e}"
+    finally:
+        resultado["rss_final_mb"] = _rss_actual_mb()
+        cola.put(resultado)
+
+
+def _sesion_sin_reporte(numero, motivo):
+    return {"numero": numero, "latencias": {}, "cache": {}, "fallo": f"Sesión {numero}: {motivo}"}
+
+
+def recolectar_resultados(procesos, cola, timeout=TIMEOUT_PRUEBA):
+    """Espera el resultado de cada proceso sin bloquearse por uno que murió
+
+    procesos es una lista indexada por número de sesión. Un proceso que
+    termina con código distinto de 0 sin haber reportado, o que sigue vivo
+    al vencer el timeout, se reporta como sesión fallida.
+    """
+    pendientes = dict(enumerate(procesos))
+    resultados = []
+    limite = time.monotonic() + timeout
+    while pendientes:
+        try:
+            resultado = cola.get(timeout=INTERVALO_REVISION)
+        except queue.Empty:
+            for numero, proceso in list(pendientes.items()):
+                if proceso.exitcode not in (None, 0):
+                    del pendientes[numero]
+                    resultados.append(_sesion_sin_reporte(
+                        numero, f"el proceso terminó sin reportar (código {proceso.exitcode})"))
+            if pendientes and time.monotonic() > limite:
+                for numero, proceso in pendientes.items():
+                    proceso.terminate()
+                    resultados.append(_sesion_sin_reporte(numero, f"sin respuesta tras {timeout} s"))
+                pendientes.clear()
+            continue
+        # Un resultado tardío de una sesión ya dada por muerta se descarta
+        if pendientes.pop(resultado["numero"], None) is not None:
+            resultados.append(resultado)
+    return resultados
+
+
+def ejecutar_prueba(sesiones, iteraciones, semilla=42, timeout=TIMEOUT_PRUEBA):
+    """Lanza un proceso por sesión y retorna el reporte consolidado"""
+    preparar_datos()
+
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(sesiones)
+    cola = contexto.Queue()
+    procesos = [contexto.Process(target=_proceso_sesion, args=(i, iteraciones, semilla, barrera, cola))
+                for i in range(sesiones)]
+    for proceso in procesos:
+        proceso.start()
+    resultados = recolectar_resultados(procesos, cola, timeout)
+    for proceso in procesos:
+        proceso.join()
+
+    fallos = [r["fallo"] for r in sorted(resultados, key=lambda r: r["numero"]) if r["fallo"]]
+    inicios = [r["inicio"] for r in resultados if "inicio" in r]
+    fines = [r["fin"] for r in resultados if "fin" in r]
+    segundos = max(fines) - min(inicios) if inicios else 0.0
+
+    por_accion = {}
+    for r in resultados:
+        for accion, valores in r["latencias"].items():
+            por_accion.setdefault(accion, []).extend(valores)
+    total_acciones = sum(len(v) for v in por_accion.values())
+    todas = [s for v in por_accion.values() for s in v]
+
+    def resumen_latencias(valores):
+        ordenados = sorted(valores)
+        return {
+            "n": len(valores),
+            "p50_ms": round(percentil(ordenados, 0.5) * 1000, 2),
+            "p90_ms": round(percentil(ordenados, 0.9) * 1000, 2),
+            "p99_ms": round(percentil(ordenados, 0.99) * 1000, 2),
+            "max_ms": round(max(valores) * 1000, 2) if valores else 0.0
+        }
+
+    cache = {}
+    for r in resultados:
+        for seccion, datos in r["cache"].items():
+            acumulado = cache.setdefault(seccion, {"hit": 0, "miss": 0})
+            acumulado["hit"] += datos["hit"]
+            acumulado["miss"] += datos["miss"]
+    for datos in cache.values():
+        datos["tasa_aciertos"] = round(datos["hit"] / (datos["hit"] + datos["miss"]), 4)
+
+    crecimientos = [r["rss_final_mb"] - r["rss_inicial_mb"] for r in resultados if "rss_inicial_mb" in r]
+    finales = [r["rss_final_mb"] for r in resultados if "rss_final_mb" in r]
+
+    return {
+        "sesiones": sesiones,
+        "iteraciones": iteraciones,
+        "segundos": round(segundos, 3),
+        "acciones": total_acciones,
+        "acciones_por_segundo": round(total_acciones / segundos, 2) if segundos > 0 else 0.0,
+        "latencia_total": resumen_latencias(todas),
+        "latencia_por_accion": {a: resumen_latencias(v) for a, v in sorted(por_accion.items())},
+        "cache": cache,
+        "memoria": {
+            "rss_promedio_sesion_mb": round(sum(finales) / len(finales), 1) if finales else 0.0,
+            "rss_total_mb": round(sum(finales), 1),
+            "crecimiento_max_sesion_mb": round(max(crecimientos), 1) if crecimientos else 0.0
+        },
+        "errores": len(fallos),
+        "fallos": fallos,
+        "nota": NOTA_CACHES
+    }
+
+
+def imprimir_reporte(reporte):
+    print("\n" + "=" * 60)
+    print("🚦 REPORTE DE PRUEBA DE CARGA")
+    print("=" * 60)
+    print(f"   • Sesiones concurrentes: {reporte['sesiones']} x {reporte['iteraciones']} iteraciones "
+          f"(un proceso por sesión)")
+    print(f"   • Acciones: {reporte['acciones']} en {reporte['segundos']:.2f} s "
+          f"({reporte['acciones_por_segundo']:.1f} acciones/s)")
+    total = reporte["latencia_total"]
+    print(f"   • Latencia global: p50 {total['p50_ms']} ms | p90 {total['p90_ms']} ms | "
+          f"p99 {total['p99_ms']} ms")
+
+    print(f"\n⏱️  Latencia por acción:")
+    for accion, datos in reporte["latencia_por_accion"].items():
+        print(f"   • {accion:<24} n={datos['n']:<5} p50 {datos['p50_ms']:>8} ms  "
+              f"p99 {datos['p99_ms']:>8} ms")
+
+    print(f"\n🗄️  Caché por sección (suma de los cachés de cada sesión):")
+    for seccion, datos in reporte["cache"].items():
+        print(f"   • {seccion}: {datos['tasa_aciertos']:.1%} aciertos ({datos['hit']} hit / {datos['miss']} miss)")
+
+    memoria = reporte["memoria"]
+    print(f"\n💾 Memoria: {memoria['rss_promedio_sesion_mb']} MB por sesión, {memoria['rss_total_mb']} MB en total "
+          f"(crecimiento máximo {memoria['crecimiento_max_sesion_mb']:+.1f} MB)")
+
+    if reporte["fallos"]:
+        print(f"\n⚠️  {len(reporte['fallos'])} sesiones fallaron:")
+        for fallo in reporte["fallos"][:5]:
+            print(f"   • {fallo}")
+
+    print(f"\nℹ️  {reporte['nota']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del dashboard con sesiones concurrentes")
+    parser.add_argument("--sesiones", type=int, default=10, help="Cantidad de sesiones simultáneas")
+    parser.add_argument("--iteraciones", type=int, default=3,
+                        help="Clics y cambios de filtro por sesión tras la carga inicial")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de las acciones aleatorias")
+    parser.add_argument("--timeout", type=int, default=TIMEOUT_PRUEBA,
+                        help="Segundos máximos de la prueba; las sesiones sin respuesta cuentan como error")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    os.chdir(DIRECTORIO_APP)
+    print(f"🚀 Simulando {args.sesiones} sesiones concurrentes...")
+    reporte = ejecutar_prueba(args.sesiones, args.iteraciones, args.semilla, args.timeout)
+    imprimir_reporte(reporte)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Reporte guardado en {args.salida}")
+
+    return 1 if reporte["fallos"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Dashboard Financiero
+Página de Streamlit construida sobre los resultados precalculados del análisis
+"""
+
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+
+from scripts.storage import obtener_almacen
+
+DIAS_SEMANA = {
+    "Monday": "Lunes",
+    "Tuesday": "Martes",
+    "Wednesday": "Miércoles",
+    "Thursday": "Jueves",
+    "Friday": "Viernes",
+    "Saturday": "Sábado",
+    "Sunday": "Domingo",
+}
+
+st.set_page_config(
+    page_title="Dashboard Financiero",
+    page_icon="💰",
+    layout="wide",
+    initial_sidebar_state="collapsed"
+)
+
+st.markdown("""
+<style>
+    .stMetric {
+        background-color: #1a1a1a;
+        padding: 20px;
+        border-radius: 10px;
+        border: 1px solid #2a2a2a;
+    }
+    .stMetric label {
+        color: #a0a0a0;
+        font-size: 14px;
+    }
+    .stMetric [data-testid="stMetricValue"] {
+        font-size: 28px;
+        color: #ffffff;
+    }
+    h1, h2, h3 {
+        color: #ffffff;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+ESTILO_GRAFICO = dict(
+    plot_bgcolor='#1a1a1a',
+    paper_bgcolor='#1a1a1a',
+    font=dict(color='#ffffff'),
+    xaxis=dict(gridcolor='#2a2a2a'),
+    yaxis=dict(gridcolor='#2a2a2a'),
+)
+
+def version_resultados():
+    """Retorna la versión de los resultados en el almacén, generándolos si no existen"""
+    almacen = obtener_almacen()
+    if not almacen.existe("analisis_resultados"):
+        st.info("⏳ Generando y analizando datos financieros...")
+        from scripts.generate_financial_data import main as generar_datos
+        from scripts.analyze_financial_data import main as analizar_datos
+        generar_datos()
+        analizar_datos()
+        st.success("✅ Datos financieros generados correctamente")
+    return almacen.version("analisis_resultados")
+
+@st.cache_data
+def cargar_resultados(version):
+    """Carga los resultados precalculados (la versión invalida el caché al reescribirlos)"""
+    return obtener_almacen().leer("analisis_resultados")
+
+@st.cache_resource
+def construir_figuras(version):
+    """Construye una sola vez los gráficos de una versión de los resultados"""
+    resultados = cargar_resultados(version)
+    figuras = {}
+
+    df_cat = pd.DataFrame(resultados["ventas_por_categoria"]).sort_values('monto', ascending=True)
+    fig_cat = go.Figure(go.Bar(
+        x=df_cat['monto'],
+        y=df_cat['categoria'],
+        orientation='h',
+        marker=dict(color=df_cat['monto'], colorscale='Greens', showscale=False),
+        text=df_cat['monto'].apply(lambda x: f'${x:,.0f}'),
+        textposition='outside'
+    ))
+    fig_cat.update_layout(height=380, **ESTILO_GRAFICO)
+    figuras["categorias"] = fig_cat
+
+    df_prod = pd.DataFrame(resultados["productos_top"]).sort_values('ventas_totales', ascending=True)
+    fig_prod = go.Figure(go.Bar(
+        x=df_prod['ventas_totales'],
+        y=df_prod['nombre'],
+        orientation='h',
+        marker=dict(color='#3b82f6'),
+        text=df_prod['unidades_vendidas'].apply(lambda x: f'{x:,} u.'),
+        textposition='outside'
+    ))
+    fig_prod.update_layout(height=380, **ESTILO_GRAFICO)
+    figuras["productos"] = fig_prod
+
+    tendencias = resultados["tendencias_temporales"]
+    dias = [dia for dia in DIAS_SEMANA if dia in tendencias]
+    fig_dias = go.Figure(go.Bar(
+        x=[DIAS_SEMANA[dia] for dia in dias],
+        y=[tendencias[dia] for dia in dias],
+        marker=dict(color='#22c55e')
+    ))
+    fig_dias.update_layout(height=380, **ESTILO_GRAFICO)
+    figuras["dias"] = fig_dias
+
+    mensuales = resultados.get("ventas_mensuales", [])
+    if mensuales:
+        fig_mes = go.Figure(go.Scatter(
+            x=[fila["periodo"] for fila in mensuales],
+            y=[fila["ingresos"] for fila in mensuales],
+            line=dict(color='#22c55e', width=3),
+            mode='lines+markers'
+        ))
+        fig_mes.update_layout(height=380, **ESTILO_GRAFICO)
+        figuras["mensuales"] = fig_mes
+
+    return figuras
+
+def mostrar_kpis(kpis):
+    """Muestra los KPIs financieros principales"""
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Ventas Totales", f"${kpis['total_ventas']:,.2f}")
+    with col2:
+        st.metric("Transacciones", f"{kpis['num_transacciones']:,}")
+    with col3:
+        st.metric("Ticket Promedio", f"${kpis['ticket_promedio']:,.2f}")
+    with col4:
+        st.metric("Crecimiento", f"{kpis['tasa_crecimiento']:+.1f}%")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if "error_clientes_unicos" in kpis:
+            st.metric("Clientes Únicos (aprox.)", f"≈{kpis['clientes_unicos']:,}",
+                      help=f"Estimación HyperLogLog, error estándar ±{kpis['error_clientes_unicos']}%")
+        else:
+            st.metric("Clientes Únicos", f"{kpis['clientes_unicos']:,}")
+    with col2:
+        st.metric("Valor por Cliente", f"${kpis['valor_por_cliente']:,.2f}")
+    with col3:
+        st.metric("Descuento Promedio", f"{kpis['descuento_promedio']:.1f}%")
+
+def main():
+    """Función principal de la página financiera"""
+    version = version_resultados()
+    resultados = cargar_resultados(version)
+    figuras = construir_figuras(version)
+
+    st.title("💰 Dashboard Financiero")
+    st.markdown("*KPIs de ventas calculados a partir de los resultados precalculados del análisis*")
+    st.divider()
+
+    mostrar_kpis(resultados["kpis"])
+    st.divider()
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🏷️ Ventas por Categoría")
+        st.plotly_chart(figuras["categorias"], use_container_width=True)
+    with col2:
+        st.subheader("⭐ Productos Más Vendidos")
+        st.plotly_chart(figuras["productos"], use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("📅 Ventas por Día de la Semana")
+        st.plotly_chart(figuras["dias"], use_container_width=True)
+    with col2:
+        if "mensuales" in figuras:
+            st.subheader("📆 Ventas Mensuales")
+            st.plotly_chart(figuras["mensuales"], use_container_width=True)
+
+    st.divider()
+    st.markdown("""
+    <div style='text-align: center; color: #666; padding: 20px;'>
+        <p>Dashboard Financiero | Datos generados con fines educativos</p>
+        <p>Desarrollado con Python & Streamlit</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+main()
@@ -7,64 +7,134 @@ Este script analiza los datos generados del mercado laboral chileno.
 Calcula KPIs, tendencias y proporciona insights estadísticos.
 """
 
-import json
+import argparse
+import random
 import statistics
 
+try:
+    from scripts.storage import obtener_almacen, resumir_ofertas
+    from scripts.stream_reader import TAMANO_LOTE_DEFECTO, procesar_en_lotes, reportar_rendimiento
+except ImportError:
+    from storage import obtener_almacen, resumir_ofertas
+    from stream_reader import TAMANO_LOTE_DEFECTO, procesar_en_lotes, reportar_rendimiento
+
+# Tamaño de la muestra usada para estimar la mediana en modo streaming
+TAMANO_MUESTRA_MEDIANA = 10000
+
 def cargar_datos():
     """Carga los datos generados previamente"""
     try:
-        with open('scripts/ofertas_laborales.json', 'r', encoding='utf-8') as f:
-            ofertas = json.load(f)
-        
-        with open('scripts/estadisticas_mensuales.json', 'r', encoding='utf-8') as f:
-            estadisticas = json.load(f)
-        
-        with open('scripts/datos_sectores.json', 'r', encoding='utf-8') as f:
-            sectores = json.load(f)
+        almacen = obtener_almacen()
+        ofertas = almacen.leer("ofertas_laborales")
+        estadisticas = almacen.leer("estadisticas_mensuales")
+        sectores = almacen.leer("datos_sectores")
         
         return ofertas, estadisticas, sectores
     except FileNotFoundError:
         print("❌ Error: Primero ejecuta generate_employment_data.py")
         return None, None, None
 
-def analizar_ofertas(ofertas):
-    """Analiza las ofertas laborales"""
-    print("\n" + "="*60)
-    print("📋 ANÁLISIS DE OFERTAS LABORALES")
-    print("="*60)
-    
-    total_ofertas = len(ofertas)
-    ofertas_activas = [o for o in ofertas if o["estado"] == "Activa"]
-    
-    # Estadísticas de sueldos
-    sueldos = [o["sueldo"] for o in ofertas]
-    sueldo_promedio = statistics.mean(sueldos)
-    sueldo_mediano = statistics.median(sueldos)
-    sueldo_min = min(sueldos)
-    sueldo_max = max(sueldos)
-    
+def _imprimir_analisis_ofertas(total_ofertas, num_activas, sueldo_promedio, sueldo_mediano,
+                               sueldo_min, sueldo_max, ofertas_por_sector, mediana_aproximada=False):
+    """Imprime el resumen del análisis de ofertas"""
     print(f"\n📊 Resumen General:")
     print(f"   • Total de ofertas: {total_ofertas}")
-    print(f"   • Ofertas activas: {len(ofertas_activas)} ({len(ofertas_activas)/total_ofertas*100:.1f}%)")
+    print(f"   • Ofertas activas: {num_activas} ({num_activas/total_ofertas*100:.1f}%)")
     
     print(f"\n💰 Análisis Salarial:")
     print(f"   • Sueldo promedio: ${sueldo_promedio:,.0f}")
-    print(f"   • Sueldo mediano: ${sueldo_mediano:,.0f}")
+    print(f"   • Sueldo mediano{' (aprox.)' if mediana_aproximada else ''}: ${sueldo_mediano:,.0f}")
     print(f"   • Rango salarial: ${sueldo_min:,.0f} - ${sueldo_max:,.0f}")
     
-    # Ofertas por sector
-    ofertas_por_sector = {}
-    for oferta in ofertas:
-        sector = oferta["sector"]
-        ofertas_por_sector[sector] = ofertas_por_sector.get(sector, 0) + 1
-    
     print(f"\n🏢 Ofertas por Sector:")
     for sector, count in sorted(ofertas_por_sector.items(), key=lambda x: x[1], reverse=True):
         print(f"   • {sector}: {count} ofertas")
+
+def analizar_ofertas(ofertas=None):
+    """Analiza las ofertas laborales
+
+    Sin una lista de ofertas, el resumen se delega al almacén de datos, que en
+    SQLite lo resuelve con consultas indexadas sin cargar las ofertas.
+    """
+    print("\n" + "="*60)
+    print("📋 ANÁLISIS DE OFERTAS LABORALES")
+    print("="*60)
+    
+    if ofertas is None:
+        resumen = obtener_almacen().resumir_ofertas()
+    else:
+        resumen = resumir_ofertas(ofertas)
+    
+    if resumen["total"] == 0:
+        print("\n⚠️  No hay ofertas para analizar")
+        return {"total": 0, "activas": 0, "sueldo_promedio": 0, "ofertas_por_sector": {}}
+    
+    _imprimir_analisis_ofertas(resumen["total"], resumen["activas"], resumen["sueldo_promedio"],
+                               resumen["sueldo_mediano"], resumen["sueldo_min"], resumen["sueldo_max"],
+                               resumen["ofertas_por_sector"])
+    
+    return {
+        "total": resumen["total"],
+        "activas": resumen["activas"],
+        "sueldo_promedio": resumen["sueldo_promedio"],
+        "ofertas_por_sector": resumen["ofertas_por_sector"]
+    }
+
+def analizar_ofertas_streaming(tamano_lote=TAMANO_LOTE_DEFECTO):
+    """Analiza las ofertas leyendo el archivo en lotes con memoria acotada
+
+    Los conteos, promedios y rangos son exactos. La mediana se estima con
+    una muestra aleatoria (reservoir sampling) de tamaño fijo.
+    """
+    print("\n" + "="*60)
+    print("📋 ANÁLISIS DE OFERTAS LABORALES")
+    print("="*60)
+    
+    acumulado = {"total": 0, "activas": 0, "suma_sueldos": 0, "min": None, "max": None}
+    ofertas_por_sector = {}
+    muestra = []
+    generador = random.Random(42)
+    
+    def acumular_lote(lote):
+        for oferta in lote:
+            acumulado["total"] += 1
+            if oferta["estado"] == "Activa":
+                acumulado["activas"] += 1
+            
+            sueldo = oferta["sueldo"]
+            acumulado["suma_sueldos"] += sueldo
+            if acumulado["min"] is None or sueldo < acumulado["min"]:
+                acumulado["min"] = sueldo
+            if acumulado["max"] is None or sueldo > acumulado["max"]:
+                acumulado["max"] = sueldo
+            
+            if len(muestra) < TAMANO_MUESTRA_MEDIANA:
+                muestra.append(sueldo)
+            else:
+                j = generador.randrange(acumulado["total"])
+                if j < TAMANO_MUESTRA_MEDIANA:
+                    muestra[j] = sueldo
+            
+            sector = oferta["sector"]
+            ofertas_por_sector[sector] = ofertas_por_sector.get(sector, 0) + 1
+    
+    rendimiento = procesar_en_lotes(obtener_almacen().iterar("ofertas_laborales"), acumular_lote, tamano_lote)
+    reportar_rendimiento(rendimiento)
+    
+    total_ofertas = acumulado["total"]
+    if total_ofertas == 0:
+        print("\n⚠️  No hay ofertas para analizar")
+        return {"total": 0, "activas": 0, "sueldo_promedio": 0, "ofertas_por_sector": {}}
+    
+    sueldo_promedio = acumulado["suma_sueldos"] / total_ofertas
+    _imprimir_analisis_ofertas(total_ofertas, acumulado["activas"], sueldo_promedio,
+                               statistics.median(muestra), acumulado["min"], acumulado["max"],
+                               ofertas_por_sector,
+                               mediana_aproximada=total_ofertas > TAMANO_MUESTRA_MEDIANA)
     
     return {
         "total": total_ofertas,
-        "activas": len(ofertas_activas),
+        "activas": acumulado["activas"],
         "sueldo_promedio": sueldo_promedio,
         "ofertas_por_sector": ofertas_por_sector
     }
@@ -142,6 +212,20 @@ def analizar_sectores(sectores):
         "sector_mayor_crecimiento": sector_mayor_crecimiento["sector"]
     }
 
+def calcular_metricas_principales(estadisticas, sectores):
+    """Calcula las métricas principales del dashboard (último mes frente al anterior)"""
+    ultima_estadistica = estadisticas[-1]
+    penultima_estadistica = estadisticas[-2] if len(estadisticas) > 1 else estadisticas[-1]
+    
+    return {
+        "tasa_desempleo": ultima_estadistica["tasa_desempleo"],
+        "cambio_desempleo": round(ultima_estadistica["tasa_desempleo"] - penultima_estadistica["tasa_desempleo"], 2),
+        "sueldo_promedio": ultima_estadistica["sueldo_promedio"],
+        "cambio_sueldo": ultima_estadistica["sueldo_promedio"] - penultima_estadistica["sueldo_promedio"],
+        "ofertas_activas": sum(s["ofertas_activas"] for s in sectores),
+        "empleos_creados": ultima_estadistica["empleos_creados"]
+    }
+
 def generar_reporte_ejecutivo(ofertas_analisis, tendencias, sectores_analisis):
     """Genera un reporte ejecutivo consolidado"""
     print("\n" + "="*60)
@@ -150,7 +234,8 @@ def generar_reporte_ejecutivo(ofertas_analisis, tendencias, sectores_analisis):
     
     print(f"\n🎯 KPIs Principales:")
     print(f"   • Ofertas laborales totales: {ofertas_analisis['total']}")
-    print(f"   • Tasa de activación: {ofertas_analisis['activas']/ofertas_analisis['total']*100:.1f}%")
+    tasa_activacion = ofertas_analisis['activas'] / ofertas_analisis['total'] * 100 if ofertas_analisis['total'] else 0
+    print(f"   • Tasa de activación: {tasa_activacion:.1f}%")
     print(f"   • Sueldo promedio ofertado: ${ofertas_analisis['sueldo_promedio']:,.0f}")
     print(f"   • Empleos creados (período): {tendencias['empleos_totales']:,}")
     print(f"   • Variación desempleo: {tendencias['cambio_desempleo']:+.1f}%")
@@ -171,17 +256,34 @@ def generar_reporte_ejecutivo(ofertas_analisis, tendencias, sectores_analisis):
     else:
         print(f"   5. ⚠️ Los sueldos han decrecido o se mantienen estancados")
 
-def main():
+def main(streaming=False, tamano_lote=TAMANO_LOTE_DEFECTO):
     print("🔍 Iniciando análisis del mercado laboral chileno...")
     
-    # Cargar datos
-    ofertas, estadisticas, sectores = cargar_datos()
+    almacen = obtener_almacen()
     
-    if ofertas is None:
-        return
+    if streaming or almacen.consultas_indexadas:
+        # Las ofertas se leen en lotes o se resumen en la base de datos;
+        # estadísticas y sectores son pequeños
+        try:
+            estadisticas = almacen.leer("estadisticas_mensuales")
+            sectores = almacen.leer("datos_sectores")
+            if streaming:
+                ofertas_analisis = analizar_ofertas_streaming(tamano_lote)
+            else:
+                ofertas_analisis = analizar_ofertas()
+        except FileNotFoundError:
+            print("❌ Error: Primero ejecuta generate_employment_data.py")
+            return
+    else:
+        # Cargar datos
+        ofertas, estadisticas, sectores = cargar_datos()
+        
+        if ofertas is None:
+            return
+        
+        ofertas_analisis = analizar_ofertas(ofertas)
     
     # Realizar análisis
-    ofertas_analisis = analizar_ofertas(ofertas)
     tendencias = analizar_tendencias(estadisticas)
     sectores_analisis = analizar_sectores(sectores)
     
@@ -193,4 +295,10 @@ def main():
     print("="*60 + "\n")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Análisis del mercado laboral chileno")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Lee las ofertas en lotes sin cargar el archivo completo")
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE_DEFECTO,
+                        help="Cantidad de registros por lote en modo streaming")
+    args = parser.parse_args()
+    main(streaming=args.streaming, tamano_lote=args.tamano_lote)
@@ -7,36 +7,136 @@ Este script realiza análisis estadístico sobre los datos financieros.
 Calcula KPIs, tendencias y genera insights de negocio.
 """
 
-import json
+import argparse
 import statistics
 from collections import defaultdict
+from datetime import datetime
+from operator import itemgetter
+
+try:
+    from scripts.customer_index import IndiceClientes, guardar_indice_clientes
+    from scripts.partitions import (cargar_indice, iterar_particiones, seleccionar_particiones,
+                                    version_particiones)
+    from scripts.records import iterar_campos
+    from scripts.rollup import (agregar_por_dia, cargar_cubo, consultar, cubo_desde_dias, guardar_cubo,
+                                serie_mensual)
+    from scripts.sketches import HyperLogLog, SpaceSaving
+    from scripts.storage import obtener_almacen
+    from scripts.stream_reader import TAMANO_LOTE_DEFECTO, procesar_en_lotes, reportar_rendimiento
+except ImportError:
+    from customer_index import IndiceClientes, guardar_indice_clientes
+    from partitions import (cargar_indice, iterar_particiones, seleccionar_particiones,
+                            version_particiones)
+    from records import iterar_campos
+    from rollup import (agregar_por_dia, cargar_cubo, consultar, cubo_desde_dias, guardar_cubo,
+                        serie_mensual)
+    from sketches import HyperLogLog, SpaceSaving
+    from storage import obtener_almacen
+    from stream_reader import TAMANO_LOTE_DEFECTO, procesar_en_lotes, reportar_rendimiento
+
+
+# Error relativo de los resúmenes top-k: cada conteo se equivoca a lo más en
+# este porcentaje del total (con 1/error contadores monitoreados)
+ERROR_TOP_DEFECTO = 0.001
+
+# Resultados de un análisis acotado a un rango de fechas (no reemplazan al global)
+DATASET_RESULTADOS = 'analisis_resultados'
+DATASET_RESULTADOS_RANGO = 'analisis_resultados_rango'
+
+# Resúmenes top-k disponibles: nombre -> (campos de la clave del elemento, campo del peso);
+# una clave de un solo campo es el valor, una de varios la tupla de valores
+RESUMENES_TOP = {
+    "productos_ventas": (("producto_id", "producto_nombre"), "monto_total"),
+    "productos_unidades": (("producto_id", "producto_nombre"), "cantidad"),
+    "clientes": (("cliente",), "monto_total"),
+    "categorias": (("categoria",), "monto_total"),
+}
+
+
+def usar_particiones(almacen):
+    """Indica si las transacciones se leen de las particiones y no del conjunto plano
+
+    Si existen ambas fuentes (datos generados en distintos modos) se usa la
+    escrita más recientemente.
+    """
+    version_indice = version_particiones(almacen)
+    if version_indice is None:
+        return False
+    version_plano = almacen.version("transacciones")
+    return version_plano is None or version_indice > version_plano
 
 def cargar_datos():
     """Carga los datos generados"""
     try:
-        with open('scripts/transacciones.json', 'r', encoding='utf-8') as f:
-            transacciones = json.load(f)
+        almacen = obtener_almacen()
+        if usar_particiones(almacen):
+            transacciones = list(iterar_fuente_transacciones())
+        else:
+            transacciones = almacen.leer("transacciones")
         
-        with open('scripts/metricas_mensuales.json', 'r', encoding='utf-8') as f:
-            metricas = json.load(f)
-        
-        with open('scripts/productos.json', 'r', encoding='utf-8') as f:
-            productos = json.load(f)
+        metricas = almacen.leer("metricas_mensuales")
+        productos = almacen.leer("productos")
         
         return transacciones, metricas, productos
     except FileNotFoundError:
         print("⚠️  Archivos de datos no encontrados. Ejecuta primero generate_financial_data.py")
         return [], [], []
 
+def iterar_fuente_transacciones(desde=None, hasta=None, agregados=None):
+    """Itera las transacciones del rango [desde, hasta] desde el almacenamiento disponible
+
+    Si hay particiones por año/mes (más recientes que el conjunto plano) se
+    leen solo las que se traslapan con el rango. Con agregados incrementales
+    se leen además solo las particiones con ids sobre el watermark y las que
+    tienen transacciones pendientes y fueron reescritas desde la última
+    lectura: si una partición no cambió, sus pendientes tampoco. Así el costo
+    de cada ejecución depende de lo nuevo y no del historial. Las versiones
+    de las particiones quedan en los agregados para la próxima ejecución.
+    Sin particiones se recorre el conjunto plano filtrando por fecha.
+    Retorna None si no hay datos.
+    """
+    almacen = obtener_almacen()
+    if usar_particiones(almacen):
+        particiones = seleccionar_particiones(cargar_indice(almacen), desde, hasta)
+        if agregados is not None:
+            watermark = agregados["watermark"]["id"]
+            con_pendientes = {fecha[:7] for fecha in agregados["pendientes"].values()}
+            leidas = agregados.setdefault("versiones_particiones", {})
+            versiones = {p["dataset"]: almacen.version(p["dataset"]) for p in particiones}
+            total = len(particiones)
+            particiones = [
+                p for p in particiones
+                if p["id_max"] > watermark
+                or (p["particion"] in con_pendientes and leidas.get(p["dataset"]) != versiones[p["dataset"]])
+            ]
+            leidas.update(versiones)
+            print(f"🗂️  Particiones leídas: {len(particiones)} de {total}")
+        return iterar_particiones(particiones, almacen, desde, hasta)
+    
+    if not almacen.existe("transacciones"):
+        return None
+    registros = almacen.iterar("transacciones")
+    if desde is None and hasta is None:
+        return registros
+    return (t for t in registros
+            if (desde is None or t["fecha"] >= desde) and (hasta is None or t["fecha"] <= hasta))
+
+def cargar_metricas():
+    """Carga solo las métricas mensuales (sin leer las transacciones)"""
+    try:
+        return obtener_almacen().leer("metricas_mensuales")
+    except FileNotFoundError:
+        return []
+
 def analizar_ventas_por_categoria(transacciones):
     """Analiza ventas agrupadas por categoría"""
     ventas_por_categoria = defaultdict(lambda: {"monto": 0, "cantidad": 0})
     
-    for t in transacciones:
-        if t["estado"] == "Completado":
-            cat = t["categoria"]
-            ventas_por_categoria[cat]["monto"] += t["monto_total"]
-            ventas_por_categoria[cat]["cantidad"] += t["cantidad"]
+    campos = ("estado", "categoria", "monto_total", "cantidad")
+    for estado, cat, monto, cantidad in iterar_campos(transacciones, campos):
+        if estado == "Completado":
+            ventas_por_categoria[cat]["monto"] += monto
+            ventas_por_categoria[cat]["cantidad"] += cantidad
     
     # Ordenar por monto
     resultado = sorted(
@@ -47,35 +147,80 @@ def analizar_ventas_por_categoria(transacciones):
     
     return resultado
 
-def calcular_kpis(transacciones, metricas):
-    """Calcula indicadores clave de rendimiento"""
-    # Filtrar transacciones completadas
-    completadas = [t for t in transacciones if t["estado"] == "Completado"]
+def contar_clientes_por_mes(transacciones, error_relativo=0.01):
+    """Construye un contador HyperLogLog de clientes únicos por mes (AAAA-MM)
+
+    Los contadores son combinables: la unión de varios meses (o de varios
+    shards del mismo mes) se obtiene con HyperLogLog.combinar sin releer
+    las transacciones.
+    """
+    contadores = {}
+    for estado, fecha, cliente in iterar_campos(transacciones, ("estado", "fecha", "cliente")):
+        if estado == "Completado":
+            mes = fecha[:7]
+            if mes not in contadores:
+                contadores[mes] = HyperLogLog(error_relativo)
+            contadores[mes].agregar(cliente)
+    return contadores
+
+def combinar_contadores(contadores, error_relativo=0.01):
+    """Une varios contadores HyperLogLog en uno solo"""
+    total = HyperLogLog(error_relativo)
+    for contador in contadores:
+        total.combinar(contador)
+    return total
+
+def calcular_crecimiento(metricas):
+    """Crecimiento porcentual de ingresos entre el primer y el último mes completo
+
+    Los meses parciales (marcados con completo=False) se omiten; las métricas
+    sin esa marca se consideran completas.
+    """
+    completas = [m for m in metricas if m.get("completo", True)]
+    if len(completas) < 2 or not completas[0]["ingresos"]:
+        return 0
+    ingreso_inicial = completas[0]["ingresos"]
+    ingreso_final = completas[-1]["ingresos"]
+    return ((ingreso_final - ingreso_inicial) / ingreso_inicial) * 100
+
+def calcular_kpis(transacciones, metricas, clientes_aproximados=False, error_clientes=0.01):
+    """Calcula indicadores clave de rendimiento
+
+    Con clientes_aproximados=True, clientes_unicos se estima con HyperLogLog
+    (error relativo ~error_clientes) en lugar de mantener un set con todos
+    los clientes en memoria, y error_clientes_unicos informa su error
+    estándar en porcentaje.
+    """
+    # Filtrar transacciones completadas (solo los campos que se usan)
+    campos = ("estado", "monto_total", "descuento", "cliente")
+    completadas = [fila for fila in iterar_campos(transacciones, campos) if fila[0] == "Completado"]
     
     # KPIs básicos
-    total_ventas = sum(t["monto_total"] for t in completadas)
+    total_ventas = sum(monto for _, monto, _, _ in completadas)
     num_transacciones = len(completadas)
     ticket_promedio = total_ventas / num_transacciones if num_transacciones > 0 else 0
     
     # Análisis de descuentos
-    descuentos_aplicados = [t["descuento"] for t in completadas if t["descuento"] > 0]
+    descuentos_aplicados = [descuento for _, _, descuento, _ in completadas if descuento > 0]
     descuento_promedio = statistics.mean(descuentos_aplicados) if descuentos_aplicados else 0
     
     # Clientes únicos
-    clientes_unicos = len(set(t["cliente"] for t in completadas))
+    if clientes_aproximados:
+        contador = HyperLogLog(error_clientes)
+        contador.actualizar(cliente for _, _, _, cliente in completadas)
+        clientes_unicos = contador.estimar()
+        error_clientes_unicos = contador.error_estandar
+    else:
+        clientes_unicos = len(set(cliente for _, _, _, cliente in completadas))
+        error_clientes_unicos = None
     
     # Valor promedio por cliente
     valor_por_cliente = total_ventas / clientes_unicos if clientes_unicos > 0 else 0
     
     # Tendencia de crecimiento (últimos meses)
-    if len(metricas) >= 2:
-        ingreso_inicial = metricas[0]["ingresos"]
-        ingreso_final = metricas[-1]["ingresos"]
-        crecimiento = ((ingreso_final - ingreso_inicial) / ingreso_inicial) * 100
-    else:
-        crecimiento = 0
+    crecimiento = calcular_crecimiento(metricas)
     
-    return {
+    kpis = {
         "total_ventas": round(total_ventas, 2),
         "num_transacciones": num_transacciones,
         "ticket_promedio": round(ticket_promedio, 2),
@@ -84,17 +229,31 @@ def calcular_kpis(transacciones, metricas):
         "valor_por_cliente": round(valor_por_cliente, 2),
         "tasa_crecimiento": round(crecimiento, 2)
     }
+    if error_clientes_unicos is not None:
+        kpis["error_clientes_unicos"] = round(error_clientes_unicos * 100, 2)
+    return kpis
 
-def analizar_productos_top(transacciones, top_n=5):
-    """Identifica los productos más vendidos"""
+def analizar_productos_top(transacciones, top_n=5, aproximado=False, error_relativo=ERROR_TOP_DEFECTO):
+    """Identifica los productos más vendidos
+
+    Con aproximado=True usa resúmenes Space-Saving de memoria acotada (por
+    ingresos y por unidades) en lugar de un diccionario con todos los
+    productos, e informa la cota de error de cada resultado.
+    """
+    if aproximado:
+        resumenes = construir_resumenes_top(
+            transacciones, error_relativo, nombres=("productos_ventas", "productos_unidades")
+        )
+        return productos_top_desde_resumenes(resumenes, top_n)
+    
     ventas_por_producto = defaultdict(lambda: {"ventas": 0, "cantidad": 0, "nombre": ""})
     
-    for t in transacciones:
-        if t["estado"] == "Completado":
-            pid = t["producto_id"]
-            ventas_por_producto[pid]["ventas"] += t["monto_total"]
-            ventas_por_producto[pid]["cantidad"] += t["cantidad"]
-            ventas_por_producto[pid]["nombre"] = t["producto_nombre"]
+    campos = ("estado", "producto_id", "producto_nombre", "monto_total", "cantidad")
+    for estado, pid, nombre, monto, cantidad in iterar_campos(transacciones, campos):
+        if estado == "Completado":
+            ventas_por_producto[pid]["ventas"] += monto
+            ventas_por_producto[pid]["cantidad"] += cantidad
+            ventas_por_producto[pid]["nombre"] = nombre
     
     # Ordenar y tomar top N
     productos_ordenados = sorted(
@@ -113,42 +272,353 @@ def analizar_productos_top(transacciones, top_n=5):
         for pid, datos in productos_ordenados
     ]
 
+def construir_resumenes_top(transacciones, error_relativo=ERROR_TOP_DEFECTO, resumenes=None,
+                            nombres=tuple(RESUMENES_TOP)):
+    """Alimenta resúmenes Space-Saving con las transacciones completadas
+
+    Si se entregan `resumenes` previos se acumulan sobre ellos (procesamiento
+    por lotes); los de distintos shards se unen con combinar_resumenes_top.
+    """
+    if resumenes is None:
+        resumenes = {nombre: SpaceSaving(error_relativo) for nombre in nombres}
+
+    # Se leen una vez los campos de todos los resúmenes; clave y peso se toman de esa tupla
+    campos = ["estado"]
+    for nombre in resumenes:
+        clave, peso = RESUMENES_TOP[nombre]
+        campos.extend(c for c in (*clave, peso) if c not in campos)
+    funciones = []
+    for nombre, resumen in resumenes.items():
+        clave, peso = RESUMENES_TOP[nombre]
+        funciones.append((resumen, itemgetter(*(campos.index(c) for c in clave)),
+                          itemgetter(campos.index(peso))))
+
+    for fila in iterar_campos(transacciones, campos):
+        if fila[0] == "Completado":
+            for resumen, clave, peso in funciones:
+                resumen.agregar(clave(fila), peso(fila))
+    return resumenes
+
+def combinar_resumenes_top(resumenes, otros):
+    """Une los resúmenes top-k de otro shard sobre los propios"""
+    for nombre, resumen in otros.items():
+        resumenes[nombre].combinar(resumen)
+    return resumenes
+
+def productos_top_desde_resumenes(resumenes, top_n=5):
+    """Top de productos por ingresos, con unidades estimadas y cotas de error"""
+    unidades = resumenes.get("productos_unidades")
+    return [
+        {
+            "producto_id": fila["elemento"][0],
+            "nombre": fila["elemento"][1],
+            "ventas_totales": round(fila["estimado"], 2),
+            "unidades_vendidas": unidades.estimar(fila["elemento"]) if unidades else None,
+            "error_ventas": round(fila["error"], 2),
+            "garantizado": fila["garantizado"]
+        }
+        for fila in resumenes["productos_ventas"].top(top_n)
+    ]
+
+def analizar_top_pesados(resumenes, top_n=5):
+    """Top de productos (por ingresos y unidades), clientes y categorías desde los resúmenes"""
+    resultado = {}
+    for nombre, resumen in resumenes.items():
+        resultado[nombre] = [
+            {
+                "elemento": list(fila["elemento"]) if isinstance(fila["elemento"], tuple) else fila["elemento"],
+                "estimado": round(fila["estimado"], 2),
+                "error": round(fila["error"], 2),
+                "garantizado": fila["garantizado"]
+            }
+            for fila in resumen.top(top_n)
+        ]
+    return resultado
+
 def analizar_tendencias_temporales(transacciones):
     """Analiza patrones temporales en las ventas"""
     from datetime import datetime
     
     ventas_por_dia = defaultdict(float)
     
-    for t in transacciones:
-        if t["estado"] == "Completado":
-            fecha = datetime.strptime(t["fecha"], "%Y-%m-%d")
-            dia_semana = fecha.strftime("%A")
-            ventas_por_dia[dia_semana] += t["monto_total"]
+    for estado, fecha, monto in iterar_campos(transacciones, ("estado", "fecha", "monto_total")):
+        if estado == "Completado":
+            dia_semana = datetime.strptime(fecha, "%Y-%m-%d").strftime("%A")
+            ventas_por_dia[dia_semana] += monto
     
     return dict(ventas_por_dia)
 
-def main():
+def _numero_transaccion(id_transaccion):
+    """Extrae el correlativo numérico de un id del tipo TXN0001"""
+    return int(id_transaccion[3:])
+
+def crear_agregados(error_clientes=0.01):
+    """Crea un estado vacío de agregados acumulados"""
+    return {
+        "watermark": {"id": 0, "fecha": None},
+        "total_ventas": 0.0,
+        "num_transacciones": 0,
+        "suma_descuentos": 0.0,
+        "num_descuentos": 0,
+        "ventas_por_categoria": {},
+        "ventas_por_producto": {},
+        "ventas_por_dia": {},
+        "clientes": HyperLogLog(error_clientes),
+        "clientes_por_mes": {},
+        "pendientes": {},
+        "versiones_particiones": {},
+        "dias": {},
+        "indice_clientes": IndiceClientes()
+    }
+
+def _sumar_transaccion(agregados, t):
+    """Suma una transacción completada a los agregados"""
+    agregados["total_ventas"] += t["monto_total"]
+    agregados["num_transacciones"] += 1
+    if t["descuento"] > 0:
+        agregados["suma_descuentos"] += t["descuento"]
+        agregados["num_descuentos"] += 1
+
+    cat = agregados["ventas_por_categoria"].setdefault(t["categoria"], {"monto": 0, "cantidad": 0})
+    cat["monto"] += t["monto_total"]
+    cat["cantidad"] += t["cantidad"]
+
+    # Las claves se guardan como texto para que sobrevivan al JSON
+    prod = agregados["ventas_por_producto"].setdefault(
+        str(t["producto_id"]), {"ventas": 0, "cantidad": 0, "nombre": ""}
+    )
+    prod["ventas"] += t["monto_total"]
+    prod["cantidad"] += t["cantidad"]
+    prod["nombre"] = t["producto_nombre"]
+
+    dia_semana = datetime.strptime(t["fecha"], "%Y-%m-%d").strftime("%A")
+    agregados["ventas_por_dia"][dia_semana] = agregados["ventas_por_dia"].get(dia_semana, 0.0) + t["monto_total"]
+
+    agregados["clientes"].agregar(t["cliente"])
+    mes = t["fecha"][:7]
+    if mes not in agregados["clientes_por_mes"]:
+        agregados["clientes_por_mes"][mes] = HyperLogLog(precision=agregados["clientes"].precision)
+    agregados["clientes_por_mes"][mes].agregar(t["cliente"])
+
+    # Sumas diarias del cubo de agregación (semana/mes/trimestre se derivan de ellas)
+    agregar_por_dia((t,), agregados.setdefault("dias", {}))
+
+    # Índice RFM por cliente (ausente en agregados guardados antes de existir)
+    if agregados.get("indice_clientes") is not None:
+        agregados["indice_clientes"].agregar_transaccion(t)
+
+def actualizar_agregados(agregados, transacciones, watermark_previo=0):
+    """Incorpora a los agregados solo las transacciones no procesadas
+
+    `watermark_previo` es el id hasta el cual una ejecución incremental
+    anterior ya procesó las transacciones (el watermark guardado, leído al
+    iniciar la ejecución); 0 en un análisis completo. Se omiten solo esas:
+    las demás se incorporan sin importar el orden en que lleguen (las
+    particiones se leen mes a mes, no por id), y el watermark avanza al
+    mayor id visto. Las transacciones nuevas se suman si están completadas
+    y se registran como pendientes si aún no se resuelven. Las pendientes
+    ya vistas se suman cuando pasan a Completado y se descartan si se
+    cancelan. Una transacción completada se considera definitiva. Retorna
+    la cantidad de transacciones incorporadas.
+    """
+    watermark = agregados["watermark"]
+    pendientes = agregados["pendientes"]
+    incorporadas = 0
+
+    for t in transacciones:
+        numero = _numero_transaccion(t["id"])
+
+        if numero <= watermark_previo:
+            # Procesada en una ejecución anterior: solo interesa si estaba pendiente y cambió de estado
+            if t["id"] in pendientes and t["estado"] != "Pendiente":
+                del pendientes[t["id"]]
+                if t["estado"] == "Completado":
+                    _sumar_transaccion(agregados, t)
+                    incorporadas += 1
+            continue
+
+        if t["estado"] == "Completado":
+            _sumar_transaccion(agregados, t)
+            incorporadas += 1
+        elif t["estado"] == "Pendiente":
+            pendientes[t["id"]] = t["fecha"]
+
+        if numero > watermark["id"]:
+            watermark["id"] = numero
+        if watermark["fecha"] is None or t["fecha"] > watermark["fecha"]:
+            watermark["fecha"] = t["fecha"]
+
+    return incorporadas
+
+def resultados_desde_agregados(agregados, metricas, top_n=5):
+    """Deriva los resultados del análisis a partir de los agregados acumulados"""
+    total_ventas = agregados["total_ventas"]
+    num_transacciones = agregados["num_transacciones"]
+    clientes_unicos = agregados["clientes"].estimar()
+
+    ticket_promedio = total_ventas / num_transacciones if num_transacciones > 0 else 0
+    descuento_promedio = (
+        agregados["suma_descuentos"] / agregados["num_descuentos"]
+        if agregados["num_descuentos"] > 0 else 0
+    )
+    valor_por_cliente = total_ventas / clientes_unicos if clientes_unicos > 0 else 0
+
+    crecimiento = calcular_crecimiento(metricas)
+
+    kpis = {
+        "total_ventas": round(total_ventas, 2),
+        "num_transacciones": num_transacciones,
+        "ticket_promedio": round(ticket_promedio, 2),
+        "descuento_promedio": round(descuento_promedio * 100, 2),
+        "clientes_unicos": clientes_unicos,
+        "valor_por_cliente": round(valor_por_cliente, 2),
+        "tasa_crecimiento": round(crecimiento, 2),
+        # Los agregados cuentan clientes con HyperLogLog: el valor es una estimación
+        "error_clientes_unicos": round(agregados["clientes"].error_estandar * 100, 2)
+    }
+
+    ventas_categoria = sorted(
+        [{"categoria": k, **v} for k, v in agregados["ventas_por_categoria"].items()],
+        key=lambda x: x["monto"],
+        reverse=True
+    )
+
+    productos_ordenados = sorted(
+        agregados["ventas_por_producto"].items(),
+        key=lambda x: x[1]["ventas"],
+        reverse=True
+    )[:top_n]
+    productos_top = [
+        {
+            "producto_id": int(pid),
+            "nombre": datos["nombre"],
+            "ventas_totales": round(datos["ventas"], 2),
+            "unidades_vendidas": datos["cantidad"]
+        }
+        for pid, datos in productos_ordenados
+    ]
+
+    return kpis, ventas_categoria, productos_top, dict(agregados["ventas_por_dia"])
+
+def guardar_agregados(agregados):
+    """Guarda los agregados acumulados en el almacén de datos"""
+    datos = dict(agregados)
+    datos["clientes"] = agregados["clientes"].a_dict()
+    datos["clientes_por_mes"] = {
+        mes: contador.a_dict() for mes, contador in agregados["clientes_por_mes"].items()
+    }
+    if agregados.get("indice_clientes") is not None:
+        datos["indice_clientes"] = agregados["indice_clientes"].a_dict()
+    obtener_almacen().escribir("agregados_financieros", datos)
+
+def cargar_agregados():
+    """Carga los agregados acumulados, o retorna None si no existen"""
+    try:
+        agregados = obtener_almacen().leer("agregados_financieros")
+    except FileNotFoundError:
+        return None
+    agregados["clientes"] = HyperLogLog.desde_dict(agregados["clientes"])
+    agregados["clientes_por_mes"] = {
+        mes: HyperLogLog.desde_dict(contador)
+        for mes, contador in agregados["clientes_por_mes"].items()
+    }
+    if agregados.get("indice_clientes") is not None:
+        agregados["indice_clientes"] = IndiceClientes.desde_dict(agregados["indice_clientes"])
+    return agregados
+
+def main(incremental=False, streaming=False, tamano_lote=TAMANO_LOTE_DEFECTO, desde=None, hasta=None,
+         aproximado=False):
     print("📊 Iniciando análisis de datos financieros...\n")
+    resumenes = None
     
-    # Cargar datos
-    transacciones, metricas, productos = cargar_datos()
+    # Un rango de fechas se resuelve leyendo solo las particiones necesarias
+    rango = desde is not None or hasta is not None
+    if rango:
+        streaming = True
+        print(f"📅 Rango analizado: {desde or 'inicio'} → {hasta or 'fin'}")
+    # El modo incremental lee por lotes: solo las particiones con algo nuevo,
+    # sin cargar todas las transacciones
+    if incremental:
+        streaming = True
     
-    if not transacciones:
-        return
+    if streaming:
+        agregados = (cargar_agregados() if incremental else None) or crear_agregados()
+        # Solo una ejecución incremental omite lo ya procesado en ejecuciones anteriores
+        watermark_previo = agregados["watermark"]["id"]
+        
+        # Lectura por lotes: las transacciones nunca están completas en memoria
+        fuente = iterar_fuente_transacciones(desde, hasta, agregados if incremental else None)
+        if fuente is None:
+            print("⚠️  Archivos de datos no encontrados. Ejecuta primero generate_financial_data.py")
+            return
+        metricas = cargar_metricas()
+        incorporadas = 0
+        if aproximado:
+            resumenes = construir_resumenes_top(())
+        
+        def incorporar_lote(lote):
+            nonlocal incorporadas
+            incorporadas += actualizar_agregados(agregados, lote, watermark_previo)
+            if aproximado:
+                construir_resumenes_top(lote, resumenes=resumenes)
+        
+        rendimiento = procesar_en_lotes(fuente, incorporar_lote, tamano_lote)
+        reportar_rendimiento(rendimiento)
+        
+        if agregados.get("indice_clientes") is None:
+            # Agregados guardados antes de existir el índice de clientes: se
+            # reconstruye una vez con todas las transacciones (ya incluye las de hoy)
+            indice = IndiceClientes()
+            indice.actualizar(iterar_fuente_transacciones())
+            agregados["indice_clientes"] = indice
+            print("🔄 Índice de clientes reconstruido con todas las transacciones")
+        
+        if incremental:
+            # Modo incremental: solo se incorporan transacciones posteriores al watermark
+            guardar_agregados(agregados)
+            guardar_cubo(cubo_desde_dias(agregados["dias"]))
+            print(f"🔄 Modo incremental: {incorporadas} transacciones nuevas incorporadas "
+                  f"(watermark {agregados['watermark']['id']}, {agregados['watermark']['fecha']})")
+        if rango:
+            # El crecimiento de un rango se mide con los meses completos del propio rango
+            metricas = serie_mensual(cubo_desde_dias(agregados["dias"]))
+        print()
+        kpis, ventas_categoria, productos_top, tendencias = resultados_desde_agregados(agregados, metricas)
+        indice_clientes = agregados.get("indice_clientes")
+        if resumenes is not None:
+            productos_top = productos_top_desde_resumenes(resumenes)
+    else:
+        # Cargar datos
+        transacciones, metricas, productos = cargar_datos()
+        
+        if not transacciones:
+            return
+        
+        kpis = calcular_kpis(transacciones, metricas)
+        ventas_categoria = analizar_ventas_por_categoria(transacciones)
+        if aproximado:
+            resumenes = construir_resumenes_top(transacciones)
+            productos_top = productos_top_desde_resumenes(resumenes)
+        else:
+            productos_top = analizar_productos_top(transacciones)
+        tendencias = analizar_tendencias_temporales(transacciones)
+        indice_clientes = IndiceClientes.construir(transacciones)
     
     # Análisis 1: KPIs principales
     print("=" * 60)
     print("📈 INDICADORES CLAVE DE RENDIMIENTO (KPIs)")
     print("=" * 60)
-    kpis = calcular_kpis(transacciones, metricas)
     for key, value in kpis.items():
+        if key == "error_clientes_unicos":
+            continue
+        if key == "clientes_unicos" and "error_clientes_unicos" in kpis:
+            value = f"~{value} (aprox. HyperLogLog, error estándar ±{kpis['error_clientes_unicos']}%)"
         print(f"{key.replace('_', ' ').title()}: {value}")
     
     # Análisis 2: Ventas por categoría
     print("\n" + "=" * 60)
     print("🏷️  VENTAS POR CATEGORÍA")
     print("=" * 60)
-    ventas_categoria = analizar_ventas_por_categoria(transacciones)
     for item in ventas_categoria:
         print(f"{item['categoria']}: ${item['monto']:,.2f} ({item['cantidad']} unidades)")
     
@@ -156,30 +626,89 @@ def main():
     print("\n" + "=" * 60)
     print("⭐ TOP 5 PRODUCTOS MÁS VENDIDOS")
     print("=" * 60)
-    productos_top = analizar_productos_top(transacciones)
     for i, prod in enumerate(productos_top, 1):
         print(f"{i}. {prod['nombre']}: ${prod['ventas_totales']:,.2f} ({prod['unidades_vendidas']} unidades)")
     
+    # Análisis 3b: Top aproximado de clientes y categorías (resúmenes Space-Saving)
+    top_pesados = analizar_top_pesados(resumenes) if resumenes is not None else None
+    if top_pesados:
+        print(f"\n   Error máximo por conteo: ±${resumenes['productos_ventas'].error_maximo:,.2f}")
+        for nombre, titulo in (("clientes", "👥 TOP 5 CLIENTES (APROXIMADO)"),
+                               ("categorias", "🏷️  TOP 5 CATEGORÍAS (APROXIMADO)")):
+            print("\n" + "=" * 60)
+            print(titulo)
+            print("=" * 60)
+            for i, fila in enumerate(top_pesados[nombre], 1):
+                marca = "" if fila["garantizado"] else " (no garantizado)"
+                print(f"{i}. {fila['elemento']}: ${fila['estimado']:,.2f} ± ${fila['error']:,.2f}{marca}")
+    
     # Análisis 4: Tendencias temporales
     print("\n" + "=" * 60)
     print("📅 VENTAS POR DÍA DE LA SEMANA")
     print("=" * 60)
-    tendencias = analizar_tendencias_temporales(transacciones)
     for dia, monto in sorted(tendencias.items(), key=lambda x: x[1], reverse=True):
         print(f"{dia}: ${monto:,.2f}")
     
+    # Análisis 4b: Segmentos de clientes desde el índice RFM
+    print("\n" + "=" * 60)
+    print("👥 SEGMENTOS DE CLIENTES (RFM)")
+    print("=" * 60)
+    for segmento, cantidad in indice_clientes.contar_segmentos().items():
+        if cantidad:
+            print(f"{segmento}: {cantidad} clientes")
+    # El índice de un rango solo cubre ese rango: no reemplaza al global
+    if not rango:
+        guardar_indice_clientes(indice_clientes)
+    
+    # Análisis 5: Serie mensual desde el cubo precalculado (sin recorrer transacciones);
+    # en un rango, desde las sumas diarias del propio rango
+    cubo = cubo_desde_dias(agregados["dias"]) if rango else cargar_cubo()
+    ventas_mensuales = consultar(cubo, "mes") if cubo else []
+    if ventas_mensuales:
+        print("\n" + "=" * 60)
+        print(f"📆 VENTAS POR MES ({'RANGO ANALIZADO' if rango else 'CUBO PRECALCULADO'})")
+        print("=" * 60)
+        for fila in ventas_mensuales:
+            print(f"{fila['periodo']}: ${fila['ingresos']:,.2f} ({fila['transacciones']} transacciones)")
+    
     # Guardar resultados del análisis
     resultados = {
         "kpis": kpis,
         "ventas_por_categoria": ventas_categoria,
         "productos_top": productos_top,
-        "tendencias_temporales": tendencias
+        "tendencias_temporales": tendencias,
+        "ventas_mensuales": ventas_mensuales
     }
+    if top_pesados:
+        resultados["top_aproximado"] = top_pesados
     
-    with open('scripts/analisis_resultados.json', 'w', encoding='utf-8') as f:
-        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    # Un rango se guarda aparte: los resultados globales siguen siendo del total
+    if rango:
+        resultados["rango"] = {"desde": desde, "hasta": hasta}
+        dataset = DATASET_RESULTADOS_RANGO
+    else:
+        dataset = DATASET_RESULTADOS
+    obtener_almacen().escribir(dataset, resultados)
     
-    print("\n✅ Análisis completado. Resultados guardados en analisis_resultados.json")
+    print(f"\n✅ Análisis completado. Resultados guardados en {dataset}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Análisis de datos financieros")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Incorpora solo transacciones nuevas sobre los agregados guardados "
+                             "(implica --streaming)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Lee las transacciones en lotes sin cargar el archivo completo")
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE_DEFECTO,
+                        help="Cantidad de registros por lote en modo streaming")
+    parser.add_argument("--desde", help="Fecha inicial del análisis (AAAA-MM-DD)")
+    parser.add_argument("--hasta", help="Fecha final del análisis (AAAA-MM-DD)")
+    parser.add_argument("--aproximado", action="store_true",
+                        help="Top de productos, clientes y categorías con resúmenes Space-Saving")
+    args = parser.parse_args()
+    if args.incremental and (args.desde or args.hasta):
+        parser.error("--incremental no se puede combinar con --desde/--hasta")
+    if args.incremental and args.aproximado:
+        parser.error("--aproximado no se puede combinar con --incremental (los resúmenes no se guardan)")
+    main(incremental=args.incremental, streaming=args.streaming, tamano_lote=args.tamano_lote,
+         desde=args.desde, hasta=args.hasta, aproximado=args.aproximado)
@@ -0,0 +1,389 @@
+"""
+Índice de Clientes (RFM)
+Autor: Sistema de Análisis Financiero
+Fecha: 2024-01-15
+
+Este módulo mantiene una tabla por cliente con recencia, frecuencia, monto
+(RFM), unidades y gasto por categoría, construida con una sola agrupación
+sobre las transacciones completadas. Las columnas se guardan en arreglos
+con un mapa cliente → posición, así que consultar un cliente es O(1) y los
+conteos por segmento se mantienen precalculados. Las transacciones nuevas
+se incorporan sin volver a recorrer las anteriores, y solo se reclasifican
+los clientes que cambiaron o cuyo valor quedó entre un corte de quintil
+anterior y el nuevo.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+
+try:
+    from scripts.records import iterar_campos
+    from scripts.storage import obtener_almacen
+except ImportError:
+    from records import iterar_campos
+    from storage import obtener_almacen
+
+DATASET_INDICE_CLIENTES = 'indice_clientes'
+SEGMENTOS = ("Campeones", "Leales", "Nuevos", "Potenciales", "En Riesgo", "Perdidos")
+# Dimensiones ordenadas para los quintiles: la recencia se mide por la fecha
+# de la última compra (en días ordinales), así sus cortes no dependen de la
+# fecha de referencia
+DIMENSIONES_RFM = ("ultima_compra", "frecuencia", "monto")
+# Sobre esta cantidad de clientes modificados, recalcular todo es más barato
+# que mover cada uno en las listas ordenadas (cada movimiento desplaza la lista)
+MAX_RECLASIFICACION_PARCIAL = 1000
+
+
+def _ordinal(fecha):
+    return date.fromisoformat(fecha).toordinal()
+
+
+def _limites_quintiles(ordenados):
+    """Cuatro puntos de corte que separan en quintiles una lista ordenada de (valor, posición)
+
+    Igual que statistics.quantiles(valores, n=5, method='inclusive'), pero
+    sobre valores ya ordenados: no recorre la lista.
+    """
+    if len(ordenados) < 2:
+        return []
+    m = len(ordenados) - 1
+    limites = []
+    for i in range(1, 5):
+        j, delta = divmod(i * m, 5)
+        limites.append((ordenados[j][0] * (5 - delta) + ordenados[j + 1][0] * delta) / 5)
+    return limites
+
+
+def segmento_rfm(recencia, frecuencia, monto):
+    """Asigna un segmento a partir de los puntajes R, F y M (1 a 5)"""
+    if recencia >= 4 and frecuencia >= 4:
+        return "Campeones"
+    if frecuencia >= 4 or (frecuencia >= 3 and monto >= 4):
+        return "Leales"
+    if recencia >= 4 and frecuencia <= 2:
+        return "Nuevos"
+    if recencia <= 2 and frecuencia >= 3:
+        return "En Riesgo"
+    if recencia <= 2:
+        return "Perdidos"
+    return "Potenciales"
+
+
+class IndiceClientes:
+    """Tabla RFM por cliente guardada por columnas
+
+    Incorporar una transacción es O(1). Tras cada tanda de transacciones
+    nuevas, en la primera consulta, los quintiles se leen de listas ordenadas
+    de (valor, posición) por dimensión y se reclasifican solo los clientes
+    modificados más los que quedaron entre un corte anterior y el nuevo (los
+    únicos cuyo puntaje puede cambiar).
+    """
+
+    def __init__(self):
+        self.fecha_referencia = None
+        self.categorias = []
+        self.clientes = []
+        self.posiciones = {}
+        self.primera_compra = []
+        self.ultima_compra = []
+        self.frecuencia = array('I')
+        self.monto = array('d')
+        self.unidades = array('I')
+        self.gasto_por_categoria = {}
+        self.limites = {dimension: [] for dimension in DIMENSIONES_RFM}
+        self.segmentos = array('B')
+        self.conteo_segmentos = dict.fromkeys(SEGMENTOS, 0)
+        # Dimensión → lista ordenada de (valor, posición); se arma al necesitarla
+        self._ordenados = None
+        # Posición → valores (ultima_compra, frecuencia, monto) previos a los
+        # cambios aún no reclasificados; None si el cliente es nuevo
+        self._modificados = {}
+        # Hay que recalcular todo (índice recién construido o de formato anterior)
+        self._desactualizado = False
+
+    # ------------------------------------------------------------
+    # Construcción e incorporación de transacciones
+    # ------------------------------------------------------------
+
+    @classmethod
+    def construir(cls, transacciones):
+        """Construye el índice con una agrupación vectorizada (pandas) si está disponible"""
+        try:
+            import pandas as pd
+        except ImportError:
+            indice = cls()
+            indice.actualizar(transacciones)
+            return indice
+
+        campos = ("estado", "cliente", "fecha", "monto_total", "cantidad", "categoria")
+        df = pd.DataFrame.from_records(iterar_campos(transacciones, campos), columns=campos)
+        indice = cls()
+        df = df[df["estado"] == "Completado"]
+        if df.empty:
+            return indice
+
+        resumen = df.groupby("cliente", sort=False).agg(
+            primera_compra=("fecha", "min"),
+            ultima_compra=("fecha", "max"),
+            frecuencia=("fecha", "size"),
+            monto=("monto_total", "sum"),
+            unidades=("cantidad", "sum"),
+        )
+        gasto = df.pivot_table(index="cliente", columns="categoria", values="monto_total",
+                               aggfunc="sum", fill_value=0.0).reindex(resumen.index, fill_value=0.0)
+
+        indice.clientes = resumen.index.tolist()
+        indice.posiciones = {cliente: i for i, cliente in enumerate(indice.clientes)}
+        indice.primera_compra = resumen["primera_compra"].tolist()
+        indice.ultima_compra = resumen["ultima_compra"].tolist()
+        indice.frecuencia = array('I', resumen["frecuencia"].astype(int).tolist())
+        indice.monto = array('d', resumen["monto"].astype(float).tolist())
+        indice.unidades = array('I', resumen["unidades"].astype(int).tolist())
+        indice.categorias = [str(c) for c in gasto.columns]
+        indice.gasto_por_categoria = {
+            str(categoria): array('d', gasto[categoria].astype(float).tolist()) for categoria in gasto.columns
+        }
+        indice.fecha_referencia = max(indice.ultima_compra)
+        indice.segmentos = array('B', bytes(len(indice.clientes)))
+        indice._desactualizado = True
+        return indice
+
+    def _posicion_nueva(self, cliente):
+        posicion = self.posiciones[cliente] = len(self.clientes)
+        self.clientes.append(cliente)
+        self.primera_compra.append(None)
+        self.ultima_compra.append(None)
+        self.frecuencia.append(0)
+        self.monto.append(0.0)
+        self.unidades.append(0)
+        for columna in self.gasto_por_categoria.values():
+            columna.append(0.0)
+        self.segmentos.append(0)
+        return posicion
+
+    def agregar_transaccion(self, t):
+        """Incorpora una transacción completada"""
+        posicion = self.posiciones.get(t["cliente"])
+        if posicion is None:
+            posicion = self._posicion_nueva(t["cliente"])
+            self._modificados[posicion] = None
+        elif posicion not in self._modificados:
+            self._modificados[posicion] = self._valores(posicion)
+
+        fecha = t["fecha"]
+        if self.primera_compra[posicion] is None or fecha < self.primera_compra[posicion]:
+            self.primera_compra[posicion] = fecha
+        if self.ultima_compra[posicion] is None or fecha > self.ultima_compra[posicion]:
+            self.ultima_compra[posicion] = fecha
+        self.frecuencia[posicion] += 1
+        self.monto[posicion] += t["monto_total"]
+        self.unidades[posicion] += t["cantidad"]
+
+        columna = self.gasto_por_categoria.get(t["categoria"])
+        if columna is None:
+            self.categorias.append(t["categoria"])
+            columna = self.gasto_por_categoria[t["categoria"]] = array('d', bytes(8 * len(self.clientes)))
+        columna[posicion] += t["monto_total"]
+
+        if self.fecha_referencia is None or fecha > self.fecha_referencia:
+            self.fecha_referencia = fecha
+
+    def actualizar(self, transacciones):
+        """Incorpora las transacciones completadas de un iterable; retorna cuántas"""
+        incorporadas = 0
+        for t in transacciones:
+            if t["estado"] == "Completado":
+                self.agregar_transaccion(t)
+                incorporadas += 1
+        return incorporadas
+
+    # ------------------------------------------------------------
+    # Puntajes y segmentos
+    # ------------------------------------------------------------
+
+    def _recencia_dias(self, posicion):
+        referencia = date.fromisoformat(self.fecha_referencia)
+        return (referencia - date.fromisoformat(self.ultima_compra[posicion])).days
+
+    def _valores(self, posicion):
+        """Valores de las dimensiones RFM de un cliente, como se ordenan"""
+        return (_ordinal(self.ultima_compra[posicion]), self.frecuencia[posicion], self.monto[posicion])
+
+    def _puntajes(self, posicion):
+        """Puntajes R, F y M (1 a 5) según los quintiles vigentes"""
+        ultima, frecuencia, monto = self._valores(posicion)
+        limites = self.limites
+        # Una compra más reciente es mejor: equivale a menos días desde la última compra
+        recencia = 5 - len(limites["ultima_compra"]) + bisect_right(limites["ultima_compra"], ultima)
+        frecuencia = 1 + bisect_right(limites["frecuencia"], frecuencia)
+        monto = 1 + bisect_right(limites["monto"], monto)
+        return recencia, frecuencia, monto
+
+    def _ordenar(self):
+        """Listas ordenadas de (valor, posición) de cada dimensión"""
+        columnas = (
+            map(_ordinal, self.ultima_compra),
+            self.frecuencia,
+            self.monto,
+        )
+        return {dimension: sorted(zip(columna, range(len(self.clientes))))
+                for dimension, columna in zip(DIMENSIONES_RFM, columnas)}
+
+    def _clasificar(self, posicion, nuevo=False):
+        """Asigna el segmento de un cliente y ajusta los conteos"""
+        segmento = SEGMENTOS.index(segmento_rfm(*self._puntajes(posicion)))
+        if not nuevo:
+            self.conteo_segmentos[SEGMENTOS[self.segmentos[posicion]]] -= 1
+        self.segmentos[posicion] = segmento
+        self.conteo_segmentos[SEGMENTOS[segmento]] += 1
+
+    def _reclasificar(self):
+        """Actualiza quintiles y segmentos si hay transacciones nuevas"""
+        if self._desactualizado or len(self._modificados) > MAX_RECLASIFICACION_PARCIAL:
+            self._reclasificar_todo()
+        elif self._modificados:
+            self._reclasificar_modificados()
+
+    def _reclasificar_todo(self):
+        """Recalcula quintiles y segmentos de todos los clientes"""
+        self._ordenados = self._ordenar()
+        self.limites = {d: _limites_quintiles(self._ordenados[d]) for d in DIMENSIONES_RFM}
+        self.conteo_segmentos = dict.fromkeys(SEGMENTOS, 0)
+        for posicion in range(len(self.clientes)):
+            self._clasificar(posicion, nuevo=True)
+        self._modificados = {}
+        self._desactualizado = False
+
+    def _reclasificar_modificados(self):
+        """Reclasifica los clientes modificados y los que cruzaron un corte de quintil"""
+        if self._ordenados is None:
+            # Índice recién cargado: se ordena con los valores ya actualizados
+            self._ordenados = self._ordenar()
+        else:
+            for posicion, previos in self._modificados.items():
+                for dimension, previo, actual in zip(DIMENSIONES_RFM, previos or (None,) * 3,
+                                                     self._valores(posicion)):
+                    ordenados = self._ordenados[dimension]
+                    if previo is not None:
+                        del ordenados[bisect_left(ordenados, (previo, posicion))]
+                    insort(ordenados, (actual, posicion))
+
+        afectados = set(self._modificados)
+        for dimension in DIMENSIONES_RFM:
+            ordenados = self._ordenados[dimension]
+            anteriores = self.limites[dimension]
+            nuevos = _limites_quintiles(ordenados)
+            if len(anteriores) != len(nuevos):
+                # Con menos de dos clientes no hay cortes: cambian todos los puntajes
+                afectados.update(range(len(self.clientes)))
+            else:
+                # Solo cambia el puntaje de quien quedó entre el corte anterior y el nuevo
+                for corte_anterior, corte_nuevo in zip(anteriores, nuevos):
+                    if corte_anterior != corte_nuevo:
+                        menor, mayor = sorted((corte_anterior, corte_nuevo))
+                        inicio = bisect_left(ordenados, (menor,))
+                        fin = bisect_right(ordenados, (mayor, len(self.clientes)))
+                        afectados.update(posicion for _, posicion in ordenados[inicio:fin])
+            self.limites[dimension] = nuevos
+
+        for posicion in afectados:
+            self._clasificar(posicion, nuevo=posicion in self._modificados and self._modificados[posicion] is None)
+        self._modificados = {}
+
+    # ------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.clientes)
+
+    def __contains__(self, cliente):
+        return cliente in self.posiciones
+
+    def buscar(self, cliente):
+        """Ficha RFM de un cliente, o None si no tiene compras completadas"""
+        posicion = self.posiciones.get(cliente)
+        if posicion is None:
+            return None
+        self._reclasificar()
+        recencia, frecuencia, monto = self._puntajes(posicion)
+        return {
+            "cliente": cliente,
+            "primera_compra": self.primera_compra[posicion],
+            "ultima_compra": self.ultima_compra[posicion],
+            "recencia_dias": self._recencia_dias(posicion),
+            "frecuencia": self.frecuencia[posicion],
+            "monto": round(self.monto[posicion], 2),
+            "ticket_promedio": round(self.monto[posicion] / self.frecuencia[posicion], 2),
+            "unidades": self.unidades[posicion],
+            "categoria_favorita": max(self.categorias, key=lambda c: self.gasto_por_categoria[c][posicion]),
+            "puntaje_rfm": f"{recencia}{frecuencia}{monto}",
+            "segmento": SEGMENTOS[self.segmentos[posicion]]
+        }
+
+    def contar_segmentos(self):
+        """Clientes por segmento (precalculado)"""
+        self._reclasificar()
+        return dict(self.conteo_segmentos)
+
+    def clientes_del_segmento(self, segmento):
+        """Clientes que pertenecen a un segmento"""
+        self._reclasificar()
+        codigo = SEGMENTOS.index(segmento)
+        return [cliente for cliente, s in zip(self.clientes, self.segmentos) if s == codigo]
+
+    # ------------------------------------------------------------
+    # Serialización
+    # ------------------------------------------------------------
+
+    def a_dict(self):
+        """Serializa el índice por columnas (compatible con JSON)"""
+        self._reclasificar()
+        return {
+            "fecha_referencia": self.fecha_referencia,
+            "clientes": self.clientes,
+            "primera_compra": self.primera_compra,
+            "ultima_compra": self.ultima_compra,
+            "frecuencia": self.frecuencia.tolist(),
+            "monto": self.monto.tolist(),
+            "unidades": self.unidades.tolist(),
+            "gasto_por_categoria": {c: self.gasto_por_categoria[c].tolist() for c in self.categorias},
+            "limites": self.limites,
+            "segmentos": self.segmentos.tolist(),
+            "conteo_segmentos": self.conteo_segmentos
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye un índice serializado con a_dict()"""
+        indice = cls()
+        indice.fecha_referencia = datos["fecha_referencia"]
+        indice.clientes = datos["clientes"]
+        indice.posiciones = {cliente: i for i, cliente in enumerate(indice.clientes)}
+        indice.primera_compra = datos["primera_compra"]
+        indice.ultima_compra = datos["ultima_compra"]
+        indice.frecuencia = array('I', datos["frecuencia"])
+        indice.monto = array('d', datos["monto"])
+        indice.unidades = array('I', datos["unidades"])
+        indice.categorias = list(datos["gasto_por_categoria"])
+        indice.gasto_por_categoria = {c: array('d', g) for c, g in datos["gasto_por_categoria"].items()}
+        indice.limites = datos["limites"]
+        indice.segmentos = array('B', datos["segmentos"])
+        indice.conteo_segmentos = datos["conteo_segmentos"]
+        # Índices guardados con cortes de recencia en días: se reclasifican completos
+        indice._desactualizado = set(indice.limites) != set(DIMENSIONES_RFM)
+        return indice
+
+
+def guardar_indice_clientes(indice):
+    """Guarda el índice de clientes en el almacén de datos configurado"""
+    obtener_almacen().escribir(DATASET_INDICE_CLIENTES, indice.a_dict())
+
+
+def cargar_indice_clientes():
+    """Carga el índice de clientes, o retorna None si no existe"""
+    try:
+        return IndiceClientes.desde_dict(obtener_almacen().leer(DATASET_INDICE_CLIENTES))
+    except FileNotFoundError:
+        return None
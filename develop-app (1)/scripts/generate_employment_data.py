@@ -7,10 +7,17 @@ Este script genera datos sintéticos sobre el mercado laboral chileno.
 Incluye datos de empleo por sector, sueldos, tasas de desempleo y ofertas laborales.
 """
 
-import json
 import random
 from datetime import datetime, timedelta
-import os
+
+try:
+    from scripts.histograms import construir_histogramas, guardar_histogramas
+    from scripts.records import EstadisticaMensual, LoteOfertas, Oferta, Sector, iterar_campos
+    from scripts.storage import obtener_almacen
+except ImportError:
+    from histograms import construir_histogramas, guardar_histogramas
+    from records import EstadisticaMensual, LoteOfertas, Oferta, Sector, iterar_campos
+    from storage import obtener_almacen
 
 # Configuración de semilla para reproducibilidad
 random.seed(42)
@@ -46,9 +53,14 @@ cargos_por_sector = {
     "Transporte": ["Coordinador Logístico", "Operador de Flota", "Supervisor de Rutas"],
 }
 
-def generar_ofertas_laborales(num_ofertas=50):
-    """Genera ofertas laborales sintéticas del mercado chileno"""
-    ofertas = []
+def generar_ofertas_laborales(num_ofertas=50, como_registros=False):
+    """Genera ofertas laborales sintéticas del mercado chileno
+    
+    Con como_registros=True retorna un LoteOfertas (columnas en arreglos)
+    que se recorre como una lista de objetos Oferta.
+    """
+    tipo = Oferta if como_registros else dict
+    ofertas = LoteOfertas() if como_registros else []
     fecha_inicio = datetime.now() - timedelta(days=30)
     
     for i in range(num_ofertas):
@@ -62,27 +74,28 @@ def generar_ofertas_laborales(num_ofertas=50):
         variacion = random.uniform(0.7, 1.4)
         sueldo = int(sueldo_base * variacion)
         
-        oferta = {
-            "id": f"EMP{str(i+1).zfill(4)}",
-            "fecha": fecha.strftime("%Y-%m-%d"),
-            "empresa": empresa,
-            "cargo": cargo,
-            "sector": sector["nombre"],
-            "sueldo": sueldo,
-            "region": random.choice(["Metropolitana", "Valparaíso", "Biobío", "Antofagasta"]),
-            "tipo_contrato": random.choice(["Indefinido", "Plazo Fijo", "Por Proyecto"]),
-            "jornada": random.choice(["Completa", "Part-Time", "Flexible"]),
-            "estado": random.choices(
+        oferta = tipo(
+            id=f"EMP{str(i+1).zfill(4)}",
+            fecha=fecha.strftime("%Y-%m-%d"),
+            empresa=empresa,
+            cargo=cargo,
+            sector=sector["nombre"],
+            sueldo=sueldo,
+            region=random.choice(["Metropolitana", "Valparaíso", "Biobío", "Antofagasta"]),
+            tipo_contrato=random.choice(["Indefinido", "Plazo Fijo", "Por Proyecto"]),
+            jornada=random.choice(["Completa", "Part-Time", "Flexible"]),
+            estado=random.choices(
                 ["Activa", "En Revisión", "Cerrada"],
                 weights=[0.70, 0.20, 0.10]
             )[0]
-        }
+        )
         ofertas.append(oferta)
     
     return ofertas
 
-def generar_estadisticas_mensuales():
-    """Genera estadísticas del mercado laboral por mes"""
+def generar_estadisticas_mensuales(como_registros=False):
+    """Genera estadísticas del mercado laboral por mes (objetos EstadisticaMensual si como_registros)"""
+    tipo = EstadisticaMensual if como_registros else dict
     meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", 
              "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
     
@@ -102,21 +115,22 @@ def generar_estadisticas_mensuales():
         # Tasa de participación laboral
         tasa_participacion = round(60.5 + random.uniform(-0.5, 1.0), 2)
         
-        estadistica = {
-            "mes": mes,
-            "mes_num": i + 1,
-            "tasa_desempleo": round(tasa_desempleo, 1),
-            "empleos_creados": empleos_creados,
-            "sueldo_promedio": sueldo_promedio,
-            "tasa_participacion": tasa_participacion,
-            "trabajadores_activos": int(9200000 + (i * 15000))
-        }
+        estadistica = tipo(
+            mes=mes,
+            mes_num=i + 1,
+            tasa_desempleo=round(tasa_desempleo, 1),
+            empleos_creados=empleos_creados,
+            sueldo_promedio=sueldo_promedio,
+            tasa_participacion=tasa_participacion,
+            trabajadores_activos=int(9200000 + (i * 15000))
+        )
         estadisticas.append(estadistica)
     
     return estadisticas
 
-def generar_datos_por_sector():
-    """Genera datos detallados por sector económico"""
+def generar_datos_por_sector(como_registros=False):
+    """Genera datos detallados por sector económico (objetos Sector si como_registros)"""
+    tipo = Sector if como_registros else dict
     datos_sectores = []
     
     for sector in sectores:
@@ -127,14 +141,14 @@ def generar_datos_por_sector():
         # Crecimiento anual
         crecimiento = round(random.uniform(-2.0, 15.0), 1)
         
-        dato = {
-            "sector": sector["nombre"],
-            "empleos_totales": empleos_actuales,
-            "sueldo_promedio": sector["sueldo_promedio"],
-            "crecimiento_anual": crecimiento,
-            "ofertas_activas": random.randint(150, 800),
-            "tasa_rotacion": round(random.uniform(8.0, 25.0), 1)
-        }
+        dato = tipo(
+            sector=sector["nombre"],
+            empleos_totales=empleos_actuales,
+            sueldo_promedio=sector["sueldo_promedio"],
+            crecimiento_anual=crecimiento,
+            ofertas_activas=random.randint(150, 800),
+            tasa_rotacion=round(random.uniform(8.0, 25.0), 1)
+        )
         datos_sectores.append(dato)
     
     return datos_sectores
@@ -185,39 +199,35 @@ def generar_datos_historicos():
 def main():
     print("🇨🇱 Generando datos de empleabilidad en Chile...")
     
-    os.makedirs('scripts', exist_ok=True)
+    almacen = obtener_almacen()
     
-    # Generar datos
-    ofertas = generar_ofertas_laborales(50)
-    estadisticas = generar_estadisticas_mensuales()
-    datos_sectores = generar_datos_por_sector()
+    # Generar datos (registros tipados: se recorren y guardan sin diccionarios)
+    ofertas = generar_ofertas_laborales(50, como_registros=True)
+    estadisticas = generar_estadisticas_mensuales(como_registros=True)
+    datos_sectores = generar_datos_por_sector(como_registros=True)
     datos_historicos = generar_datos_historicos()
+    histogramas = construir_histogramas(ofertas)
     
-    # Guardar a archivos JSON
-    with open('scripts/ofertas_laborales.json', 'w', encoding='utf-8') as f:
-        json.dump(ofertas, f, ensure_ascii=False, indent=2)
-    
-    with open('scripts/estadisticas_mensuales.json', 'w', encoding='utf-8') as f:
-        json.dump(estadisticas, f, ensure_ascii=False, indent=2)
-    
-    with open('scripts/datos_sectores.json', 'w', encoding='utf-8') as f:
-        json.dump(datos_sectores, f, ensure_ascii=False, indent=2)
-    
-    with open('scripts/datos_historicos.json', 'w', encoding='utf-8') as f:
-        json.dump(datos_historicos, f, ensure_ascii=False, indent=2)
+    # Guardar en el almacén de datos configurado
+    almacen.escribir("ofertas_laborales", ofertas)
+    almacen.escribir("estadisticas_mensuales", estadisticas)
+    almacen.escribir("datos_sectores", datos_sectores)
+    almacen.escribir("datos_historicos", datos_historicos)
+    guardar_histogramas(histogramas)
     
     print(f"✅ Generadas {len(ofertas)} ofertas laborales")
     print(f"✅ Generadas {len(estadisticas)} estadísticas mensuales")
     print(f"✅ Datos de {len(datos_sectores)} sectores económicos")
     print(f"✅ Datos históricos de {len(datos_historicos)} años (2015-2024)")
+    print(f"✅ Histogramas de sueldos para {len(histogramas['grupos'])} combinaciones sector × región × contrato")
     
     # Estadísticas básicas
-    ofertas_activas = sum(1 for o in ofertas if o["estado"] == "Activa")
-    sueldo_promedio_global = sum(s["sueldo_promedio"] for s in datos_sectores) / len(datos_sectores)
+    ofertas_activas = sum(1 for estado, in iterar_campos(ofertas, ("estado",)) if estado == "Activa")
+    sueldo_promedio_global = sum(s.sueldo_promedio for s in datos_sectores) / len(datos_sectores)
     
     print(f"\n📊 Ofertas activas: {ofertas_activas}")
     print(f"💰 Sueldo promedio nacional: ${sueldo_promedio_global:,.0f}")
-    print(f"📈 Tasa de desempleo actual: {estadisticas[-1]['tasa_desempleo']}%")
+    print(f"📈 Tasa de desempleo actual: {estadisticas[-1].tasa_desempleo}%")
     
     return {
         "ofertas": len(ofertas),
@@ -7,10 +7,21 @@ Este script genera datos financieros sintéticos para análisis.
 Incluye datos de ventas, clientes, productos y transacciones.
 """
 
-import json
+import argparse
 import random
 from datetime import datetime, timedelta
 
+try:
+    from scripts.partitions import eliminar_particiones, escribir_particiones
+    from scripts.records import LoteTransacciones, Transaccion
+    from scripts.rollup import construir_cubo, consultar, guardar_cubo, serie_mensual
+    from scripts.storage import obtener_almacen
+except ImportError:
+    from partitions import eliminar_particiones, escribir_particiones
+    from records import LoteTransacciones, Transaccion
+    from rollup import construir_cubo, consultar, guardar_cubo, serie_mensual
+    from storage import obtener_almacen
+
 # Configuración de semilla para reproducibilidad
 random.seed(42)
 
@@ -34,47 +45,77 @@ clientes = [
     "Roberto Fernández", "Laura González"
 ]
 
-def generar_transacciones(num_transacciones=100):
-    """Genera transacciones sintéticas de ventas"""
-    transacciones = []
-    fecha_inicio = datetime.now() - timedelta(days=90)
+def generar_transacciones(num_transacciones=100, dias=90, como_registros=False):
+    """Genera transacciones sintéticas de ventas de los últimos `dias` días
+    
+    Con como_registros=True retorna un LoteTransacciones (columnas en arreglos)
+    que se recorre como una lista de objetos Transaccion.
+    """
+    tipo = Transaccion if como_registros else dict
+    transacciones = LoteTransacciones() if como_registros else []
+    fecha_inicio = datetime.now() - timedelta(days=dias)
     
     for i in range(num_transacciones):
         producto = random.choice(productos)
         cliente = random.choice(clientes)
-        fecha = fecha_inicio + timedelta(days=random.randint(0, 90))
+        fecha = fecha_inicio + timedelta(days=random.randint(0, dias))
         cantidad = random.randint(1, 5)
         descuento = random.choice([0, 0.05, 0.10, 0.15])
         
         monto_base = producto["precio"] * cantidad
         monto_final = monto_base * (1 - descuento)
         
-        transaccion = {
-            "id": f"TXN{str(i+1).zfill(4)}",
-            "fecha": fecha.strftime("%Y-%m-%d"),
-            "hora": fecha.strftime("%H:%M:%S"),
-            "cliente": cliente,
-            "producto_id": producto["id"],
-            "producto_nombre": producto["nombre"],
-            "categoria": producto["categoria"],
-            "cantidad": cantidad,
-            "precio_unitario": producto["precio"],
-            "descuento": descuento,
-            "monto_total": round(monto_final, 2),
-            "estado": random.choices(
+        transaccion = tipo(
+            id=f"TXN{str(i+1).zfill(4)}",
+            fecha=fecha.strftime("%Y-%m-%d"),
+            hora=fecha.strftime("%H:%M:%S"),
+            cliente=cliente,
+            producto_id=producto["id"],
+            producto_nombre=producto["nombre"],
+            categoria=producto["categoria"],
+            cantidad=cantidad,
+            precio_unitario=producto["precio"],
+            descuento=descuento,
+            monto_total=round(monto_final, 2),
+            estado=random.choices(
                 ["Completado", "Pendiente", "Cancelado"],
                 weights=[0.85, 0.10, 0.05]
             )[0]
-        }
+        )
         transacciones.append(transaccion)
     
     return transacciones
 
-def generar_metricas_mensuales():
-    """Genera métricas agregadas por mes"""
+def generar_metricas_mensuales(cubo=None):
+    """Genera métricas agregadas por mes
+
+    Si se entrega el cubo de agregación de las transacciones, los ingresos
+    mensuales se toman de su nivel "mes" para que ambos conjuntos de datos
+    coincidan; solo los gastos se simulan como proporción de los ingresos.
+    Cada mes indica además si está completo (los extremos suelen ser parciales).
+    """
     meses = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", 
              "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
     
+    if cubo is not None:
+        metricas = []
+        for i, fila in enumerate(serie_mensual(cubo)):
+            revenue = fila["ingresos"]
+            expenses = revenue * random.uniform(0.65, 0.75)
+            profit = revenue - expenses
+            
+            metricas.append({
+                "mes": meses[int(fila["periodo"][5:7]) - 1],
+                "mes_num": i + 1,
+                "periodo": fila["periodo"],
+                "ingresos": round(revenue, 2),
+                "gastos": round(expenses, 2),
+                "ganancias": round(profit, 2),
+                "margen_ganancia": round((profit / revenue) * 100, 2) if revenue else 0,
+                "completo": fila["completo"]
+            })
+        return metricas
+    
     metricas = []
     base_revenue = 45000
     
@@ -98,29 +139,39 @@ def generar_metricas_mensuales():
     
     return metricas
 
-def main():
+def main(num_transacciones=100, dias=90, particionado=False):
     print("🚀 Generando datos financieros...")
     
-    # Generar datos
-    transacciones = generar_transacciones(100)
-    metricas = generar_metricas_mensuales()
+    # Generar datos (en un lote por columnas: se recorren y guardan sin diccionarios)
+    transacciones = generar_transacciones(num_transacciones, dias, como_registros=True)
     
-    # Guardar a archivos JSON
-    with open('scripts/transacciones.json', 'w', encoding='utf-8') as f:
-        json.dump(transacciones, f, ensure_ascii=False, indent=2)
+    # Cubo día → semana → mes → trimestre, calculado con una sola pasada
+    cubo = construir_cubo(transacciones)
+    metricas = generar_metricas_mensuales(cubo)
     
-    with open('scripts/metricas_mensuales.json', 'w', encoding='utf-8') as f:
-        json.dump(metricas, f, ensure_ascii=False, indent=2)
+    # Guardar en el almacén de datos configurado
+    almacen = obtener_almacen()
+    if particionado:
+        # Un conjunto por año/mes, con índice de mínimos/máximos; el archivo
+        # plano anterior se elimina para que no quede una copia desactualizada
+        indice = escribir_particiones(transacciones, almacen)
+        almacen.eliminar("transacciones")
+        print(f"🗂️  {len(indice)} particiones escritas ({indice[0]['dataset']} … {indice[-1]['dataset']})")
+    else:
+        almacen.escribir("transacciones", transacciones)
+        eliminar_particiones(almacen)
     
-    with open('scripts/productos.json', 'w', encoding='utf-8') as f:
-        json.dump(productos, f, ensure_ascii=False, indent=2)
+    almacen.escribir("metricas_mensuales", metricas)
+    almacen.escribir("productos", productos)
+    guardar_cubo(cubo)
     
     print(f"✅ Generadas {len(transacciones)} transacciones")
     print(f"✅ Generadas {len(metricas)} métricas mensuales")
     print(f"✅ Catálogo de {len(productos)} productos")
+    print(f"✅ Cubo de ventas con {len(cubo['dia'])} días y {len(cubo['mes'])} meses")
     
     # Estadísticas básicas
-    total_ventas = sum(t["monto_total"] for t in transacciones if t["estado"] == "Completado")
+    total_ventas = sum(fila["ingresos"] for fila in consultar(cubo, "mes"))
     print(f"\n📊 Total de ventas completadas: ${total_ventas:,.2f}")
     
     return {
@@ -131,4 +182,12 @@ def main():
     }
 
 if __name__ == "__main__":
-    resultado = main()
+    parser = argparse.ArgumentParser(description="Generación de datos financieros")
+    parser.add_argument("--transacciones", type=int, default=100,
+                        help="Cantidad de transacciones a generar")
+    parser.add_argument("--dias", type=int, default=90,
+                        help="Días de historia cubiertos por las transacciones")
+    parser.add_argument("--particionado", action="store_true",
+                        help="Escribe las transacciones particionadas por año/mes")
+    args = parser.parse_args()
+    resultado = main(args.transacciones, args.dias, args.particionado)
@@ -0,0 +1,123 @@
+"""
+Histogramas Precalculados de Sueldos
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este módulo agrupa los sueldos de las ofertas en tramos fijos, con un
+histograma por cada combinación sector × región × tipo de contrato. Como todos
+comparten los mismos tramos, cualquier filtro se resuelve sumando los conteos
+de los grupos que coinciden, sin volver a recorrer las ofertas.
+"""
+
+from bisect import bisect_right
+
+try:
+    from scripts.records import iterar_campos
+    from scripts.storage import obtener_almacen
+except ImportError:
+    from records import iterar_campos
+    from storage import obtener_almacen
+
+DATASET_HISTOGRAMAS = 'histogramas_sueldos'
+DIMENSIONES = ("sector", "region", "tipo_contrato")
+
+# Límites inferiores de los tramos: de $0 a $3.000.000 cada $250.000; el
+# último tramo acumula todo lo que supera el último límite
+ANCHO_TRAMO = 250000
+LIMITES_SUELDO = list(range(0, 3000000 + 1, ANCHO_TRAMO))
+
+
+def tramo_sueldo(sueldo, limites=LIMITES_SUELDO):
+    """Índice del tramo al que pertenece un sueldo"""
+    return max(0, bisect_right(limites, sueldo) - 1)
+
+
+def etiquetas_tramos(limites=LIMITES_SUELDO):
+    """Etiquetas legibles de los tramos (en miles de pesos)"""
+    etiquetas = [f"${inferior // 1000:,}k–{superior // 1000:,}k"
+                 for inferior, superior in zip(limites, limites[1:])]
+    etiquetas.append(f"${limites[-1] // 1000:,}k+")
+    return etiquetas
+
+
+def construir_histogramas(ofertas, limites=LIMITES_SUELDO, histogramas=None):
+    """Cuenta los sueldos por tramo para cada sector × región × tipo de contrato
+
+    Si se entregan `histogramas` previos (con los mismos límites) los conteos
+    se acumulan sobre ellos, lo que permite construirlos por lotes.
+    """
+    if histogramas is None:
+        histogramas = {"limites": list(limites), "grupos": []}
+    elif histogramas["limites"] != list(limites):
+        raise ValueError("Los histogramas usan tramos distintos")
+
+    grupos = {tuple(g[d] for d in DIMENSIONES): g for g in histogramas["grupos"]}
+    for fila in iterar_campos(ofertas, (*DIMENSIONES, "sueldo")):
+        clave, sueldo = fila[:-1], fila[-1]
+        grupo = grupos.get(clave)
+        if grupo is None:
+            grupo = dict(zip(DIMENSIONES, clave))
+            grupo.update({"conteos": [0] * len(limites), "suma": 0})
+            grupos[clave] = grupo
+            histogramas["grupos"].append(grupo)
+        grupo["conteos"][tramo_sueldo(sueldo, limites)] += 1
+        grupo["suma"] += sueldo
+
+    return histogramas
+
+
+def combinar_histogramas(histogramas, sector=None, region=None, tipo_contrato=None):
+    """Suma los grupos que coinciden con el filtro (None = todos los valores)
+
+    Retorna los conteos por tramo, el total de ofertas y la suma de sueldos.
+    """
+    filtro = {"sector": sector, "region": region, "tipo_contrato": tipo_contrato}
+    conteos = [0] * len(histogramas["limites"])
+    total = 0
+    suma = 0
+    for grupo in histogramas["grupos"]:
+        if any(valor is not None and grupo[d] != valor for d, valor in filtro.items()):
+            continue
+        for i, conteo in enumerate(grupo["conteos"]):
+            conteos[i] += conteo
+        total += sum(grupo["conteos"])
+        suma += grupo["suma"]
+    return {"conteos": conteos, "total": total, "suma": suma}
+
+
+def valores_dimension(histogramas, dimension):
+    """Valores distintos de una dimensión presentes en los histogramas"""
+    return sorted({grupo[dimension] for grupo in histogramas["grupos"]})
+
+
+def percentil_histograma(conteos, cuantil, limites=LIMITES_SUELDO):
+    """Aproxima un percentil interpolando linealmente dentro del tramo
+
+    En el último tramo (abierto) retorna su límite inferior.
+    """
+    total = sum(conteos)
+    if total == 0:
+        return 0
+    objetivo = cuantil * total
+    acumulado = 0
+    for i, conteo in enumerate(conteos):
+        if conteo and acumulado + conteo >= objetivo:
+            if i == len(limites) - 1:
+                return limites[i]
+            fraccion = (objetivo - acumulado) / conteo
+            return int(limites[i] + fraccion * (limites[i + 1] - limites[i]))
+        acumulado += conteo
+    return limites[-1]
+
+
+def guardar_histogramas(histogramas):
+    """Guarda los histogramas en el almacén de datos configurado"""
+    obtener_almacen().escribir(DATASET_HISTOGRAMAS, histogramas)
+
+
+def cargar_histogramas():
+    """Carga los histogramas, o retorna None si no existen"""
+    try:
+        return obtener_almacen().leer(DATASET_HISTOGRAMAS)
+    except FileNotFoundError:
+        return None
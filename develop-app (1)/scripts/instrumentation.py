@@ -0,0 +1,246 @@
+"""
+Instrumentación de Secciones del Dashboard
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este módulo mide el tiempo de cada sección del dashboard (carga de datos,
+métricas, gráficos, tabla), si la llamada fue un acierto o fallo de caché y
+cuántas filas procesó. Mantiene una ventana de muestras por sección para
+calcular percentiles y las exporta en formato de texto de Prometheus.
+
+Cada proceso (worker) escribe su propio archivo, metricas_dashboard_<pid>.prom,
+con la etiqueta worker="<pid>" en cada serie; el textfile collector de
+node_exporter une todos los archivos del directorio.
+"""
+
+import functools
+import glob
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    from scripts.storage import DIRECTORIO_DATOS
+except ImportError:
+    from storage import DIRECTORIO_DATOS
+
+VENTANA_MUESTRAS = 1000
+CUANTILES = (0.5, 0.9, 0.99)
+RUTA_PROMETHEUS = os.environ.get(
+    "DASHBOARD_METRICAS_PROM", os.path.join(DIRECTORIO_DATOS, 'metricas_dashboard.prom')
+)
+# Segundos mínimos entre escrituras del archivo de métricas de un proceso
+INTERVALO_PROMETHEUS = float(os.environ.get("DASHBOARD_METRICAS_INTERVALO", "15"))
+
+
+def ruta_worker(ruta, pid):
+    """Archivo de métricas de un proceso: <ruta sin extensión>_<pid>.prom"""
+    raiz, extension = os.path.splitext(ruta)
+    return f"{raiz}_{pid}{extension or '.prom'}"
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def eliminar_archivos_huerfanos(ruta=RUTA_PROMETHEUS):
+    """Elimina los archivos de métricas de procesos que ya terminaron"""
+    raiz, extension = os.path.splitext(ruta)
+    for archivo in glob.glob(f"{glob.escape(raiz)}_*{extension or '.prom'}"):
+        sufijo = archivo[len(raiz) + 1:len(archivo) - len(extension or '.prom')]
+        if sufijo.isdigit() and int(sufijo) != os.getpid() and not _proceso_vivo(int(sufijo)):
+            try:
+                os.remove(archivo)
+            except FileNotFoundError:
+                pass
+
+
+def percentil(valores_ordenados, cuantil):
+    """Percentil por rango más cercano sobre una lista ya ordenada
+
+    Compartido por el registro de secciones y los scripts de benchmarks.
+    """
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, min(len(valores_ordenados) - 1, int(round(cuantil * len(valores_ordenados))) - 1))
+    return valores_ordenados[indice]
+
+
+class RegistroSecciones:
+    """Acumula las mediciones de todas las sesiones del proceso
+
+    Las muestras de la ejecución en curso se guardan por hilo: Streamlit
+    ejecuta cada rerun de una sesión completo en un mismo hilo.
+    """
+
+    def __init__(self, ventana=VENTANA_MUESTRAS):
+        self.ventana = ventana
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.tiempos = {}
+        self.totales = {}
+        self._ultima_escritura = None
+
+    def iniciar_ejecucion(self):
+        """Marca el inicio de un rerun y limpia sus muestras"""
+        self._local.muestras = []
+
+    def muestras_ejecucion(self):
+        """Muestras registradas en el rerun actual de este hilo"""
+        return list(getattr(self._local, "muestras", []))
+
+    def marcar_ejecucion(self, seccion):
+        """Indica que el cuerpo de una función cacheada se ejecutó (fallo de caché)"""
+        ejecutadas = getattr(self._local, "ejecutadas", None)
+        if ejecutadas is None:
+            ejecutadas = self._local.ejecutadas = set()
+        ejecutadas.add(seccion)
+
+    def _consumir_marca(self, seccion):
+        ejecutadas = getattr(self._local, "ejecutadas", set())
+        if seccion in ejecutadas:
+            ejecutadas.discard(seccion)
+            return True
+        return False
+
+    def registrar(self, seccion, segundos, filas=0, cache=None):
+        """Registra una medición; cache es 'hit', 'miss' o None si no aplica"""
+        muestra = {"seccion": seccion, "segundos": segundos, "filas": filas, "cache": cache}
+        with self._lock:
+            if seccion not in self.tiempos:
+                self.tiempos[seccion] = deque(maxlen=self.ventana)
+                self.totales[seccion] = {"llamadas": 0, "segundos": 0.0, "filas": 0, "hit": 0, "miss": 0}
+            self.tiempos[seccion].append(segundos)
+            totales = self.totales[seccion]
+            totales["llamadas"] += 1
+            totales["segundos"] += segundos
+            totales["filas"] += filas
+            if cache is not None:
+                totales[cache] += 1
+        if hasattr(self._local, "muestras"):
+            self._local.muestras.append(muestra)
+        return muestra
+
+    def resumen(self):
+        """Percentiles de la ventana y totales acumulados por sección"""
+        with self._lock:
+            copia = {s: (sorted(t), dict(self.totales[s])) for s, t in self.tiempos.items()}
+        return {
+            seccion: {
+                **totales,
+                **{f"p{int(q * 100)}": percentil(tiempos, q) for q in CUANTILES}
+            }
+            for seccion, (tiempos, totales) in copia.items()
+        }
+
+    def exportar_prometheus(self, worker=None):
+        """Genera las métricas en formato de texto de Prometheus
+
+        Con worker, cada serie lleva la etiqueta worker="<worker>".
+        """
+        resumen = self.resumen()
+        etiqueta = f'worker="{worker}",' if worker is not None else ""
+        lineas = [
+            "# HELP dashboard_seccion_segundos Tiempo de ejecución por sección del dashboard",
+            "# TYPE dashboard_seccion_segundos summary",
+        ]
+        for seccion, datos in sorted(resumen.items()):
+            for q in CUANTILES:
+                lineas.append(f'dashboard_seccion_segundos{{{etiqueta}seccion="{seccion}",quantile="{q}"}} '
+                              f'{datos[f"p{int(q * 100)}"]:.6f}')
+            lineas.append(f'dashboard_seccion_segundos_sum{{{etiqueta}seccion="{seccion}"}} '
+                          f'{datos["segundos"]:.6f}')
+            lineas.append(f'dashboard_seccion_segundos_count{{{etiqueta}seccion="{seccion}"}} {datos["llamadas"]}')
+
+        lineas += [
+            "# HELP dashboard_cache_total Aciertos y fallos de caché por sección",
+            "# TYPE dashboard_cache_total counter",
+        ]
+        for seccion, datos in sorted(resumen.items()):
+            if datos["hit"] or datos["miss"]:
+                for resultado in ("hit", "miss"):
+                    lineas.append(f'dashboard_cache_total{{{etiqueta}seccion="{seccion}",'
+                                  f'resultado="{resultado}"}} {datos[resultado]}')
+
+        lineas += [
+            "# HELP dashboard_filas_procesadas_total Filas procesadas por sección",
+            "# TYPE dashboard_filas_procesadas_total counter",
+        ]
+        for seccion, datos in sorted(resumen.items()):
+            lineas.append(f'dashboard_filas_procesadas_total{{{etiqueta}seccion="{seccion}"}} {datos["filas"]}')
+
+        return "\n".join(lineas) + "\n"
+
+    def escribir_prometheus(self, ruta=RUTA_PROMETHEUS):
+        """Escribe el archivo de métricas de este proceso de forma atómica (para scraping)
+
+        Retorna la ruta escrita. De paso elimina los archivos de workers que
+        ya terminaron, para que sus series no queden congeladas.
+        """
+        pid = os.getpid()
+        destino = ruta_worker(ruta, pid)
+        temporal = f"{destino}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(self.exportar_prometheus(worker=pid))
+        os.replace(temporal, destino)
+        eliminar_archivos_huerfanos(ruta)
+        return destino
+
+    def escribir_prometheus_periodico(self, ruta=RUTA_PROMETHEUS, intervalo=INTERVALO_PROMETHEUS):
+        """Escribe el archivo solo si pasó el intervalo desde la última escritura
+
+        Se llama al final de cada rerun: con muchas sesiones, el archivo se
+        reescribe a lo más una vez por intervalo y no en cada interacción.
+        Retorna la ruta escrita, o None si aún no correspondía.
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            if self._ultima_escritura is not None and ahora - self._ultima_escritura < intervalo:
+                return None
+            self._ultima_escritura = ahora
+        return self.escribir_prometheus(ruta)
+
+
+registro = RegistroSecciones()
+
+
+def marcar_ejecucion(seccion):
+    """Llamar dentro del cuerpo de una función cacheada para detectar fallos de caché"""
+    registro.marcar_ejecucion(seccion)
+
+
+def medir_seccion(seccion, contar_filas=None, cacheada=False):
+    """Decorador que registra tiempo, filas y resultado de caché de una sección
+
+    contar_filas(resultado, *args, **kwargs) retorna las filas procesadas.
+    Con cacheada=True, la función decorada debe llamar a marcar_ejecucion
+    (seccion) en su cuerpo: si no lo hace durante la llamada, fue un acierto.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if cacheada:
+                registro._consumir_marca(seccion)
+            inicio = time.perf_counter()
+            resultado = funcion(*args, **kwargs)
+            segundos = time.perf_counter() - inicio
+
+            cache = None
+            if cacheada:
+                cache = "miss" if registro._consumir_marca(seccion) else "hit"
+            filas = contar_filas(resultado, *args, **kwargs) if contar_filas else 0
+            registro.registrar(seccion, segundos, filas, cache)
+            return resultado
+
+        # Conservar clear() de las funciones cacheadas de Streamlit
+        if hasattr(funcion, "clear"):
+            envoltura.clear = funcion.clear
+        return envoltura
+    return decorador
@@ -0,0 +1,311 @@
+"""
+Tablas Binarias de Ancho Fijo Mapeadas en Memoria
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este módulo guarda listas de registros planos como archivos binarios de filas
+de ancho fijo y los abre en solo lectura con mmap. Abrir una tabla no parsea
+nada: solo lee un encabezado pequeño, y cada fila se decodifica al accederla.
+Los recorridos por campo (columna, seleccionar) leen las columnas sin armar
+registros y comparan los textos codificados por su código.
+Como el mapa es de solo lectura, el sistema operativo comparte sus páginas
+entre todos los procesos que abren el mismo archivo.
+
+Formato del archivo:
+
+    MAGIA (4 bytes) | largo del encabezado (uint32) | encabezado JSON |
+    relleno hasta múltiplo de 8 | filas
+
+El encabezado describe los campos en orden, con su formato de struct:
+'q' (entero), 'd' (decimal), '?' (booleano), 'Ns' (texto UTF-8 de N bytes
+rellenado con ceros) o 'H' (código sobre la lista de valores distintos, para
+textos muy repetidos como sector, región o fecha).
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Sequence
+from itertools import compress, islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scripts.records import es_registros, iterar_campos
+except ImportError:
+    from records import es_registros, iterar_campos
+
+MAGIA = b"TBM1"
+_PREFIJO = struct.Struct("<4sI")
+ALINEACION = 8
+MAX_CODIGOS = 65535
+# Filas evaluadas de una vez por seleccionar() con NumPy
+FILAS_POR_BLOQUE = 65536
+
+
+def _formato_texto(valores):
+    """Código sobre valores distintos si se repiten; si no, texto de ancho fijo"""
+    distintos = list(dict.fromkeys(valores))
+    if len(distintos) <= min(MAX_CODIGOS, len(valores) // 2):
+        return {"formato": "H", "valores": distintos}
+    ancho = max(len(v.encode('utf-8')) for v in distintos) or 1
+    return {"formato": f"{ancho}s"}
+
+
+def describir_campos(registros):
+    """Campos y formatos para guardar los registros, o None si no son representables
+
+    Todos los registros deben tener los mismos campos, y cada campo valores de
+    un solo tipo. Un campo con enteros y decimales mezclados no es
+    representable: guardarlo como decimal cambiaría el tipo de los enteros.
+    """
+    if not registros:
+        return None
+    nombres = list(registros[0].keys())
+    tipados = es_registros(registros)
+    if not tipados and any(len(registro) != len(nombres) for registro in registros):
+        return None
+
+    campos = []
+    for nombre in nombres:
+        if tipados:
+            valores = [valor for valor, in iterar_campos(registros, (nombre,))]
+        else:
+            valores = [registro.get(nombre) for registro in registros]
+        tipos = {type(v) for v in valores}
+        if tipos == {bool}:
+            campo = {"formato": "?"}
+        elif tipos == {int}:
+            if not all(-2 ** 63 <= v < 2 ** 63 for v in valores):
+                return None
+            campo = {"formato": "q"}
+        elif tipos == {float}:
+            campo = {"formato": "d"}
+        elif tipos == {str}:
+            campo = _formato_texto(valores)
+        else:
+            return None
+        campo["nombre"] = nombre
+        campos.append(campo)
+    return campos
+
+
+def escribir_tabla(ruta, registros, campos=None):
+    """Escribe los registros como filas de ancho fijo
+
+    Se escribe en un archivo temporal que luego reemplaza al anterior: los
+    procesos que ya lo tenían mapeado siguen leyendo la versión previa (su
+    inodo sigue vivo) en vez de ver el archivo truncado.
+    """
+    campos = campos or describir_campos(registros)
+    if campos is None:
+        raise ValueError("Los registros no se pueden guardar como tabla de ancho fijo")
+
+    fila = struct.Struct("<" + "".join(c["formato"] for c in campos))
+    encabezado = json.dumps({"filas": len(registros), "campos": campos},
+                            ensure_ascii=False).encode('utf-8')
+    inicio = _PREFIJO.size + len(encabezado)
+    relleno = -inicio % ALINEACION
+
+    codificadores = []
+    for campo in campos:
+        if "valores" in campo:
+            codificadores.append({v: i for i, v in enumerate(campo["valores"])}.__getitem__)
+        elif campo["formato"].endswith("s"):
+            codificadores.append(lambda v: v.encode('utf-8'))
+        else:
+            codificadores.append(None)
+    nombres = [c["nombre"] for c in campos]
+
+    temporal = f"{ruta}.tmp{os.getpid()}"
+    with open(temporal, 'wb') as f:
+        f.write(_PREFIJO.pack(MAGIA, len(encabezado)))
+        f.write(encabezado)
+        f.write(b"\0" * relleno)
+        for valores in iterar_campos(registros, nombres):
+            f.write(fila.pack(*(codificar(valor) if codificar else valor
+                                for valor, codificar in zip(valores, codificadores))))
+    os.replace(temporal, ruta)
+
+
+class TablaMapeada(Sequence):
+    """Vista de solo lectura sobre una tabla binaria mapeada en memoria
+
+    Se usa como una lista de diccionarios (len, índices, iteración), pero los
+    registros solo existen mientras se usan: la tabla en sí no ocupa memoria
+    propia del proceso más allá del encabezado.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magia, largo = _PREFIJO.unpack_from(self._mapa, 0)
+        if magia != MAGIA:
+            raise ValueError(f"{ruta} no es una tabla binaria mapeable")
+        encabezado = json.loads(self._mapa[_PREFIJO.size:_PREFIJO.size + largo])
+        self.campos = encabezado["campos"]
+        self.filas = encabezado["filas"]
+        self.nombres = tuple(c["nombre"] for c in self.campos)
+        self._fila = struct.Struct("<" + "".join(c["formato"] for c in self.campos))
+        self._inicio = _PREFIJO.size + largo
+        self._inicio += -self._inicio % ALINEACION
+        # Desplazamiento de cada campo dentro de la fila (sin relleno, formato "<")
+        self._desplazamientos = [struct.calcsize("<" + "".join(c["formato"] for c in self.campos[:i]))
+                                 for i in range(len(self.campos))]
+        # Campo → valores almacenados (códigos, números o bytes), leídos una vez
+        self._crudos = {}
+
+        # Constructor de registros generado para este esquema (como en records.py):
+        # decodifica los textos y arma el diccionario en una sola expresión
+        espacio = {"_texto": _decodificar_texto}
+        partes = []
+        for i, campo in enumerate(self.campos):
+            if "valores" in campo:
+                espacio[f"_valores{i}"] = campo["valores"]
+                partes.append(f"{campo['nombre']!r}: _valores{i}[v[{i}]]")
+            elif campo["formato"].endswith("s"):
+                partes.append(f"{campo['nombre']!r}: _texto(v[{i}])")
+            else:
+                partes.append(f"{campo['nombre']!r}: v[{i}]")
+        exec(f"def _registro(v):\n    return {{{', '.join(partes)}}}", espacio)
+        self._registro = espacio["_registro"]
+
+    def __len__(self):
+        return self.filas
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.filas))]
+        if i < 0:
+            i += self.filas
+        if not 0 <= i < self.filas:
+            raise IndexError("índice fuera de la tabla")
+        return self._registro(self._fila.unpack_from(self._mapa, self._inicio + i * self._fila.size))
+
+    def __iter__(self):
+        fin = self._inicio + self.filas * self._fila.size
+        return map(self._registro, self._fila.iter_unpack(memoryview(self._mapa)[self._inicio:fin]))
+
+    def _campo(self, nombre):
+        try:
+            posicion = self.nombres.index(nombre)
+        except ValueError:
+            raise KeyError(nombre) from None
+        return posicion, self.campos[posicion]
+
+    def _valores_crudos(self, nombre):
+        """Valores almacenados de un campo, sin decodificar (códigos en los campos codificados)
+
+        Con NumPy es una vista de solo lectura sobre el mapa (sin copiar); sin
+        NumPy, un array de la biblioteca estándar o una lista de bytes. Los
+        arreglos se guardan para las consultas siguientes: una vista no ocupa
+        memoria y un array de códigos ocupa dos bytes por fila.
+        """
+        crudos = self._crudos.get(nombre)
+        if crudos is not None:
+            return crudos
+        posicion, campo = self._campo(nombre)
+        formato = campo["formato"]
+        if np is not None:
+            # NumPy llama "S" a los bytes de ancho fijo que struct llama "s"
+            tipo = np.dtype(f"S{formato[:-1]}" if formato.endswith("s") else "<" + formato)
+            crudos = np.ndarray(shape=(self.filas,), dtype=tipo, buffer=self._mapa,
+                                offset=self._inicio + self._desplazamientos[posicion],
+                                strides=(self._fila.size,))
+        else:
+            fin = self._inicio + self.filas * self._fila.size
+            crudos = [fila[posicion] for fila in self._fila.iter_unpack(memoryview(self._mapa)[self._inicio:fin])]
+            if formato in ("q", "d", "H"):
+                crudos = array(formato, crudos)
+            else:
+                # Textos sin codificar y booleanos: una lista de objetos, no se guarda
+                return crudos
+        self._crudos[nombre] = crudos
+        return crudos
+
+    def columna(self, nombre):
+        """Valores de un campo sin construir registros
+
+        Con NumPy, un campo numérico es una vista de solo lectura sobre el mapa
+        (sin copiar); sin NumPy, un array de la biblioteca estándar. Los textos
+        se entregan decodificados en una lista.
+        """
+        _, campo = self._campo(nombre)
+        crudos = self._valores_crudos(nombre)
+        if campo["formato"] in ("q", "d", "?"):
+            return crudos
+        if np is not None:
+            crudos = crudos.tolist()
+        if "valores" in campo:
+            return list(map(campo["valores"].__getitem__, crudos))
+        return [_decodificar_texto(v) for v in crudos]
+
+    def iterar_columna(self, nombre):
+        """Itera los valores de un campo como objetos de Python (para records.iterar_campos)"""
+        valores = self.columna(nombre)
+        return iter(valores if isinstance(valores, list) else valores.tolist())
+
+    def seleccionar(self, condiciones, limite=None):
+        """Registros cuyos campos cumplen las condiciones, en el orden de la tabla
+
+        `condiciones` asocia un campo a una función que recibe su valor. En los
+        campos codificados la condición se evalúa una vez por valor distinto y
+        las filas se comparan por código; solo se decodifican las filas
+        seleccionadas (a lo más `limite`).
+        """
+        if not condiciones:
+            return list(islice(self, limite))
+        pruebas = []
+        for nombre, condicion in condiciones.items():
+            _, campo = self._campo(nombre)
+            if "valores" in campo:
+                aceptados = [codigo for codigo, valor in enumerate(campo["valores"]) if condicion(valor)]
+                pruebas.append((self._valores_crudos(nombre), aceptados, None))
+            else:
+                pruebas.append((self.columna(nombre), None, condicion))
+
+        if np is not None:
+            # Por bloques, para detenerse apenas se completa el límite
+            posiciones = []
+            for inicio in range(0, self.filas, FILAS_POR_BLOQUE):
+                fin = min(inicio + FILAS_POR_BLOQUE, self.filas)
+                mascara = np.ones(fin - inicio, dtype=bool)
+                for valores, aceptados, condicion in pruebas:
+                    if aceptados is not None:
+                        mascara &= np.isin(valores[inicio:fin], aceptados)
+                    else:
+                        mascara &= np.fromiter(map(condicion, valores[inicio:fin]), dtype=bool,
+                                               count=fin - inicio)
+                posiciones.extend((np.flatnonzero(mascara) + inicio).tolist())
+                if limite is not None and len(posiciones) >= limite:
+                    break
+            posiciones = posiciones[:limite]
+        else:
+            # Iteradores perezosos: cada condición se evalúa solo hasta completar el límite
+            mascaras = [map(frozenset(aceptados).__contains__ if aceptados is not None else condicion, valores)
+                        for valores, aceptados, condicion in pruebas]
+            posiciones = list(islice(compress(range(self.filas), map(all, zip(*mascaras))), limite))
+        return [self[i] for i in posiciones]
+
+    def valores_distintos(self, nombre):
+        """Valores distintos de un campo (inmediato para campos codificados)"""
+        _, campo = self._campo(nombre)
+        if "valores" in campo:
+            return sorted(campo["valores"])
+        return sorted(set(self.columna(nombre)))
+
+
+def _decodificar_texto(valor):
+    return valor.rstrip(b"\0").decode('utf-8')
+
+
+def abrir_tabla(ruta):
+    """Abre una tabla binaria en solo lectura"""
+    return TablaMapeada(ruta)
@@ -0,0 +1,129 @@
+"""
+Almacenamiento Particionado de Transacciones
+Autor: Sistema de Análisis Financiero
+Fecha: 2024-01-15
+
+Este módulo guarda las transacciones particionadas por año/mes, con un índice
+de estadísticas (mínimos y máximos) por partición. Las consultas por rango de
+fechas leen solo las particiones que se traslapan con el rango pedido.
+
+Cada partición es un conjunto de datos del almacén configurado
+(transacciones_AAAA_MM), igual que el índice (transacciones_particiones), así
+que las particiones usan el mismo backend que el resto de los datos.
+"""
+
+try:
+    from scripts.records import iterar_campos
+    from scripts.storage import obtener_almacen
+except ImportError:
+    from records import iterar_campos
+    from storage import obtener_almacen
+
+DATASET_INDICE = 'transacciones_particiones'
+
+
+def _dataset_particion(clave):
+    """Conjunto de datos de la partición de un año/mes (AAAA-MM)"""
+    return f"transacciones_{clave.replace('-', '_')}"
+
+
+def escribir_particiones(transacciones, almacen=None):
+    """Escribe las transacciones particionadas por año/mes y su índice
+
+    Reemplaza cualquier partición previa. El índice registra para cada
+    partición la cantidad de registros y los mínimos/máximos de fecha, id y
+    monto.
+    """
+    almacen = almacen or obtener_almacen()
+    grupos = {}
+    for t in transacciones:
+        grupos.setdefault(t["fecha"][:7], []).append(t)
+
+    anteriores = cargar_indice(almacen) or []
+
+    indice = []
+    for clave in sorted(grupos):
+        registros = grupos[clave]
+        dataset = _dataset_particion(clave)
+        almacen.escribir(dataset, registros)
+
+        ids, fechas, montos = zip(*iterar_campos(registros, ("id", "fecha", "monto_total")))
+        numeros = [int(id_transaccion[3:]) for id_transaccion in ids]
+        indice.append({
+            "particion": clave,
+            "dataset": dataset,
+            "registros": len(registros),
+            "fecha_min": min(fechas),
+            "fecha_max": max(fechas),
+            "id_min": min(numeros),
+            "id_max": max(numeros),
+            "monto_min": min(montos),
+            "monto_max": max(montos)
+        })
+
+    # El índice se escribe al final: su versión es la del conjunto completo
+    almacen.escribir(DATASET_INDICE, indice)
+
+    vigentes = {p["dataset"] for p in indice}
+    for particion in anteriores:
+        if particion["dataset"] not in vigentes:
+            almacen.eliminar(particion["dataset"])
+
+    return indice
+
+
+def eliminar_particiones(almacen=None):
+    """Elimina todas las particiones y su índice"""
+    almacen = almacen or obtener_almacen()
+    for particion in cargar_indice(almacen) or []:
+        almacen.eliminar(particion["dataset"])
+    almacen.eliminar(DATASET_INDICE)
+
+
+def cargar_indice(almacen=None):
+    """Carga el índice de particiones, o retorna None si no existe"""
+    almacen = almacen or obtener_almacen()
+    if not almacen.existe(DATASET_INDICE):
+        return None
+    return almacen.leer(DATASET_INDICE)
+
+
+def version_particiones(almacen=None):
+    """Versión del índice de particiones (la de su última escritura), o None"""
+    almacen = almacen or obtener_almacen()
+    return almacen.version(DATASET_INDICE)
+
+
+def seleccionar_particiones(indice, desde=None, hasta=None):
+    """Retorna las particiones cuyo rango de fechas se traslapa con [desde, hasta]
+
+    Las fechas son texto AAAA-MM-DD, por lo que se comparan directamente.
+    """
+    return [
+        p for p in indice
+        if (desde is None or p["fecha_max"] >= desde)
+        and (hasta is None or p["fecha_min"] <= hasta)
+    ]
+
+
+def iterar_particiones(particiones, almacen=None, desde=None, hasta=None):
+    """Itera las transacciones de las particiones indicadas dentro del rango"""
+    almacen = almacen or obtener_almacen()
+    for particion in particiones:
+        # Si la partición cae completa dentro del rango no hace falta filtrar
+        completa = ((desde is None or particion["fecha_min"] >= desde)
+                    and (hasta is None or particion["fecha_max"] <= hasta))
+        for t in almacen.iterar(particion["dataset"]):
+            if completa or ((desde is None or t["fecha"] >= desde)
+                            and (hasta is None or t["fecha"] <= hasta)):
+                yield t
+
+
+def iterar_transacciones(almacen=None, desde=None, hasta=None):
+    """Itera las transacciones del rango [desde, hasta] leyendo solo las particiones necesarias"""
+    almacen = almacen or obtener_almacen()
+    indice = cargar_indice(almacen)
+    if indice is None:
+        return
+    particiones = seleccionar_particiones(indice, desde, hasta)
+    yield from iterar_particiones(particiones, almacen, desde, hasta)
@@ -0,0 +1,243 @@
+"""
+Registros Tipados y Lotes Compactos
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este módulo define clases de registro con __slots__ para ofertas,
+estadísticas mensuales, sectores y transacciones, y lotes de ofertas y de
+transacciones guardados por columnas en arreglos. Un registro ocupa varias veces menos
+memoria que el diccionario equivalente y se lee como uno (registro["campo"]),
+por lo que los analizadores existentes los aceptan sin cambios.
+
+Los bucles intensivos recorren los datos con iterar_campos, que lee las
+columnas de un lote sin construir registros, los registros por atributo y los
+diccionarios por clave.
+"""
+
+from array import array
+from itertools import chain, starmap
+from operator import attrgetter, itemgetter
+
+
+class Registro:
+    """Base de los registros: campos fijos en __slots__ y acceso tipo diccionario"""
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        """Genera un __init__ con los campos explícitos (como namedtuple), mucho más
+        rápido que asignar en un bucle con setattr"""
+        super().__init_subclass__(**kwargs)
+        parametros = ", ".join(cls.__slots__)
+        cuerpo = "".join(f"\n    self.{campo} = {campo}" for campo in cls.__slots__)
+        espacio = {}
+        exec(f"def __init__(self, {parametros}):{cuerpo}", espacio)
+        cls.__init__ = espacio["__init__"]
+
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo) from None
+
+    def get(self, campo, defecto=None):
+        return getattr(self, campo, defecto) if campo in self.__slots__ else defecto
+
+    def __contains__(self, campo):
+        return campo in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return [getattr(self, campo) for campo in self.__slots__]
+
+    def items(self):
+        return [(campo, getattr(self, campo)) for campo in self.__slots__]
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, otro):
+        if isinstance(otro, Registro):
+            return type(self) is type(otro) and self.values() == otro.values()
+        if isinstance(otro, dict):
+            return self.a_dict() == otro
+        return NotImplemented
+
+    def __repr__(self):
+        campos = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in self.__slots__)
+        return f"{type(self).__name__}({campos})"
+
+    def a_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(*(datos[campo] for campo in cls.__slots__))
+
+
+class Oferta(Registro):
+    __slots__ = ("id", "fecha", "empresa", "cargo", "sector", "sueldo", "region",
+                 "tipo_contrato", "jornada", "estado")
+
+
+class EstadisticaMensual(Registro):
+    __slots__ = ("mes", "mes_num", "tasa_desempleo", "empleos_creados", "sueldo_promedio",
+                 "tasa_participacion", "trabajadores_activos")
+
+
+class Sector(Registro):
+    __slots__ = ("sector", "empleos_totales", "sueldo_promedio", "crecimiento_anual",
+                 "ofertas_activas", "tasa_rotacion")
+
+
+class Transaccion(Registro):
+    __slots__ = ("id", "fecha", "hora", "cliente", "producto_id", "producto_nombre", "categoria",
+                 "cantidad", "precio_unitario", "descuento", "monto_total", "estado")
+
+
+class _Diccionario:
+    """Columna de texto codificada: cada valor distinto se guarda una sola vez"""
+
+    __slots__ = ("valores", "codigos", "posiciones")
+
+    def __init__(self, tipo='I'):
+        self.valores = []
+        self.codigos = {}
+        self.posiciones = array(tipo)
+
+    def append(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = self.codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        self.posiciones.append(codigo)
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def __getitem__(self, i):
+        return self.valores[self.posiciones[i]]
+
+    def __iter__(self):
+        return map(self.valores.__getitem__, self.posiciones)
+
+
+class LoteRegistros:
+    """Registros guardados por columnas en arreglos
+
+    Los números van en array (4 u 8 bytes por valor) y los textos como
+    códigos sobre un diccionario de valores distintos, de modo que un texto
+    repetido en millones de filas se guarda una sola vez. El id (PREFIJO +
+    número) se guarda como su número. Al iterar o indexar se obtienen objetos
+    REGISTRO, así que el lote se usa como una lista de registros.
+
+    Las subclases definen REGISTRO, PREFIJO_ID y el tipo de array de cada
+    columna numérica; el resto de los campos se codifican como texto.
+    """
+
+    REGISTRO = None
+    PREFIJO_ID = ""
+    COLUMNAS_NUMERICAS = {}
+
+    def __init__(self, registros=()):
+        self.numeros_id = array('Q')
+        self.columnas = {}
+        for campo in self.REGISTRO.__slots__:
+            if campo == "id":
+                continue
+            tipo = self.COLUMNAS_NUMERICAS.get(campo)
+            self.columnas[campo] = array(tipo) if tipo else _Diccionario()
+        self._formato_id = self.PREFIJO_ID + "{:04d}"
+        self.extend(registros)
+
+    def append(self, registro):
+        self.numeros_id.append(int(registro["id"][len(self.PREFIJO_ID):]))
+        for campo, columna in self.columnas.items():
+            columna.append(registro[campo])
+
+    def extend(self, registros):
+        for registro in registros:
+            self.append(registro)
+
+    def __len__(self):
+        return len(self.numeros_id)
+
+    def iterar_columna(self, campo):
+        """Itera los valores de una columna sin construir registros"""
+        if campo == "id":
+            return map(self._formato_id.format, self.numeros_id)
+        return iter(self.columnas[campo])
+
+    def _columnas_en_orden(self):
+        """Iteradores de todas las columnas en el orden de los campos del registro"""
+        return [self.iterar_columna(campo) for campo in self.REGISTRO.__slots__]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return type(self)(self[j] for j in range(*i.indices(len(self))))
+        if i < 0:
+            i += len(self)
+        return self.REGISTRO(*(self._formato_id.format(self.numeros_id[i]) if campo == "id"
+                               else self.columnas[campo][i]
+                               for campo in self.REGISTRO.__slots__))
+
+    def __iter__(self):
+        return starmap(self.REGISTRO, zip(*self._columnas_en_orden()))
+
+    def columna(self, campo):
+        """Valores de una columna sin construir registros (para recorridos rápidos)"""
+        if campo == "id":
+            return list(map(self._formato_id.format, self.numeros_id))
+        columna = self.columnas[campo]
+        return columna if isinstance(columna, array) else list(columna)
+
+    def a_dicts(self):
+        campos = self.REGISTRO.__slots__
+        return [dict(zip(campos, fila)) for fila in zip(*self._columnas_en_orden())]
+
+
+class LoteTransacciones(LoteRegistros):
+    REGISTRO = Transaccion
+    PREFIJO_ID = "TXN"
+    COLUMNAS_NUMERICAS = {"producto_id": 'I', "cantidad": 'I', "precio_unitario": 'I',
+                          "descuento": 'd', "monto_total": 'd'}
+
+
+class LoteOfertas(LoteRegistros):
+    REGISTRO = Oferta
+    PREFIJO_ID = "EMP"
+    COLUMNAS_NUMERICAS = {"sueldo": 'Q'}
+
+
+def es_registros(datos):
+    """Indica si los datos son un lote o una lista no vacía de registros tipados"""
+    if isinstance(datos, LoteRegistros):
+        return True
+    return isinstance(datos, list) and bool(datos) and isinstance(datos[0], Registro)
+
+
+def iterar_campos(datos, campos):
+    """Itera, por cada registro, la tupla de valores de los campos pedidos
+
+    Es el recorrido de los bucles intensivos: en un lote (o en cualquier
+    contenedor por columnas con iterar_columna, como las tablas mapeadas) se
+    leen sus columnas directamente, sin construir registros; en registros
+    tipados se accede por atributo y en diccionarios por clave, con un solo
+    acceso por fila.
+    """
+    iterar_columna = getattr(datos, "iterar_columna", None)
+    if iterar_columna is not None:
+        return zip(*(iterar_columna(campo) for campo in campos))
+    iterador = iter(datos)
+    primero = next(iterador, None)
+    if primero is None:
+        return iter(())
+    lector = (attrgetter if isinstance(primero, Registro) else itemgetter)(*campos)
+    filas = map(lector, chain((primero,), iterador))
+    # Con un solo campo los lectores retornan el valor: se envuelve en una tupla
+    return filas if len(campos) > 1 else zip(filas)
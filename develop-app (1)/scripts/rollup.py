@@ -0,0 +1,153 @@
+"""
+Cubo de Agregación Jerárquica de Ventas
+Autor: Sistema de Análisis Financiero
+Fecha: 2024-01-15
+
+Este módulo agrega las transacciones completadas en sumas parciales por día
+(total y por categoría) recorriéndolas una sola vez. Los niveles semana, mes y
+trimestre se derivan de las sumas diarias sin volver a leer las transacciones.
+"""
+
+import calendar
+from datetime import date
+
+try:
+    from scripts.records import iterar_campos
+    from scripts.storage import obtener_almacen
+except ImportError:
+    from records import iterar_campos
+    from storage import obtener_almacen
+
+DATASET_ROLLUP = 'rollup_ventas'
+NIVELES = ("dia", "semana", "mes", "trimestre")
+
+
+def _celda_vacia():
+    return {"ingresos": 0.0, "unidades": 0, "transacciones": 0}
+
+
+def _sumar_celda(destino, origen):
+    destino["ingresos"] += origen["ingresos"]
+    destino["unidades"] += origen["unidades"]
+    destino["transacciones"] += origen["transacciones"]
+
+
+def clave_periodo(fecha, nivel):
+    """Convierte una fecha AAAA-MM-DD en la clave del periodo del nivel pedido"""
+    if nivel == "dia":
+        return fecha
+    if nivel == "mes":
+        return fecha[:7]
+    if nivel == "trimestre":
+        return f"{fecha[:4]}-T{(int(fecha[5:7]) - 1) // 3 + 1}"
+    if nivel == "semana":
+        anio, semana, _ = date.fromisoformat(fecha).isocalendar()
+        return f"{anio}-S{semana:02d}"
+    raise ValueError(f"Nivel desconocido: {nivel}")
+
+
+def agregar_por_dia(transacciones, dias=None):
+    """Suma las transacciones completadas por día, en total y por categoría
+
+    Si se entrega `dias` (un nivel diario previo) las sumas se acumulan sobre
+    él, lo que permite construir el cubo por lotes.
+    """
+    if dias is None:
+        dias = {}
+    campos = ("estado", "fecha", "categoria", "monto_total", "cantidad")
+    for estado, fecha, nombre_categoria, monto, cantidad in iterar_campos(transacciones, campos):
+        if estado != "Completado":
+            continue
+        dia = dias.get(fecha)
+        if dia is None:
+            dia = dias[fecha] = {"total": _celda_vacia(), "por_categoria": {}}
+        categoria = dia["por_categoria"].get(nombre_categoria)
+        if categoria is None:
+            categoria = dia["por_categoria"][nombre_categoria] = _celda_vacia()
+        for celda in (dia["total"], categoria):
+            celda["ingresos"] += monto
+            celda["unidades"] += cantidad
+            celda["transacciones"] += 1
+    return dias
+
+
+def derivar_nivel(dias, nivel):
+    """Agrega las sumas diarias en periodos del nivel indicado"""
+    periodos = {}
+    for fecha, dia in dias.items():
+        clave = clave_periodo(fecha, nivel)
+        periodo = periodos.get(clave)
+        if periodo is None:
+            periodo = periodos[clave] = {"total": _celda_vacia(), "por_categoria": {}}
+        _sumar_celda(periodo["total"], dia["total"])
+        for categoria, celda in dia["por_categoria"].items():
+            _sumar_celda(periodo["por_categoria"].setdefault(categoria, _celda_vacia()), celda)
+    return periodos
+
+
+def construir_cubo(transacciones):
+    """Construye todos los niveles del cubo con una sola pasada sobre las transacciones"""
+    dias = agregar_por_dia(transacciones)
+    return cubo_desde_dias(dias)
+
+
+def cubo_desde_dias(dias):
+    """Deriva los niveles superiores a partir de un nivel diario ya calculado"""
+    cubo = {"dia": dias}
+    for nivel in NIVELES[1:]:
+        cubo[nivel] = derivar_nivel(dias, nivel)
+    return cubo
+
+
+def consultar(cubo, nivel="mes", categoria=None):
+    """Retorna la serie ordenada de un nivel, total o de una categoría"""
+    serie = []
+    for clave in sorted(cubo[nivel]):
+        periodo = cubo[nivel][clave]
+        celda = periodo["total"] if categoria is None else periodo["por_categoria"].get(categoria)
+        if celda is None:
+            continue
+        serie.append({
+            "periodo": clave,
+            "ingresos": round(celda["ingresos"], 2),
+            "unidades": celda["unidades"],
+            "transacciones": celda["transacciones"]
+        })
+    return serie
+
+
+def meses_completos(cubo):
+    """Meses cubiertos de principio a fin por el rango de días del cubo
+
+    El primer y el último mes de los datos suelen ser parciales (los datos
+    empiezan y terminan a mitad de mes), así que no son comparables con el resto.
+    """
+    if not cubo["dia"]:
+        return set()
+    primer_dia, ultimo_dia = min(cubo["dia"]), max(cubo["dia"])
+    completos = set()
+    for mes in cubo["mes"]:
+        anio, numero = int(mes[:4]), int(mes[5:7])
+        fin = f"{mes}-{calendar.monthrange(anio, numero)[1]:02d}"
+        if f"{mes}-01" >= primer_dia and fin <= ultimo_dia:
+            completos.add(mes)
+    return completos
+
+
+def serie_mensual(cubo):
+    """Serie del nivel mes, indicando en cada fila si el mes está completo"""
+    completos = meses_completos(cubo)
+    return [{**fila, "completo": fila["periodo"] in completos} for fila in consultar(cubo, "mes")]
+
+
+def guardar_cubo(cubo):
+    """Guarda el cubo en el almacén de datos"""
+    obtener_almacen().escribir(DATASET_ROLLUP, cubo)
+
+
+def cargar_cubo():
+    """Carga el cubo, o retorna None si no existe"""
+    try:
+        return obtener_almacen().leer(DATASET_ROLLUP)
+    except FileNotFoundError:
+        return None
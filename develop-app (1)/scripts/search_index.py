@@ -0,0 +1,350 @@
+"""
+Índice de Búsqueda de Ofertas por Trigramas
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este módulo construye un índice invertido de trigramas sobre el cargo, la
+empresa y el sector de las ofertas, sin distinguir mayúsculas ni tildes
+("Educación" = "educacion"). Las ofertas se agrupan por su combinación de
+textos; el índice apunta a los textos distintos y cada texto a las
+combinaciones que lo usan en cada campo.
+
+Una búsqueda no puntúa ni ordena todas las coincidencias: recorre los
+niveles de relevancia de mayor a menor (cargo que empieza con el término,
+cargo con una palabra que empieza con él, empresa que empieza con él, ...)
+y entrega las combinaciones a medida que las encuentra, así que la primera
+página se obtiene sin recorrer el resto. Con varios términos se recorren los
+niveles del término con menos combinaciones y una combinación se entrega
+cuando ninguna de las no vistas puede superar su puntaje. Los términos de menos de 3 letras
+no tienen trigramas: solo restringen los resultados de los demás, y una
+consulta sin términos de 3 letras o más no entrega resultados.
+
+Con datos reales casi cada oferta es una combinación distinta, así que el
+índice no depende de que se repitan: las combinaciones y sus ofertas se
+guardan en arreglos de enteros (sin objetos por combinación), y los
+trigramas de cada texto distinto se calculan una sola vez.
+"""
+
+import heapq
+import unicodedata
+from array import array
+
+try:
+    from scripts.records import iterar_campos
+except ImportError:
+    from records import iterar_campos
+
+CAMPOS_BUSQUEDA = ("cargo", "empresa", "sector")
+# Peso de cada campo al puntuar una coincidencia
+PESOS_CAMPOS = {"cargo": 3, "empresa": 2, "sector": 1}
+# Términos más cortos no tienen trigramas: no se buscan, solo restringen
+LARGO_MINIMO_TERMINO = 3
+# Textos del posting más escaso con que se estima cuántas combinaciones tiene un término
+MUESTRA_ESTIMACION = 256
+# Hasta dónde contar las ofertas que coinciden para mostrar el total
+LIMITE_CONTEO = 500
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin tildes ni diacríticos"""
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def trigramas(texto):
+    """Conjunto de trigramas de un texto ya normalizado"""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def consulta_buscable(consulta):
+    """True si la consulta tiene algún término de al menos LARGO_MINIMO_TERMINO letras"""
+    return any(len(termino) >= LARGO_MINIMO_TERMINO for termino in normalizar_texto(consulta).split())
+
+
+def _puntaje_termino(campo, termino):
+    """3 si el campo empieza con el término, 2 si alguna palabra, 1 si lo contiene"""
+    if termino not in campo:
+        return 0
+    if campo.startswith(termino):
+        return 3
+    if f" {termino}" in campo or f"/{termino}" in campo:
+        return 2
+    return 1
+
+
+def _agrupar(grupos, num_grupos):
+    """Ordenamiento por conteo: (inicio, orden) en formato CSR
+
+    Los índices i con grupos[i] == g quedan en orden[inicio[g]:inicio[g + 1]].
+    """
+    inicio = array('I', bytes(4 * (num_grupos + 1)))
+    for grupo in grupos:
+        inicio[grupo + 1] += 1
+    for g in range(num_grupos):
+        inicio[g + 1] += inicio[g]
+    siguiente = array('I', inicio[:-1])
+    orden = array('I', bytes(4 * len(grupos)))
+    for i, grupo in enumerate(grupos):
+        orden[siguiente[grupo]] = i
+        siguiente[grupo] += 1
+    return inicio, orden
+
+
+class SecuenciaPerezosa:
+    """Resultados de un generador que se calculan a medida que se recorren
+
+    Se puede recorrer varias veces (por ejemplo, la página y el conteo): lo
+    ya calculado se reutiliza y solo se avanza el generador para lo nuevo.
+    """
+
+    def __init__(self, generador):
+        self._generador = generador
+        self._calculados = []
+
+    def __iter__(self):
+        calculados = self._calculados
+        i = 0
+        while True:
+            while i < len(calculados):
+                yield calculados[i]
+                i += 1
+            siguiente = next(self._generador, None)
+            if siguiente is None:
+                return
+            calculados.append(siguiente)
+
+
+class IndiceBusqueda:
+    """Índice invertido de trigramas sobre las ofertas
+
+    - textos: textos normalizados distintos de todos los campos
+    - combinacion_textos: por campo, el texto de cada combinación (posición en textos)
+    - inicio_ofertas / ofertas_ordenadas: ofertas de cada combinación en
+      formato CSR (las de la combinación c están entre inicio_ofertas[c] e
+      inicio_ofertas[c + 1])
+    - combinaciones_por_texto: por campo, (inicio, combinaciones) en formato
+      CSR con las combinaciones que usan cada texto en ese campo
+    - postings: trigrama → textos que lo contienen, en orden creciente
+    - prefijos / palabras: trigrama → textos que empiezan con él / que tienen
+      una palabra (después de un espacio o "/") que empieza con él
+    """
+
+    def __init__(self, ofertas, campos=CAMPOS_BUSQUEDA):
+        self.ofertas = ofertas
+        self.campos = campos
+        self.textos = []
+        self.combinacion_textos = [array('I') for _ in campos]
+        self.postings = {}
+        self.prefijos = {}
+        self.palabras = {}
+
+        codigos = {}
+        posiciones = {}
+        combinacion_de_oferta = array('I')
+        # Por columnas: en una tabla mapeada no se decodifican las ofertas completas
+        for clave in iterar_campos(ofertas, campos):
+            posicion = posiciones.get(clave)
+            if posicion is None:
+                posicion = posiciones[clave] = len(posiciones)
+                for columna, valor in zip(self.combinacion_textos, clave):
+                    codigo = codigos.get(valor)
+                    if codigo is None:
+                        codigo = codigos[valor] = len(self.textos)
+                        self._indexar_texto(codigo, normalizar_texto(valor))
+                    columna.append(codigo)
+            combinacion_de_oferta.append(posicion)
+
+        self.num_combinaciones = len(posiciones)
+        self.inicio_ofertas, self.ofertas_ordenadas = _agrupar(combinacion_de_oferta, self.num_combinaciones)
+        self.combinaciones_por_texto = [_agrupar(columna, len(self.textos))
+                                        for columna in self.combinacion_textos]
+        self._pesos = [PESOS_CAMPOS.get(campo, 1) for campo in campos]
+        # Niveles de relevancia (campo, puntaje del término) de mayor a menor peso
+        self._niveles = sorted(((peso * puntaje, i, puntaje)
+                                for i, peso in enumerate(self._pesos) for puntaje in (3, 2, 1)),
+                               key=lambda nivel: (-nivel[0], nivel[1]))
+
+    def _indexar_texto(self, codigo, texto):
+        self.textos.append(texto)
+        # Los términos buscados no tienen espacios: esos trigramas no se consultan
+        for trigrama in trigramas(texto):
+            if " " not in trigrama:
+                self.postings.setdefault(trigrama, array('I')).append(codigo)
+        if len(texto) >= 3:
+            self.prefijos.setdefault(texto[:3], array('I')).append(codigo)
+        inicios_palabra = set()
+        for separador in (" ", "/"):
+            i = texto.find(separador)
+            while i >= 0:
+                trigrama = texto[i + 1:i + 4]
+                if len(trigrama) == 3 and " " not in trigrama:
+                    inicios_palabra.add(trigrama)
+                i = texto.find(separador, i + 1)
+        for trigrama in inicios_palabra:
+            self.palabras.setdefault(trigrama, array('I')).append(codigo)
+
+    def __len__(self):
+        return len(self.ofertas)
+
+    def combinacion(self, posicion):
+        """Textos normalizados (uno por campo) de una combinación"""
+        return tuple(self.textos[columna[posicion]] for columna in self.combinacion_textos)
+
+    def _textos_con_puntaje(self, termino, puntaje):
+        """Itera los textos donde el término obtiene exactamente ese puntaje
+
+        Los candidatos salen del trigrama inicial del término (puntajes 3 y 2)
+        o del trigrama con menos textos (puntaje 1) y se verifican uno a uno.
+        """
+        if puntaje == 3:
+            candidatos = self.prefijos.get(termino[:3], ())
+        elif puntaje == 2:
+            candidatos = self.palabras.get(termino[:3], ())
+        else:
+            postings = [self.postings.get(trigrama, ()) for trigrama in trigramas(termino)]
+            candidatos = min(postings, key=len)
+        textos = self.textos
+        for codigo in candidatos:
+            if _puntaje_termino(textos[codigo], termino) == puntaje:
+                yield codigo
+
+    def _estimar_combinaciones(self, termino):
+        """Combinaciones que usan los textos del trigrama más escaso del término
+
+        Se estima con una muestra del posting: un texto puede estar en muchas
+        combinaciones (una empresa) o en una sola (un cargo único).
+        """
+        candidatos = min((self.postings.get(trigrama, ()) for trigrama in trigramas(termino)), key=len)
+        muestra = candidatos[:MUESTRA_ESTIMACION]
+        if not muestra:
+            return 0
+        combinaciones = sum(inicio[codigo + 1] - inicio[codigo]
+                            for inicio, _ in self.combinaciones_por_texto for codigo in muestra)
+        return combinaciones * len(candidatos) / len(muestra)
+
+    def _por_niveles(self, termino):
+        """Itera (puntaje ponderado, combinación) del término, de mayor a menor puntaje
+
+        Cada combinación aparece una vez, en el mejor nivel en que coincide.
+        """
+        fuentes = {puntaje: SecuenciaPerezosa(self._textos_con_puntaje(termino, puntaje))
+                   for puntaje in (3, 2, 1)}
+        vistas = set()
+        for nivel, i, puntaje in self._niveles:
+            inicio, combinaciones = self.combinaciones_por_texto[i]
+            for codigo in fuentes[puntaje]:
+                for posicion in combinaciones[inicio[codigo]:inicio[codigo + 1]]:
+                    if posicion not in vistas:
+                        vistas.add(posicion)
+                        yield nivel, posicion
+
+    def _puntaje_combinacion(self, posicion, terminos, cortos):
+        """Suma del mejor puntaje ponderado de cada término, o None si alguno no aparece
+
+        terminos son pares (término, memoria del puntaje de cada texto). Los
+        términos cortos no suman puntaje, pero deben aparecer en algún campo.
+        """
+        textos = self.textos
+        codigos = [columna[posicion] for columna in self.combinacion_textos]
+        total = 0
+        for termino, memoria in terminos:
+            mejor = 0
+            for codigo, peso in zip(codigos, self._pesos):
+                puntaje = memoria.get(codigo)
+                if puntaje is None:
+                    puntaje = memoria[codigo] = _puntaje_termino(textos[codigo], termino)
+                if puntaje * peso > mejor:
+                    mejor = puntaje * peso
+            if not mejor:
+                return None
+            total += mejor
+        for termino in cortos:
+            if not any(termino in textos[codigo] for codigo in codigos):
+                return None
+        return total
+
+    def _combinar(self, terminos, cortos):
+        """Combinaciones coincidentes de mayor a menor puntaje total
+
+        Recorre los niveles de cada término y puntúa cada combinación nueva
+        con todos los términos. Una combinación puntuada se entrega cuando su
+        puntaje alcanza la suma de los niveles actuales, que acota el puntaje
+        de las que todavía no se han visto. Siempre avanza el término con
+        menos combinaciones; los demás solo cuando hay combinaciones esperando
+        a que baje esa cota. Cuando se agotan los niveles de un término ya se
+        vieron todas las combinaciones posibles.
+        """
+        terminos = sorted(terminos, key=self._estimar_combinaciones)
+        flujos = [self._por_niveles(termino) for termino in terminos]
+        niveles = [0] * len(flujos)
+        memorias = [{} for _ in terminos]
+        # El puntaje del término cuyo nivel entregó la combinación ya se conoce
+        otros = [[(termino, memoria) for j, (termino, memoria) in enumerate(zip(terminos, memorias)) if j != k]
+                 for k in range(len(terminos))]
+        vistas = set()
+        puntuadas = []
+        primera = True
+        while True:
+            for k, flujo in enumerate(flujos):
+                if k and not primera and not puntuadas:
+                    break
+                siguiente = next(flujo, None)
+                if siguiente is None:
+                    while puntuadas:
+                        yield heapq.heappop(puntuadas)[1]
+                    return
+                niveles[k], posicion = siguiente
+                if posicion not in vistas:
+                    vistas.add(posicion)
+                    resto = self._puntaje_combinacion(posicion, otros[k], cortos)
+                    if resto is not None:
+                        heapq.heappush(puntuadas, (-niveles[k] - resto, posicion))
+            primera = False
+            umbral = sum(niveles)
+            while puntuadas and -puntuadas[0][0] >= umbral:
+                yield heapq.heappop(puntuadas)[1]
+
+    def combinaciones_coincidentes(self, consulta):
+        """Posiciones de las combinaciones que coinciden, de mayor a menor puntaje
+
+        El puntaje es la suma del mejor puntaje ponderado de cada término; una
+        combinación donde algún término no aparece queda fuera. El resultado es
+        perezoso (se calcula a medida que se recorre) y se puede entregar a
+        ofertas_de y contar_ofertas sin repetir la búsqueda.
+        """
+        terminos = normalizar_texto(consulta).split()
+        largos = [t for t in dict.fromkeys(terminos) if len(t) >= LARGO_MINIMO_TERMINO]
+        if not largos:
+            return SecuenciaPerezosa(iter(()))
+        cortos = [t for t in dict.fromkeys(terminos) if len(t) < LARGO_MINIMO_TERMINO]
+        return SecuenciaPerezosa(self._combinar(largos, cortos))
+
+    def ofertas_de(self, combinaciones):
+        """Itera las ofertas de las combinaciones indicadas, en ese orden
+
+        Es perezoso: se puede combinar con filtrar_ofertas(..., limite=n) para
+        obtener la primera página sin recorrer todas las coincidencias.
+        """
+        for posicion in combinaciones:
+            for i in self.ofertas_ordenadas[self.inicio_ofertas[posicion]:self.inicio_ofertas[posicion + 1]]:
+                yield self.ofertas[i]
+
+    def contar_ofertas(self, combinaciones, limite=None):
+        """Cantidad de ofertas de las combinaciones indicadas (sin materializarlas)
+
+        Con limite deja de contar al alcanzarlo y retorna limite.
+        """
+        total = 0
+        for posicion in combinaciones:
+            total += self.inicio_ofertas[posicion + 1] - self.inicio_ofertas[posicion]
+            if limite is not None and total >= limite:
+                return limite
+        return total
+
+    def buscar(self, consulta):
+        """Itera las ofertas que coinciden, en orden de relevancia"""
+        return self.ofertas_de(self.combinaciones_coincidentes(consulta))
+
+    def contar(self, consulta, limite=None):
+        """Cantidad total de ofertas que coinciden (hasta limite, si se indica)"""
+        return self.contar_ofertas(self.combinaciones_coincidentes(consulta), limite)
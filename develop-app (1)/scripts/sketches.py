@@ -0,0 +1,257 @@
+"""
+Estructuras Probabilísticas para Análisis a Gran Escala
+Autor: Sistema de Análisis Financiero
+Fecha: 2024-01-15
+
+Este módulo contiene estimadores de memoria acotada para conjuntos grandes.
+Incluye un contador de distintos HyperLogLog y un resumen Space-Saving de
+elementos más frecuentes (top-k ponderado), ambos combinables entre
+particiones.
+"""
+
+import base64
+import hashlib
+import heapq
+import math
+
+
+def _hash64(valor):
+    """Calcula un hash estable de 64 bits (independiente de PYTHONHASHSEED)"""
+    datos = str(valor).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(datos, digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """Contador aproximado de elementos distintos con error relativo acotado.
+
+    El error estándar es ~1.04 / sqrt(2^precision). Dos contadores con la
+    misma precisión se pueden combinar (por mes, por partición, por shard)
+    sin volver a recorrer los datos originales.
+    """
+
+    PRECISION_MIN = 4
+    PRECISION_MAX = 18
+
+    def __init__(self, error_relativo=0.01, precision=None):
+        if precision is None:
+            if not 0 < error_relativo < 1:
+                raise ValueError("error_relativo debe estar entre 0 y 1")
+            registros_necesarios = (1.04 / error_relativo) ** 2
+            precision = math.ceil(math.log2(registros_necesarios))
+        precision = max(self.PRECISION_MIN, min(self.PRECISION_MAX, precision))
+
+        self.precision = precision
+        self.num_registros = 1 << precision
+        self.registros = bytearray(self.num_registros)
+
+    @property
+    def error_estandar(self):
+        """Error relativo estándar teórico del estimador"""
+        return 1.04 / math.sqrt(self.num_registros)
+
+    def agregar(self, valor):
+        """Agrega un elemento al contador"""
+        h = _hash64(valor)
+        indice = h >> (64 - self.precision)
+        resto = h & ((1 << (64 - self.precision)) - 1)
+        # Posición del primer bit 1 en los bits restantes (1-indexada)
+        rango = (64 - self.precision) - resto.bit_length() + 1
+        if rango > self.registros[indice]:
+            self.registros[indice] = rango
+
+    def actualizar(self, valores):
+        """Agrega todos los elementos de un iterable"""
+        for valor in valores:
+            self.agregar(valor)
+
+    def combinar(self, otro):
+        """Incorpora otro contador (unión de conjuntos) y retorna self"""
+        if otro.precision != self.precision:
+            raise ValueError("Solo se pueden combinar contadores con la misma precisión")
+        self.registros = bytearray(map(max, self.registros, otro.registros))
+        return self
+
+    def estimar(self):
+        """Retorna la cantidad estimada de elementos distintos"""
+        m = self.num_registros
+        if m == 16:
+            alfa = 0.673
+        elif m == 32:
+            alfa = 0.697
+        elif m == 64:
+            alfa = 0.709
+        else:
+            alfa = 0.7213 / (1 + 1.079 / m)
+
+        suma = math.fsum(2.0 ** -r for r in self.registros)
+        estimacion = alfa * m * m / suma
+
+        # Corrección para rangos pequeños (conteo lineal)
+        registros_vacios = self.registros.count(0)
+        if estimacion <= 2.5 * m and registros_vacios > 0:
+            estimacion = m * math.log(m / registros_vacios)
+
+        return int(round(estimacion))
+
+    def __len__(self):
+        return self.estimar()
+
+    def a_dict(self):
+        """Serializa el contador a un diccionario compatible con JSON"""
+        return {
+            "precision": self.precision,
+            "registros": base64.b64encode(bytes(self.registros)).decode('ascii')
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye un contador serializado con a_dict()"""
+        hll = cls(precision=datos["precision"])
+        hll.registros = bytearray(base64.b64decode(datos["registros"]))
+        return hll
+
+
+class SpaceSaving:
+    """Top-k ponderado (Space-Saving) con memoria acotada y cotas de error.
+
+    Monitorea a lo más `capacidad` elementos. Cuando llega uno nuevo y no hay
+    espacio, reemplaza al de menor conteo y hereda ese conteo como error. El
+    conteo estimado de un elemento nunca subestima el real y lo excede a lo
+    más en su error, que a su vez es ≤ peso_total / capacidad. Dos resúmenes
+    se pueden combinar (por partición o por shard) sin releer los datos.
+    """
+
+    def __init__(self, error_relativo=0.001, capacidad=None):
+        if capacidad is None:
+            if not 0 < error_relativo < 1:
+                raise ValueError("error_relativo debe estar entre 0 y 1")
+            capacidad = math.ceil(1 / error_relativo)
+        if capacidad < 1:
+            raise ValueError("capacidad debe ser al menos 1")
+
+        self.capacidad = capacidad
+        self.peso_total = 0
+        # elemento -> [conteo estimado, error máximo]
+        self.contadores = {}
+        # Montículo (conteo, orden, elemento); los conteos solo crecen, así que
+        # una entrada desactualizada se corrige al salir como mínimo
+        self._minimos = []
+        self._orden = 0
+
+    def _empujar(self, conteo, elemento):
+        self._orden += 1
+        heapq.heappush(self._minimos, (conteo, self._orden, elemento))
+
+    def _extraer_minimo(self):
+        """Quita y retorna el elemento monitoreado de menor conteo"""
+        while True:
+            conteo, _, elemento = heapq.heappop(self._minimos)
+            actual = self.contadores[elemento][0]
+            if actual == conteo:
+                return elemento
+            self._empujar(actual, elemento)
+
+    def agregar(self, elemento, peso=1):
+        """Suma `peso` al elemento"""
+        self.peso_total += peso
+        contador = self.contadores.get(elemento)
+        if contador is not None:
+            contador[0] += peso
+        elif len(self.contadores) < self.capacidad:
+            self.contadores[elemento] = [peso, 0]
+            self._empujar(peso, elemento)
+        else:
+            desplazado = self._extraer_minimo()
+            minimo = self.contadores.pop(desplazado)[0]
+            self.contadores[elemento] = [minimo + peso, minimo]
+            self._empujar(minimo + peso, elemento)
+
+    def actualizar(self, pares):
+        """Agrega todos los pares (elemento, peso) de un iterable"""
+        for elemento, peso in pares:
+            self.agregar(elemento, peso)
+
+    @property
+    def conteo_minimo(self):
+        """Menor conteo monitoreado si el resumen está lleno (cota para los no monitoreados), si no 0"""
+        if len(self.contadores) < self.capacidad:
+            return 0
+        return min(conteo for conteo, _ in self.contadores.values())
+
+    @property
+    def error_maximo(self):
+        """Cota superior del error de cualquier conteo estimado"""
+        return self.peso_total / self.capacidad
+
+    def estimar(self, elemento):
+        """Conteo estimado (cota superior) de cualquier elemento, monitoreado o no"""
+        contador = self.contadores.get(elemento)
+        return contador[0] if contador is not None else self.conteo_minimo
+
+    def top(self, n):
+        """Los n elementos de mayor conteo, con su cota inferior y su error
+
+        `garantizado` indica que el elemento pertenece con certeza al top-n
+        real: su cota inferior supera el conteo estimado del (n+1)-ésimo.
+        """
+        ordenados = sorted(self.contadores.items(), key=lambda x: x[1][0], reverse=True)
+        siguiente = ordenados[n][1][0] if len(ordenados) > n else self.conteo_minimo
+        return [
+            {
+                "elemento": elemento,
+                "estimado": conteo,
+                "minimo": conteo - error,
+                "error": error,
+                "garantizado": conteo - error >= siguiente
+            }
+            for elemento, (conteo, error) in ordenados[:n]
+        ]
+
+    def combinar(self, otro):
+        """Incorpora otro resumen (suma de flujos) y retorna self
+
+        Un elemento ausente en un resumen lleno pudo tener hasta su conteo
+        mínimo, que se suma como conteo y como error.
+        """
+        if otro.capacidad != self.capacidad:
+            raise ValueError("Solo se pueden combinar resúmenes con la misma capacidad")
+        minimo_propio = self.conteo_minimo
+        minimo_otro = otro.conteo_minimo
+
+        combinados = {}
+        for elemento in self.contadores.keys() | otro.contadores.keys():
+            conteo_a, error_a = self.contadores.get(elemento, (minimo_propio, minimo_propio))
+            conteo_b, error_b = otro.contadores.get(elemento, (minimo_otro, minimo_otro))
+            combinados[elemento] = [conteo_a + conteo_b, error_a + error_b]
+
+        mayores = heapq.nlargest(self.capacidad, combinados.items(), key=lambda x: x[1][0])
+        self.contadores = dict(mayores)
+        self.peso_total += otro.peso_total
+        self._minimos = []
+        for elemento, (conteo, _) in self.contadores.items():
+            self._empujar(conteo, elemento)
+        return self
+
+    def __len__(self):
+        return len(self.contadores)
+
+    def a_dict(self):
+        """Serializa el resumen a un diccionario compatible con JSON"""
+        return {
+            "capacidad": self.capacidad,
+            "peso_total": self.peso_total,
+            "contadores": [[elemento, conteo, error]
+                           for elemento, (conteo, error) in self.contadores.items()]
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye un resumen serializado con a_dict() (las listas vuelven a ser tuplas)"""
+        resumen = cls(capacidad=datos["capacidad"])
+        resumen.peso_total = datos["peso_total"]
+        for elemento, conteo, error in datos["contadores"]:
+            if isinstance(elemento, list):
+                elemento = tuple(elemento)
+            resumen.contadores[elemento] = [conteo, error]
+            resumen._empujar(conteo, elemento)
+        return resumen
@@ -0,0 +1,637 @@
+"""
+Capa de Acceso a Datos
+Autor: Sistema de Análisis de Mercado Laboral
+Fecha: 2024-01-15
+
+Este módulo centraliza la lectura y escritura de todos los conjuntos de datos
+del proyecto (ofertas, estadísticas, transacciones, resultados, etc.).
+Los generadores, analizadores y la aplicación acceden a los datos por nombre
+a través de un almacén, cuyo backend se elige por configuración:
+
+    DATOS_BACKEND     json (por defecto), sqlite, parquet o mmap
+    DATOS_DIRECTORIO  directorio de los datos (por defecto, el de este módulo)
+
+Las rutas se resuelven respecto de este módulo y no del directorio de trabajo.
+Al escribir se aceptan también registros tipados y lotes (scripts/records.py),
+que se guardan fila a fila sin convertirlos antes en una lista de diccionarios.
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import threading
+
+try:
+    from scripts.mapped_tables import TablaMapeada, abrir_tabla, describir_campos, escribir_tabla
+    from scripts.records import es_registros, iterar_campos
+    from scripts.stream_reader import iterar_registros
+except ImportError:
+    from mapped_tables import TablaMapeada, abrir_tabla, describir_campos, escribir_tabla
+    from records import es_registros, iterar_campos
+    from stream_reader import iterar_registros
+
+DIRECTORIO_DATOS = os.environ.get(
+    "DATOS_DIRECTORIO", os.path.dirname(os.path.abspath(__file__))
+)
+BACKEND_DEFECTO = os.environ.get("DATOS_BACKEND", "json")
+
+# Conjuntos que consume el dashboard de empleabilidad, en el orden de cargar_datos_empleo
+DATASETS_EMPLEO = (
+    'estadisticas_mensuales',
+    'datos_sectores',
+    'ofertas_laborales',
+    'datos_historicos',
+)
+
+
+def _es_tabla_plana(datos):
+    """Indica si los datos son una lista no vacía de registros con valores escalares"""
+    if es_registros(datos):
+        # Los registros tipados tienen campos fijos y escalares
+        return True
+    if not isinstance(datos, list) or not datos:
+        return False
+    escalares = (str, int, float, bool, type(None))
+    return all(
+        isinstance(registro, dict) and all(isinstance(v, escalares) for v in registro.values())
+        for registro in datos
+    )
+
+
+def filtrar_ofertas(ofertas, sector=None, region=None, estado=None, desde=None, hasta=None, limite=None):
+    """Filtra ofertas por sector, región, estado y rango de fechas [desde, hasta]
+
+    Sobre una tabla mapeada se filtra por columnas y solo se decodifican las
+    ofertas seleccionadas.
+    """
+    if isinstance(ofertas, TablaMapeada):
+        condiciones = {}
+        for campo, valor in (("sector", sector), ("region", region), ("estado", estado)):
+            if valor is not None:
+                condiciones[campo] = lambda v, valor=valor: v == valor
+        if desde is not None or hasta is not None:
+            condiciones["fecha"] = lambda f: (desde is None or f >= desde) and (hasta is None or f <= hasta)
+        return ofertas.seleccionar(condiciones, limite)
+
+    resultado = []
+    for o in ofertas:
+        if ((sector is None or o["sector"] == sector)
+                and (region is None or o["region"] == region)
+                and (estado is None or o["estado"] == estado)
+                and (desde is None or o["fecha"] >= desde)
+                and (hasta is None or o["fecha"] <= hasta)):
+            resultado.append(o)
+            if limite is not None and len(resultado) >= limite:
+                break
+    return resultado
+
+
+def _resumen_vacio():
+    """Resumen de un conjunto sin ofertas"""
+    return {
+        "total": 0,
+        "activas": 0,
+        "sueldo_promedio": 0,
+        "sueldo_mediano": 0,
+        "sueldo_min": 0,
+        "sueldo_max": 0,
+        "ofertas_por_sector": {}
+    }
+
+
+def resumir_ofertas(ofertas):
+    """Calcula conteos, estadísticas de sueldo y ofertas por sector"""
+    sueldos = []
+    activas = 0
+    ofertas_por_sector = {}
+    for sueldo, estado, sector in iterar_campos(ofertas, ("sueldo", "estado", "sector")):
+        sueldos.append(sueldo)
+        if estado == "Activa":
+            activas += 1
+        ofertas_por_sector[sector] = ofertas_por_sector.get(sector, 0) + 1
+
+    if not sueldos:
+        return _resumen_vacio()
+    return {
+        "total": len(sueldos),
+        "activas": activas,
+        "sueldo_promedio": statistics.mean(sueldos),
+        "sueldo_mediano": statistics.median(sueldos),
+        "sueldo_min": min(sueldos),
+        "sueldo_max": max(sueldos),
+        "ofertas_por_sector": ofertas_por_sector
+    }
+
+
+def _volcar_registros_json(registros, f):
+    """Escribe registros tipados como arreglo JSON, un registro a la vez
+
+    El texto es el mismo que el de json.dump(..., indent=2) sobre la lista de
+    diccionarios equivalente, sin construir esa lista.
+    """
+    campos = registros[0].keys()
+    codificador = json.JSONEncoder(ensure_ascii=False, indent=2)
+    separador = "[\n  "
+    for valores in iterar_campos(registros, campos):
+        texto = codificador.encode(dict(zip(campos, valores)))
+        f.write(separador)
+        f.write(texto.replace("\n", "\n  "))
+        separador = ",\n  "
+    f.write("\n]")
+
+
+class _AlmacenBase:
+    """Consultas sobre ofertas resueltas en Python, recorriendo el conjunto completo
+
+    Los backends con índices (SQLite) las sobrescriben para resolverlas en la
+    base de datos.
+    """
+
+    consultas_indexadas = False
+    vistas_compartidas = False
+
+    def abrir(self, dataset):
+        """Datos de solo lectura para compartir entre sesiones (sin mmap, una copia con leer)"""
+        return self.leer(dataset)
+
+    def consultar_ofertas(self, sector=None, region=None, estado=None, desde=None, hasta=None, limite=None):
+        return filtrar_ofertas(self.iterar("ofertas_laborales"), sector, region, estado, desde, hasta, limite)
+
+    def resumir_ofertas(self):
+        return resumir_ofertas(self.iterar("ofertas_laborales"))
+
+    def valores_distintos(self, dataset, campo):
+        return sorted({registro[campo] for registro in self.iterar(dataset)})
+
+
+class AlmacenJSON(_AlmacenBase):
+    """Backend con un archivo JSON por conjunto de datos (formato original)"""
+
+    nombre = "json"
+
+    def __init__(self, directorio=DIRECTORIO_DATOS):
+        self.directorio = directorio
+
+    def ruta(self, dataset):
+        return os.path.join(self.directorio, f"{dataset}.json")
+
+    def existe(self, dataset):
+        return os.path.exists(self.ruta(dataset))
+
+    def version(self, dataset):
+        """Marca de versión que cambia cada vez que se reescribe el conjunto"""
+        return os.path.getmtime(self.ruta(dataset)) if self.existe(dataset) else None
+
+    def leer(self, dataset):
+        with open(self.ruta(dataset), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def iterar(self, dataset):
+        """Itera los registros sin cargar el archivo completo"""
+        if not self.existe(dataset):
+            raise FileNotFoundError(self.ruta(dataset))
+        return iterar_registros(self.ruta(dataset))
+
+    def escribir(self, dataset, datos):
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(self.ruta(dataset), 'w', encoding='utf-8') as f:
+            if es_registros(datos):
+                _volcar_registros_json(datos, f)
+            else:
+                json.dump(datos, f, ensure_ascii=False, indent=2)
+
+    def eliminar(self, dataset):
+        """Elimina el conjunto de datos si existe"""
+        if self.existe(dataset):
+            os.remove(self.ruta(dataset))
+
+
+class AlmacenSQLite(_AlmacenBase):
+    """Backend SQLite: una tabla por conjunto tabular y una tabla de documentos
+
+    Las listas de registros planos se guardan como tablas (una columna por
+    campo); el resto (diccionarios, estructuras anidadas) como documentos JSON.
+    La conexión se comparte entre hilos, serializada con un lock. Las consultas
+    de ofertas se resuelven con SQL sobre columnas indexadas.
+    """
+
+    nombre = "sqlite"
+    ARCHIVO = "datos.sqlite"
+    consultas_indexadas = True
+
+    # Índices creados al escribir cada conjunto de datos
+    INDICES = {
+        "ofertas_laborales": [
+            ("sector",),
+            ("region",),
+            ("fecha",),
+            ("estado", "sector", "region", "fecha"),
+            # Mediana de resumir_ofertas: ORDER BY sueldo con OFFSET recorre el índice
+            ("sueldo",),
+        ],
+    }
+
+    def __init__(self, directorio=DIRECTORIO_DATOS):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.RLock()
+        self.conexion = sqlite3.connect(
+            os.path.join(directorio, self.ARCHIVO), check_same_thread=False
+        )
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        with self.conexion:
+            self.conexion.execute(
+                "CREATE TABLE IF NOT EXISTS _documentos (nombre TEXT PRIMARY KEY, contenido TEXT)"
+            )
+            self.conexion.execute(
+                "CREATE TABLE IF NOT EXISTS _versiones (nombre TEXT PRIMARY KEY, version INTEGER)"
+            )
+
+    def _es_tabla(self, dataset):
+        fila = self.conexion.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (dataset,)
+        ).fetchone()
+        return fila is not None
+
+    def existe(self, dataset):
+        with self._lock:
+            if self._es_tabla(dataset):
+                return True
+            return self.conexion.execute(
+                "SELECT 1 FROM _documentos WHERE nombre=?", (dataset,)
+            ).fetchone() is not None
+
+    def version(self, dataset):
+        with self._lock:
+            fila = self.conexion.execute(
+                "SELECT version FROM _versiones WHERE nombre=?", (dataset,)
+            ).fetchone()
+        return fila[0] if fila else None
+
+    def leer(self, dataset):
+        with self._lock:
+            es_tabla = self._es_tabla(dataset)
+        return list(self.iterar(dataset)) if es_tabla else self._leer_documento(dataset)
+
+    def _leer_documento(self, dataset):
+        with self._lock:
+            fila = self.conexion.execute(
+                "SELECT contenido FROM _documentos WHERE nombre=?", (dataset,)
+            ).fetchone()
+        if fila is None:
+            raise FileNotFoundError(f"{dataset} no existe en {self.ARCHIVO}")
+        return json.loads(fila[0])
+
+    def iterar(self, dataset, tamano_bloque=10000):
+        """Itera los registros de una tabla en bloques, en orden de inserción"""
+        with self._lock:
+            es_tabla = self._es_tabla(dataset)
+        if not es_tabla:
+            yield from self._leer_documento(dataset)
+            return
+        with self._lock:
+            cursor = self.conexion.execute(f'SELECT * FROM "{dataset}" ORDER BY rowid')
+            columnas = [c[0] for c in cursor.description]
+        while True:
+            with self._lock:
+                filas = cursor.fetchmany(tamano_bloque)
+            if not filas:
+                return
+            for fila in filas:
+                yield dict(zip(columnas, fila))
+
+    def escribir(self, dataset, datos):
+        with self._lock, self.conexion:
+            self.conexion.execute(f'DROP TABLE IF EXISTS "{dataset}"')
+            self.conexion.execute("DELETE FROM _documentos WHERE nombre=?", (dataset,))
+
+            columnas = list(datos[0].keys()) if _es_tabla_plana(datos) else None
+            tipos = columnas and self._tipos_columnas(datos, columnas)
+            if tipos:
+                definicion = ", ".join(f'"{c}" {tipo}'.rstrip() for c, tipo in zip(columnas, tipos))
+                self.conexion.execute(f'CREATE TABLE "{dataset}" ({definicion})')
+                marcadores = ", ".join("?" for _ in columnas)
+                if es_registros(datos):
+                    filas = iterar_campos(datos, columnas)
+                else:
+                    filas = ([registro.get(c) for c in columnas] for registro in datos)
+                self.conexion.executemany(f'INSERT INTO "{dataset}" VALUES ({marcadores})', filas)
+                self._crear_indices(dataset)
+            else:
+                self.conexion.execute(
+                    "INSERT INTO _documentos VALUES (?, ?)",
+                    (dataset, json.dumps(datos, ensure_ascii=False))
+                )
+
+            # Contador global: las versiones de distintos conjuntos son comparables
+            self.conexion.execute(
+                "INSERT INTO _versiones VALUES (?, (SELECT COALESCE(MAX(version), 0) + 1 FROM _versiones)) "
+                "ON CONFLICT(nombre) DO UPDATE SET version = excluded.version",
+                (dataset,)
+            )
+
+    @staticmethod
+    def _tipos_columnas(datos, columnas):
+        """Tipo SQL de cada columna según todos sus valores, o None si no es representable
+
+        Una columna con un solo tipo (sin contar los nulos) se declara INTEGER,
+        REAL o TEXT. Si mezcla tipos (por ejemplo enteros y decimales) se
+        declara sin tipo: SQLite guarda cada valor como llegó y la lectura
+        devuelve los mismos tipos. SQLite no tiene booleanos, así que los
+        registros con booleanos se guardan como documento.
+        """
+        tipos_sql = {int: "INTEGER", float: "REAL", str: "TEXT"}
+        tipos = []
+        for c in columnas:
+            if es_registros(datos):
+                valores = (valor for valor, in iterar_campos(datos, (c,)))
+            else:
+                valores = (registro.get(c) for registro in datos)
+            tipos_valores = {type(v) for v in valores} - {type(None)}
+            if bool in tipos_valores:
+                return None
+            tipos.append(tipos_sql[tipos_valores.pop()] if len(tipos_valores) == 1 else "")
+        return tipos
+
+    def eliminar(self, dataset):
+        """Elimina el conjunto de datos si existe"""
+        with self._lock, self.conexion:
+            self.conexion.execute(f'DROP TABLE IF EXISTS "{dataset}"')
+            self.conexion.execute("DELETE FROM _documentos WHERE nombre=?", (dataset,))
+            self.conexion.execute("DELETE FROM _versiones WHERE nombre=?", (dataset,))
+
+    def _crear_indices(self, dataset):
+        """Crea los índices definidos para el conjunto de datos"""
+        for columnas in self.INDICES.get(dataset, []):
+            nombre_indice = f"idx_{dataset}_{'_'.join(columnas)}"
+            lista = ", ".join(f'"{c}"' for c in columnas)
+            self.conexion.execute(f'CREATE INDEX "{nombre_indice}" ON "{dataset}" ({lista})')
+        if dataset in self.INDICES:
+            self.conexion.execute(f'ANALYZE "{dataset}"')
+
+    def _filtros_ofertas(self, sector, region, estado, desde, hasta):
+        condiciones = []
+        parametros = []
+        for columna, operador, valor in (("sector", "=", sector), ("region", "=", region),
+                                         ("estado", "=", estado), ("fecha", ">=", desde),
+                                         ("fecha", "<=", hasta)):
+            if valor is not None:
+                condiciones.append(f"{columna} {operador} ?")
+                parametros.append(valor)
+        where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return where, parametros
+
+    def consultar_ofertas(self, sector=None, region=None, estado=None, desde=None, hasta=None, limite=None):
+        where, parametros = self._filtros_ofertas(sector, region, estado, desde, hasta)
+        sql = f"SELECT * FROM ofertas_laborales{where} ORDER BY rowid"
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros.append(limite)
+        with self._lock:
+            if not self._es_tabla("ofertas_laborales"):
+                # Sin ofertas el conjunto es un documento vacío (o no existe)
+                return super().consultar_ofertas(sector, region, estado, desde, hasta, limite)
+            cursor = self.conexion.execute(sql, parametros)
+            columnas = [c[0] for c in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    def resumir_ofertas(self):
+        with self._lock:
+            if not self._es_tabla("ofertas_laborales"):
+                return super().resumir_ofertas()
+            total, activas, promedio, minimo, maximo = self.conexion.execute(
+                "SELECT COUNT(*), SUM(estado = 'Activa'), AVG(sueldo), MIN(sueldo), MAX(sueldo) "
+                "FROM ofertas_laborales"
+            ).fetchone()
+            if not total:
+                return _resumen_vacio()
+
+            # Mediana: uno o dos valores centrales sin traer la columna completa
+            centrales = [fila[0] for fila in self.conexion.execute(
+                "SELECT sueldo FROM ofertas_laborales ORDER BY sueldo LIMIT ? OFFSET ?",
+                (2 - total % 2, (total - 1) // 2)
+            )]
+
+            ofertas_por_sector = dict(self.conexion.execute(
+                "SELECT sector, COUNT(*) FROM ofertas_laborales GROUP BY sector ORDER BY MIN(rowid)"
+            ).fetchall())
+
+        return {
+            "total": total,
+            "activas": activas,
+            "sueldo_promedio": promedio,
+            "sueldo_mediano": sum(centrales) / len(centrales),
+            "sueldo_min": minimo,
+            "sueldo_max": maximo,
+            "ofertas_por_sector": ofertas_por_sector
+        }
+
+    def valores_distintos(self, dataset, campo):
+        with self._lock:
+            if not self._es_tabla(dataset):
+                return super().valores_distintos(dataset, campo)
+            return [fila[0] for fila in self.conexion.execute(
+                f'SELECT DISTINCT "{campo}" FROM "{dataset}" ORDER BY 1'
+            )]
+
+
+class AlmacenParquet(_AlmacenBase):
+    """Backend columnar: conjuntos tabulares en Parquet, documentos en JSON
+
+    Requiere pandas y pyarrow (dependencias opcionales).
+    """
+
+    nombre = "parquet"
+
+    def __init__(self, directorio=DIRECTORIO_DATOS):
+        try:
+            import pandas as pd
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "El backend parquet requiere pandas y pyarrow: pip install pandas pyarrow"
+            ) from e
+        self.pd = pd
+        self.directorio = directorio
+        self._documentos = AlmacenJSON(directorio)
+
+    def ruta(self, dataset):
+        return os.path.join(self.directorio, f"{dataset}.parquet")
+
+    def existe(self, dataset):
+        return os.path.exists(self.ruta(dataset)) or self._documentos.existe(dataset)
+
+    def version(self, dataset):
+        if os.path.exists(self.ruta(dataset)):
+            return os.path.getmtime(self.ruta(dataset))
+        return self._documentos.version(dataset)
+
+    def leer(self, dataset):
+        if os.path.exists(self.ruta(dataset)):
+            return self.pd.read_parquet(self.ruta(dataset)).to_dict('records')
+        return self._documentos.leer(dataset)
+
+    def iterar(self, dataset, tamano_bloque=10000):
+        """Itera los registros por grupos de filas del archivo Parquet"""
+        if not os.path.exists(self.ruta(dataset)):
+            yield from self._documentos.iterar(dataset)
+            return
+        import pyarrow.parquet as pq
+        archivo = pq.ParquetFile(self.ruta(dataset))
+        for lote in archivo.iter_batches(batch_size=tamano_bloque):
+            yield from lote.to_pylist()
+
+    def escribir(self, dataset, datos):
+        os.makedirs(self.directorio, exist_ok=True)
+        if _es_tabla_plana(datos):
+            if self._documentos.existe(dataset):
+                os.remove(self._documentos.ruta(dataset))
+            if es_registros(datos):
+                columnas = list(datos[0].keys())
+                tabla = self.pd.DataFrame.from_records(iterar_campos(datos, columnas), columns=columnas)
+            else:
+                tabla = self.pd.DataFrame(datos)
+            tabla.to_parquet(self.ruta(dataset), index=False)
+        else:
+            if os.path.exists(self.ruta(dataset)):
+                os.remove(self.ruta(dataset))
+            self._documentos.escribir(dataset, datos)
+
+    def eliminar(self, dataset):
+        """Elimina el conjunto de datos si existe"""
+        if os.path.exists(self.ruta(dataset)):
+            os.remove(self.ruta(dataset))
+        self._documentos.eliminar(dataset)
+
+
+class AlmacenMapeado(_AlmacenBase):
+    """Backend de tablas binarias de ancho fijo abiertas con mmap
+
+    Los conjuntos tabulares se guardan como filas de ancho fijo
+    (scripts/mapped_tables.py) y el resto como documentos JSON. abrir()
+    retorna una vista de solo lectura sobre el archivo mapeado: el sistema
+    operativo comparte sus páginas entre todos los procesos del host, así que
+    varios workers de Streamlit usan una sola copia y no parsean nada al
+    iniciar. leer() sigue retornando una lista de diccionarios.
+    """
+
+    nombre = "mmap"
+    vistas_compartidas = True
+
+    def __init__(self, directorio=DIRECTORIO_DATOS):
+        self.directorio = directorio
+        self._documentos = AlmacenJSON(directorio)
+        # Tablas abiertas en este proceso: dataset → (versión, vista)
+        self._tablas = {}
+        self._lock = threading.Lock()
+
+    def ruta(self, dataset):
+        return os.path.join(self.directorio, f"{dataset}.bin")
+
+    def existe(self, dataset):
+        return os.path.exists(self.ruta(dataset)) or self._documentos.existe(dataset)
+
+    def version(self, dataset):
+        if os.path.exists(self.ruta(dataset)):
+            return os.path.getmtime(self.ruta(dataset))
+        return self._documentos.version(dataset)
+
+    def _tabla(self, dataset):
+        """Vista mapeada del conjunto (reabierta si cambió), o None si no es tabla"""
+        version = self.version(dataset) if os.path.exists(self.ruta(dataset)) else None
+        if version is None:
+            return None
+        with self._lock:
+            abierta = self._tablas.get(dataset)
+            if abierta is None or abierta[0] != version:
+                abierta = self._tablas[dataset] = (version, abrir_tabla(self.ruta(dataset)))
+            return abierta[1]
+
+    def abrir(self, dataset):
+        tabla = self._tabla(dataset)
+        return tabla if tabla is not None else self._documentos.leer(dataset)
+
+    def leer(self, dataset):
+        tabla = self._tabla(dataset)
+        return list(tabla) if tabla is not None else self._documentos.leer(dataset)
+
+    def iterar(self, dataset):
+        tabla = self._tabla(dataset)
+        return iter(tabla) if tabla is not None else self._documentos.iterar(dataset)
+
+    def escribir(self, dataset, datos):
+        os.makedirs(self.directorio, exist_ok=True)
+        campos = describir_campos(datos) if _es_tabla_plana(datos) else None
+        if campos is not None:
+            if self._documentos.existe(dataset):
+                os.remove(self._documentos.ruta(dataset))
+            escribir_tabla(self.ruta(dataset), datos, campos)
+        else:
+            if os.path.exists(self.ruta(dataset)):
+                os.remove(self.ruta(dataset))
+            self._documentos.escribir(dataset, datos)
+
+    def eliminar(self, dataset):
+        """Elimina el conjunto de datos si existe (las vistas ya abiertas siguen válidas)"""
+        if os.path.exists(self.ruta(dataset)):
+            os.remove(self.ruta(dataset))
+        with self._lock:
+            self._tablas.pop(dataset, None)
+        self._documentos.eliminar(dataset)
+
+    def consultar_ofertas(self, sector=None, region=None, estado=None, desde=None, hasta=None, limite=None):
+        tabla = self._tabla("ofertas_laborales")
+        if tabla is None:
+            return super().consultar_ofertas(sector, region, estado, desde, hasta, limite)
+        return filtrar_ofertas(tabla, sector, region, estado, desde, hasta, limite)
+
+    def resumir_ofertas(self):
+        tabla = self._tabla("ofertas_laborales")
+        # Sobre la tabla, resumir_ofertas lee solo las columnas que usa
+        return resumir_ofertas(tabla if tabla is not None else self.iterar("ofertas_laborales"))
+
+    def valores_distintos(self, dataset, campo):
+        tabla = self._tabla(dataset)
+        if tabla is None:
+            return super().valores_distintos(dataset, campo)
+        return tabla.valores_distintos(campo)
+
+
+BACKENDS = {
+    "json": AlmacenJSON,
+    "sqlite": AlmacenSQLite,
+    "parquet": AlmacenParquet,
+    "mmap": AlmacenMapeado,
+}
+
+_almacenes = {}
+_lock_almacenes = threading.Lock()
+
+
+def obtener_almacen(backend=None, directorio=None):
+    """Retorna el almacén configurado (una instancia compartida por backend y directorio)"""
+    backend = backend or BACKEND_DEFECTO
+    directorio = directorio or DIRECTORIO_DATOS
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+
+    clave = (backend, directorio)
+    with _lock_almacenes:
+        if clave not in _almacenes:
+            _almacenes[clave] = BACKENDS[backend](directorio)
+        return _almacenes[clave]
+
+
+def cargar_datos_empleo(almacen=None, ofertas=True):
+    """Carga estadísticas, sectores, ofertas e históricos (usado por el dashboard)
+
+    Con el backend mmap retorna vistas de solo lectura sobre los archivos
+    mapeados en lugar de copias. Con ofertas=False las ofertas no se cargan
+    (se retorna None en su lugar) y se consultan al almacén cuando se necesitan.
+    """
+    almacen = almacen or obtener_almacen()
+    return tuple(
+        almacen.abrir(dataset) if ofertas or dataset != 'ofertas_laborales' else None
+        for dataset in DATASETS_EMPLEO
+    )
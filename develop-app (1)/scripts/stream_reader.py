@@ -0,0 +1,131 @@
+"""
+Lectura Incremental de Archivos de Datos
+Autor: Sistema de Análisis Financiero
+Fecha: 2024-01-15
+
+Este módulo lee registros de archivos JSON sin cargarlos completos en memoria.
+Soporta el formato de arreglo JSON actual y el formato de una línea por registro
+(JSON Lines), y entrega los registros en lotes de tamaño fijo.
+"""
+
+import json
+import time
+
+TAMANO_LOTE_DEFECTO = 10000
+TAMANO_BLOQUE_LECTURA = 1 << 16
+
+_decoder = json.JSONDecoder()
+# Caracteres que pueden seguir a un elemento del arreglo
+_FIN_ELEMENTO = frozenset(' \t\r\n,]')
+
+
+def _iterar_arreglo_json(f, buffer, tamano_bloque):
+    """Decodifica uno a uno los elementos de un arreglo JSON"""
+    pos = 1  # Se omite el '[' inicial
+    fin_archivo = False
+
+    while True:
+        # Saltar espacios y separadores entre elementos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or fin_archivo:
+                break
+            bloque = f.read(tamano_bloque)
+            fin_archivo = not bloque
+            buffer, pos = bloque, 0
+
+        if pos >= len(buffer) or buffer[pos] == ']':
+            return
+
+        try:
+            registro, fin = _decoder.raw_decode(buffer, pos)
+            # Un número cortado por el borde del bloque también se decodifica
+            # ("33" de "333", "5" de "5.25"): solo se acepta si lo sigue un
+            # separador o si ya no queda archivo
+            completo = fin_archivo or (fin < len(buffer) and buffer[fin] in _FIN_ELEMENTO)
+        except json.JSONDecodeError:
+            if fin_archivo:
+                raise
+            completo = False
+        if not completo:
+            # Registro incompleto: leer otro bloque y reintentar
+            bloque = f.read(tamano_bloque)
+            fin_archivo = not bloque
+            buffer, pos = buffer[pos:] + bloque, 0
+            continue
+
+        yield registro
+        pos = fin
+
+
+def iterar_registros(ruta, tamano_bloque=TAMANO_BLOQUE_LECTURA):
+    """Itera los registros de un archivo JSON o JSON Lines con memoria acotada
+
+    El formato se detecta por el primer carácter: '[' indica un arreglo JSON,
+    cualquier otro contenido se interpreta como un registro por línea.
+    """
+    with open(ruta, 'r', encoding='utf-8') as f:
+        buffer = f.read(tamano_bloque).lstrip()
+        if not buffer:
+            return
+
+        if buffer[0] == '[':
+            yield from _iterar_arreglo_json(f, buffer, tamano_bloque)
+            return
+
+        # JSON Lines: se procesa lo ya leído y luego el resto línea a línea
+        lineas = buffer.split('\n')
+        resto = lineas.pop()
+        for linea in lineas:
+            if linea.strip():
+                yield json.loads(linea)
+        for linea in f:
+            if resto:
+                linea, resto = resto + linea, ''
+            if linea.strip():
+                yield json.loads(linea)
+        if resto.strip():
+            yield json.loads(resto)
+
+
+def iterar_lotes(registros, tamano_lote=TAMANO_LOTE_DEFECTO):
+    """Agrupa un iterable de registros en listas de a lo más tamano_lote"""
+    if tamano_lote < 1:
+        raise ValueError("tamano_lote debe ser positivo")
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def procesar_en_lotes(registros, funcion, tamano_lote=TAMANO_LOTE_DEFECTO):
+    """Aplica funcion(lote) a cada lote y retorna estadísticas de rendimiento"""
+    inicio = time.perf_counter()
+    total_registros = 0
+    total_lotes = 0
+
+    for lote in iterar_lotes(registros, tamano_lote):
+        funcion(lote)
+        total_registros += len(lote)
+        total_lotes += 1
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "registros": total_registros,
+        "lotes": total_lotes,
+        "tamano_lote": tamano_lote,
+        "segundos": round(segundos, 4),
+        "registros_por_segundo": round(total_registros / segundos, 1) if segundos > 0 else 0.0
+    }
+
+
+def reportar_rendimiento(estadisticas):
+    """Imprime el throughput de una lectura en lotes"""
+    print(f"⚡ {estadisticas['registros']:,} registros en {estadisticas['lotes']} lotes "
+          f"de {estadisticas['tamano_lote']:,} | {estadisticas['segundos']:.2f} s "
+          f"({estadisticas['registros_por_segundo']:,.0f} registros/s)")
@@ -0,0 +1,18 @@
+"""
+Configuración común de las pruebas
+
+Las pruebas importan los módulos como `scripts.<modulo>` desde el directorio
+de la aplicación, y escriben los datos en un directorio temporal con el
+backend JSON para no tocar los archivos del proyecto.
+"""
+
+import os
+import sys
+import tempfile
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO_APP)
+
+# Antes de importar scripts.storage, que lee la configuración al cargarse
+os.environ["DATOS_DIRECTORIO"] = tempfile.mkdtemp(prefix="pruebas_datos_")
+os.environ["DATOS_BACKEND"] = "json"
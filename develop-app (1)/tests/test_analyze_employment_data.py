@@ -0,0 +1,45 @@
+"""Pruebas del análisis de ofertas laborales"""
+
+import random
+
+import pytest
+
+from scripts.analyze_employment_data import analizar_ofertas_streaming
+from scripts.generate_employment_data import generar_ofertas_laborales
+from scripts.storage import obtener_almacen, resumir_ofertas
+
+
+def test_streaming_sin_ofertas_no_falla():
+    obtener_almacen().escribir("ofertas_laborales", [])
+
+    resumen = analizar_ofertas_streaming()
+
+    assert resumen["total"] == 0
+    assert resumen["sueldo_promedio"] == 0
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "mmap"])
+def test_resumen_sin_ofertas_es_vacio(backend, tmp_path):
+    almacen = obtener_almacen(backend, str(tmp_path))
+    almacen.escribir("ofertas_laborales", [])
+
+    resumen = almacen.resumir_ofertas()
+
+    assert resumen["total"] == 0
+    assert resumen["sueldo_mediano"] == 0
+    assert almacen.consultar_ofertas(estado="Activa") == []
+
+
+def test_resumen_sqlite_igual_al_de_python(tmp_path):
+    random.seed(4)
+    ofertas = generar_ofertas_laborales(501)
+    almacen = obtener_almacen("sqlite", str(tmp_path))
+    almacen.escribir("ofertas_laborales", ofertas)
+
+    resumen, esperado = almacen.resumir_ofertas(), resumir_ofertas(ofertas)
+    assert resumen.pop("sueldo_promedio") == pytest.approx(esperado.pop("sueldo_promedio"))
+    assert resumen == esperado
+    plan = almacen.conexion.execute(
+        "EXPLAIN QUERY PLAN SELECT sueldo FROM ofertas_laborales ORDER BY sueldo LIMIT 1 OFFSET 250"
+    ).fetchall()
+    assert "idx_ofertas_laborales_sueldo" in str(plan)
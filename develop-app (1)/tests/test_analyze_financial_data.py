@@ -0,0 +1,127 @@
+"""Pruebas de los agregados incrementales del análisis financiero"""
+
+import random
+
+import pytest
+
+from scripts import analyze_financial_data, generate_financial_data
+from scripts.analyze_financial_data import (actualizar_agregados, calcular_kpis, cargar_agregados,
+                                            crear_agregados)
+from scripts.generate_financial_data import generar_transacciones
+from scripts.partitions import cargar_indice
+from scripts.storage import obtener_almacen
+
+
+@pytest.fixture
+def transacciones():
+    random.seed(11)
+    return generar_transacciones(600, dias=400)
+
+
+def _completadas(transacciones):
+    return [t for t in transacciones if t["estado"] == "Completado"]
+
+
+def test_filas_fuera_de_orden_se_incorporan_todas(transacciones):
+    desordenadas = list(transacciones)
+    random.Random(3).shuffle(desordenadas)
+
+    agregados = crear_agregados()
+    incorporadas = actualizar_agregados(agregados, desordenadas)
+
+    completadas = _completadas(transacciones)
+    assert incorporadas == len(completadas)
+    assert agregados["total_ventas"] == pytest.approx(sum(t["monto_total"] for t in completadas))
+    assert agregados["watermark"]["id"] == len(transacciones)
+
+
+def test_lotes_por_mes_equivalen_al_analisis_completo(transacciones):
+    # Como al leer particiones: mes a mes, con los ids de cada mes intercalados
+    por_mes = sorted(transacciones, key=lambda t: (t["fecha"][:7], t["id"]))
+
+    agregados = crear_agregados()
+    for inicio in range(0, len(por_mes), 50):
+        actualizar_agregados(agregados, por_mes[inicio:inicio + 50])
+
+    kpis = calcular_kpis(transacciones, [])
+    assert agregados["num_transacciones"] == kpis["num_transacciones"]
+    assert round(agregados["total_ventas"], 2) == kpis["total_ventas"]
+
+
+def test_incremental_omite_solo_lo_procesado_antes(transacciones):
+    primera, segunda = transacciones[:300], list(transacciones[300:])
+    random.Random(5).shuffle(segunda)
+
+    agregados = crear_agregados()
+    actualizar_agregados(agregados, primera)
+    watermark_previo = agregados["watermark"]["id"]
+
+    # La segunda ejecución vuelve a leer todo, con lo nuevo fuera de orden
+    actualizar_agregados(agregados, primera + segunda, watermark_previo)
+
+    completadas = _completadas(transacciones)
+    assert agregados["num_transacciones"] == len(completadas)
+    assert agregados["total_ventas"] == pytest.approx(sum(t["monto_total"] for t in completadas))
+
+
+def test_pendiente_completada_en_ejecucion_posterior():
+    random.seed(12)
+    transacciones = generar_transacciones(50)
+    for t in transacciones:
+        t["estado"] = "Completado"
+    transacciones[10]["estado"] = "Pendiente"
+
+    agregados = crear_agregados()
+    actualizar_agregados(agregados, transacciones)
+    assert transacciones[10]["id"] in agregados["pendientes"]
+
+    transacciones[10]["estado"] = "Completado"
+    incorporadas = actualizar_agregados(agregados, transacciones, agregados["watermark"]["id"])
+
+    assert incorporadas == 1
+    assert agregados["num_transacciones"] == 50
+    assert not agregados["pendientes"]
+
+
+def test_clientes_unicos_aproximados_se_marcan(transacciones):
+    exactos = calcular_kpis(transacciones, [])
+    aproximados = calcular_kpis(transacciones, [], clientes_aproximados=True)
+
+    assert "error_clientes_unicos" not in exactos
+    assert aproximados["error_clientes_unicos"] > 0
+
+
+def test_incremental_relee_solo_particiones_nuevas_o_reescritas(capsys):
+    random.seed(13)
+    generate_financial_data.main(2000, 300, particionado=True)
+    almacen = obtener_almacen()
+    almacen.eliminar("agregados_financieros")
+    total = len(cargar_indice(almacen))
+
+    analyze_financial_data.main(incremental=True)
+    assert f"Particiones leídas: {total} de {total}" in capsys.readouterr().out
+
+    # Sin cambios no se relee nada, aunque todos los meses tengan pendientes
+    agregados = cargar_agregados()
+    assert len({fecha[:7] for fecha in agregados["pendientes"].values()}) == total
+    analyze_financial_data.main(incremental=True)
+    salida = capsys.readouterr().out
+    assert f"Particiones leídas: 0 de {total}" in salida
+    assert "⚡ 0 registros" in salida
+
+    # Una pendiente que se completa: solo se relee su partición
+    id_pendiente, fecha = next(iter(agregados["pendientes"].items()))
+    dataset = f"transacciones_{fecha[:7].replace('-', '_')}"
+    filas = almacen.leer(dataset)
+    for t in filas:
+        if t["id"] == id_pendiente:
+            t["estado"] = "Completado"
+    almacen.escribir(dataset, filas)
+
+    analyze_financial_data.main(incremental=True)
+    salida = capsys.readouterr().out
+    assert f"Particiones leídas: 1 de {total}" in salida
+    assert f"⚡ {len(filas):,} registros" in salida
+    actualizados = cargar_agregados()
+    assert actualizados["num_transacciones"] == agregados["num_transacciones"] + 1
+    assert id_pendiente not in actualizados["pendientes"]
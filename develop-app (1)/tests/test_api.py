@@ -0,0 +1,211 @@
+"""Pruebas de la API de KPIs: parser HTTP, negociación gzip y servidor completo"""
+
+import asyncio
+import gzip
+import json
+import random
+from urllib.parse import quote
+
+import pytest
+
+from api import (DATASET_FINANZAS, IndiceClientesCacheado, ServidorAPI, _acepta_gzip,
+                 _parsear_solicitud)
+from scripts.customer_index import DATASET_INDICE_CLIENTES, IndiceClientes, guardar_indice_clientes
+from scripts.generate_financial_data import generar_transacciones
+from scripts.storage import obtener_almacen
+
+SECTORES = [{"sector": "Tecnología", "ofertas": 120}, {"sector": "Educación", "ofertas": 80}]
+
+
+def test_parsear_solicitud_valida():
+    metodo, ruta, version, encabezados = _parsear_solicitud(
+        b"GET /api/sectores/?formato=json HTTP/1.1\r\nHost: localhost\r\nIf-None-Match:  \"abc\" \r\n\r\n")
+
+    assert (metodo, ruta, version) == ("GET", "/api/sectores", "HTTP/1.1")
+    assert encabezados == {"host": "localhost", "if-none-match": '"abc"'}
+    # Sin encabezados también es válida
+    assert _parsear_solicitud(b"HEAD / HTTP/1.0\r\n\r\n") == ("HEAD", "/", "HTTP/1.0", {})
+
+
+@pytest.mark.parametrize("datos", [
+    b"\r\n\r\n",
+    b"GET /api/sectores\r\n\r\n",
+    b"GET  /api/sectores HTTP/1.1\r\n\r\n",
+    b"GET /api/sectores HTTP/1.1 extra\r\n\r\n",
+    b"GET /api/sectores HTTP/1.1\r\nHost localhost\r\n\r\n",
+])
+def test_parsear_solicitud_invalida(datos):
+    assert _parsear_solicitud(datos) is None
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("gzip", True),
+    ("deflate, GZIP;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, deflate", False),
+    ("gzip;q=abc", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("br, *;q=0.1", True),
+    ("deflate, br", False),
+    ("", False),
+])
+def test_acepta_gzip(valor, esperado):
+    assert _acepta_gzip(valor) is esperado
+
+
+async def _leer_respuesta(lector, metodo="GET"):
+    """Lee una respuesta completa y retorna (estado, encabezados, cuerpo)"""
+    cabecera = (await lector.readuntil(b"\r\n\r\n")).decode("latin-1")
+    linea, *resto = cabecera.strip().split("\r\n")
+    encabezados = dict(l.split(": ", 1) for l in resto)
+    estado = int(linea.split(" ")[1])
+    largo = int(encabezados.get("Content-Length", 0))
+    cuerpo = b"" if metodo == "HEAD" or estado == 304 else await lector.readexactly(largo)
+    return estado, encabezados, cuerpo
+
+
+def _con_servidor(prueba, **opciones):
+    """Ejecuta prueba(lector, escritor) conectada a un ServidorAPI en un puerto libre"""
+    async def principal():
+        servidor = await asyncio.start_server(ServidorAPI(**opciones).atender, "127.0.0.1", 0)
+        puerto = servidor.sockets[0].getsockname()[1]
+        async with servidor:
+            lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+            try:
+                return await prueba(lector, escritor)
+            finally:
+                escritor.close()
+    return asyncio.run(principal())
+
+
+async def _solicitar(lector, escritor, metodo, ruta, *encabezados):
+    lineas = [f"{metodo} {ruta} HTTP/1.1", "Host: localhost", *encabezados]
+    escritor.write(("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1"))
+    await escritor.drain()
+    return await _leer_respuesta(lector, metodo)
+
+
+@pytest.fixture
+def datos_api():
+    almacen = obtener_almacen()
+    almacen.escribir("datos_sectores", SECTORES)
+    almacen.escribir(DATASET_FINANZAS, {"kpis": {"ingresos_totales": 1500.0}})
+    return almacen
+
+
+def test_etag_304_y_head(datos_api):
+    async def prueba(lector, escritor):
+        estado, encabezados, cuerpo = await _solicitar(lector, escritor, "GET", "/api/sectores")
+        assert estado == 200
+        assert json.loads(cuerpo) == SECTORES
+        assert encabezados["Content-Type"] == "application/json; charset=utf-8"
+        assert "Content-Encoding" not in encabezados
+        etag = encabezados["ETag"]
+
+        # Misma conexión (keep-alive): el ETag vigente responde 304 sin cuerpo
+        estado, encabezados, _ = await _solicitar(lector, escritor, "GET", "/api/sectores",
+                                                  f"If-None-Match: W/\"otro\", {etag}")
+        assert estado == 304
+        assert encabezados["ETag"] == etag
+        assert "Content-Length" not in encabezados
+
+        estado, encabezados, _ = await _solicitar(lector, escritor, "GET", "/api/sectores",
+                                                  'If-None-Match: "otro"')
+        assert estado == 200
+
+        # HEAD: mismos encabezados que GET, sin cuerpo
+        estado, encabezados, _ = await _solicitar(lector, escritor, "HEAD", "/api/finanzas/kpis",
+                                                  "Connection: close")
+        assert estado == 200
+        assert int(encabezados["Content-Length"]) == len(b'{"ingresos_totales":1500.0}')
+        assert await lector.read() == b""
+
+    _con_servidor(prueba)
+
+
+def test_respuesta_gzip(datos_api):
+    async def prueba(lector, escritor):
+        estado, encabezados, cuerpo = await _solicitar(lector, escritor, "GET", "/api/finanzas/kpis",
+                                                       "Accept-Encoding: br, gzip")
+        assert estado == 200
+        assert encabezados["Content-Encoding"] == "gzip"
+        assert encabezados["Vary"] == "Accept-Encoding"
+        assert json.loads(gzip.decompress(cuerpo)) == {"ingresos_totales": 1500.0}
+
+        estado, encabezados, cuerpo = await _solicitar(lector, escritor, "GET", "/api/finanzas/kpis",
+                                                       "Accept-Encoding: gzip;q=0")
+        assert "Content-Encoding" not in encabezados
+        assert json.loads(cuerpo) == {"ingresos_totales": 1500.0}
+
+    _con_servidor(prueba)
+
+
+def test_ruta_desconocida_y_metodo_no_permitido(datos_api):
+    async def prueba(lector, escritor):
+        estado, _, cuerpo = await _solicitar(lector, escritor, "GET", "/api/inexistente")
+        assert estado == 404
+        assert "error" in json.loads(cuerpo)
+
+        estado, encabezados, _ = await _solicitar(lector, escritor, "POST", "/api/sectores")
+        assert estado == 405
+        assert encabezados["Allow"] == "GET, HEAD"
+
+        # Una solicitud malformada responde 400 y cierra la conexión
+        escritor.write(b"GARBAGE\r\n\r\n")
+        estado, encabezados, _ = await _leer_respuesta(lector)
+        assert estado == 400
+        assert encabezados["Connection"] == "close"
+        assert await lector.read() == b""
+
+    _con_servidor(prueba)
+
+
+def test_sin_archivo_de_analisis_responde_503(datos_api):
+    datos_api.eliminar(DATASET_FINANZAS)
+
+    async def prueba(lector, escritor):
+        estado, _, cuerpo = await _solicitar(lector, escritor, "GET", "/api/finanzas/kpis")
+        assert estado == 503
+        assert json.loads(cuerpo)["error"].startswith("Datos no disponibles")
+
+        # El resto de las rutas sigue respondiendo
+        estado, _, _ = await _solicitar(lector, escritor, "GET", "/api/sectores")
+        assert estado == 200
+
+    _con_servidor(prueba)
+
+
+def test_ficha_de_cliente_desde_el_indice():
+    random.seed(71)
+    transacciones = generar_transacciones(500, dias=200)
+    indice = IndiceClientes()
+    indice.actualizar(transacciones[:400])
+    guardar_indice_clientes(indice)
+    cliente = indice.clientes[0]
+    ruta = "/api/clientes/" + quote(cliente)
+
+    async def prueba(lector, escritor):
+        estado, encabezados, cuerpo = await _solicitar(lector, escritor, "GET", ruta)
+        assert estado == 200
+        assert json.loads(cuerpo) == indice.buscar(cliente)
+
+        estado, _, _ = await _solicitar(lector, escritor, "GET", ruta, f"If-None-Match: {encabezados['ETag']}")
+        assert estado == 304
+
+        estado, _, cuerpo = await _solicitar(lector, escritor, "GET", "/api/clientes/" + quote("Cliente Inexistente"))
+        assert estado == 404
+        assert json.loads(cuerpo)["error"] == "Cliente no encontrado: Cliente Inexistente"
+
+        # Un índice reescrito se recarga en la siguiente consulta
+        indice.actualizar(transacciones[400:])
+        guardar_indice_clientes(indice)
+        estado, _, cuerpo = await _solicitar(lector, escritor, "GET", ruta)
+        assert json.loads(cuerpo) == indice.buscar(cliente)
+
+        obtener_almacen().eliminar(DATASET_INDICE_CLIENTES)
+        estado, _, _ = await _solicitar(lector, escritor, "GET", ruta)
+        assert estado == 503
+
+    _con_servidor(prueba, indice_clientes=IndiceClientesCacheado(segundos_revision=0))
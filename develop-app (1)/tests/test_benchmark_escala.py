@@ -0,0 +1,69 @@
+"""Pruebas de la comparación de benchmarks con la línea base"""
+
+import pytest
+
+from benchmarks import benchmark_escala
+from benchmarks.benchmark_escala import comparar_con_linea_base, ejecutar_caso
+
+LINEA_BASE = [
+    {"caso": "calcular_kpis", "filas": 1000, "segundos": 1.0, "rss_pico_mb": 100.0, "rss_caso_mb": 10.0},
+    {"caso": "analizar_ofertas", "filas": 1000, "segundos": 1.0, "rss_pico_mb": 100.0, "rss_caso_mb": 10.0},
+]
+
+
+def _resultado(caso, segundos=1.0, rss=10.0, pico=100.0, **extra):
+    return {"caso": caso, "filas": 1000, "segundos": segundos, "rss_pico_mb": pico, "rss_caso_mb": rss, **extra}
+
+
+def test_dentro_de_la_tolerancia_no_hay_regresiones():
+    resultados = [_resultado("calcular_kpis", 1.1, 20.0), _resultado("analizar_ofertas")]
+
+    assert comparar_con_linea_base(resultados, LINEA_BASE) == []
+
+
+def test_caso_fallido_o_con_timeout_es_regresion():
+    resultados = [{"caso": "calcular_kpis", "filas": 1000, "error": "timeout (3600 s)"},
+                  _resultado("analizar_ofertas")]
+
+    regresiones = comparar_con_linea_base(resultados, LINEA_BASE)
+
+    assert regresiones == [{"caso": "calcular_kpis", "filas": 1000, "error": "timeout (3600 s)"}]
+
+
+def test_regresion_de_tiempo_y_de_memoria():
+    resultados = [_resultado("calcular_kpis", segundos=1.5), _resultado("analizar_ofertas", rss=40.0)]
+
+    regresiones = comparar_con_linea_base(resultados, LINEA_BASE)
+
+    assert [(r["caso"], r["metrica"]) for r in regresiones] == [("calcular_kpis", "segundos"),
+                                                                 ("analizar_ofertas", "rss_caso_mb")]
+
+
+def test_casos_sin_linea_base_se_omiten():
+    resultados = [{"caso": "calcular_kpis", "filas": 10_000_000, "error": "timeout (3600 s)"}]
+
+    assert comparar_con_linea_base(resultados, LINEA_BASE) == []
+
+
+def test_memoria_de_la_preparacion_no_cuenta_como_del_caso(monkeypatch):
+    def caso_con_preparacion_grande(n):
+        datos = bytearray(200 * 1024 * 1024)
+        return lambda: len(datos)
+    monkeypatch.setitem(benchmark_escala.CASOS, "preparacion_grande", caso_con_preparacion_grande)
+
+    resultado = ejecutar_caso("preparacion_grande", 1, repeticiones=1)
+
+    assert resultado["rss_pico_mb"] >= 200
+    assert resultado["rss_caso_mb"] < benchmark_escala.MARGEN_RSS_MB
+    # Un RSS pico mayor por la preparación no es una regresión del caso
+    assert comparar_con_linea_base([_resultado("calcular_kpis", pico=resultado["rss_pico_mb"],
+                                               rss=resultado["rss_caso_mb"])], LINEA_BASE) == []
+
+
+def test_busqueda_sobre_el_objetivo_de_latencia_falla(monkeypatch):
+    buscar = benchmark_escala.caso_buscar_ofertas(2000)
+    buscar()
+
+    monkeypatch.setattr(benchmark_escala, "OBJETIVO_BUSQUEDA_MS", 0)
+    with pytest.raises(RuntimeError, match="Búsquedas sobre 0 ms"):
+        buscar()
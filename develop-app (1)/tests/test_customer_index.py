@@ -0,0 +1,119 @@
+"""Pruebas del índice RFM de clientes"""
+
+import random
+import statistics
+from datetime import date
+
+import pytest
+
+from scripts import analyze_financial_data, generate_financial_data
+from scripts.customer_index import (DATASET_INDICE_CLIENTES, SEGMENTOS, IndiceClientes,
+                                    segmento_rfm)
+from scripts.generate_financial_data import generar_transacciones
+from scripts.storage import obtener_almacen
+
+
+@pytest.fixture
+def transacciones():
+    random.seed(41)
+    transacciones = generar_transacciones(3000, dias=300)
+    # Muchos clientes distintos, para que los quintiles se muevan entre tandas
+    for t in transacciones:
+        t["cliente"] = f"Cliente {random.randint(1, 400)}"
+    return transacciones
+
+
+def _segmentos_esperados(transacciones):
+    """Segmentos calculados desde cero con statistics.quantiles sobre los días de recencia"""
+    clientes = {}
+    for t in transacciones:
+        if t["estado"] == "Completado":
+            datos = clientes.setdefault(t["cliente"], {"ultima": t["fecha"], "frecuencia": 0, "monto": 0.0})
+            datos["ultima"] = max(datos["ultima"], t["fecha"])
+            datos["frecuencia"] += 1
+            datos["monto"] += t["monto_total"]
+    referencia = date.fromisoformat(max(d["ultima"] for d in clientes.values()))
+    recencias = {c: (referencia - date.fromisoformat(d["ultima"])).days for c, d in clientes.items()}
+
+    def cortes(valores):
+        return statistics.quantiles(valores, n=5, method='inclusive')
+
+    cortes_r = cortes(list(recencias.values()))
+    cortes_f = cortes([d["frecuencia"] for d in clientes.values()])
+    cortes_m = cortes([d["monto"] for d in clientes.values()])
+    return {
+        c: segmento_rfm(5 - sum(corte < recencias[c] for corte in cortes_r),
+                        1 + sum(corte <= d["frecuencia"] for corte in cortes_f),
+                        1 + sum(corte <= d["monto"] for corte in cortes_m))
+        for c, d in clientes.items()
+    }
+
+
+def _segmentos(indice):
+    return {cliente: indice.buscar(cliente)["segmento"] for cliente in indice.clientes}
+
+
+def test_construccion_vectorizada_igual_a_la_incremental(transacciones):
+    vectorizado = IndiceClientes.construir(transacciones)
+    incremental = IndiceClientes()
+    incremental.actualizar(transacciones)
+
+    assert vectorizado.clientes == incremental.clientes
+    # pandas suma en otro orden: los montos se comparan sin redondear
+    assert list(vectorizado.monto) == pytest.approx(list(incremental.monto))
+    for cliente in incremental.clientes:
+        ficha = vectorizado.buscar(cliente)
+        esperada = incremental.buscar(cliente)
+        for campo in ("monto", "ticket_promedio"):
+            del ficha[campo], esperada[campo]
+        assert ficha == esperada
+    assert vectorizado.contar_segmentos() == incremental.contar_segmentos()
+
+
+def test_reclasificacion_parcial_igual_al_calculo_completo(transacciones):
+    indice = IndiceClientes()
+    vistas = []
+    for inicio in range(0, len(transacciones), 250):
+        lote = transacciones[inicio:inicio + 250]
+        indice.actualizar(lote)
+        vistas.extend(lote)
+
+        esperados = _segmentos_esperados(vistas)
+        assert _segmentos(indice) == esperados
+        conteo = dict.fromkeys(SEGMENTOS, 0)
+        for segmento in esperados.values():
+            conteo[segmento] += 1
+        assert indice.contar_segmentos() == conteo
+
+
+def test_serializacion_conserva_precision_y_sigue_incremental(transacciones):
+    indice = IndiceClientes()
+    indice.actualizar(transacciones[:2000])
+    restaurado = IndiceClientes.desde_dict(indice.a_dict())
+
+    assert restaurado.monto == indice.monto
+    assert restaurado.contar_segmentos() == indice.contar_segmentos()
+
+    restaurado.actualizar(transacciones[2000:])
+    assert _segmentos(restaurado) == _segmentos_esperados(transacciones)
+
+
+def test_rango_no_reemplaza_el_indice_global_y_se_reconstruye_si_falta():
+    random.seed(42)
+    generate_financial_data.main(400, 200)
+    analyze_financial_data.main()
+    almacen = obtener_almacen()
+    global_ = almacen.leer(DATASET_INDICE_CLIENTES)
+
+    analyze_financial_data.main(desde="2000-01-01", hasta="2000-12-31")
+    assert almacen.leer(DATASET_INDICE_CLIENTES) == global_
+
+    # Agregados guardados sin índice: la ejecución incremental lo reconstruye completo
+    analyze_financial_data.main(incremental=True)
+    agregados = almacen.leer("agregados_financieros")
+    del agregados["indice_clientes"]
+    almacen.escribir("agregados_financieros", agregados)
+    analyze_financial_data.main(incremental=True)
+    reconstruido = almacen.leer(DATASET_INDICE_CLIENTES)
+    assert reconstruido["clientes"] == global_["clientes"]
+    assert reconstruido["conteo_segmentos"] == global_["conteo_segmentos"]
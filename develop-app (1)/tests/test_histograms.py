@@ -0,0 +1,68 @@
+"""Pruebas de los histogramas de sueldos precalculados"""
+
+import random
+import statistics
+
+from scripts.histograms import (LIMITES_SUELDO, combinar_histogramas, construir_histogramas,
+                                percentil_histograma, tramo_sueldo)
+
+
+def _ofertas(cantidad, semilla=7):
+    aleatorio = random.Random(semilla)
+    return [
+        {
+            "sector": aleatorio.choice(["Minería", "Salud", "Comercio"]),
+            "region": aleatorio.choice(["Metropolitana", "Biobío"]),
+            "tipo_contrato": aleatorio.choice(["Indefinido", "Plazo Fijo"]),
+            "sueldo": aleatorio.randint(300_000, 2_800_000),
+        }
+        for _ in range(cantidad)
+    ]
+
+
+def test_percentil_interpola_dentro_del_tramo():
+    limites = [0, 100, 200, 300]
+    conteos = [0, 10, 10, 0]
+
+    assert percentil_histograma(conteos, 0.25, limites) == 150
+    assert percentil_histograma(conteos, 0.5, limites) == 200
+    assert percentil_histograma(conteos, 0.75, limites) == 250
+
+
+def test_percentil_tramo_abierto_y_vacio():
+    limites = [0, 100, 200]
+
+    assert percentil_histograma([0, 0, 5], 0.5, limites) == 200
+    assert percentil_histograma([0, 0, 0], 0.5, limites) == 0
+
+
+def test_mediana_aproximada_a_menos_de_un_tramo():
+    ofertas = _ofertas(5_000)
+    combinado = combinar_histogramas(construir_histogramas(ofertas))
+    exacta = statistics.median(o["sueldo"] for o in ofertas)
+
+    aproximada = percentil_histograma(combinado["conteos"], 0.5)
+    assert abs(aproximada - exacta) <= LIMITES_SUELDO[1] - LIMITES_SUELDO[0]
+
+
+def test_combinar_filtros_suma_los_grupos():
+    ofertas = _ofertas(2_000)
+    histogramas = construir_histogramas(ofertas)
+
+    filtradas = [o for o in ofertas if o["sector"] == "Salud" and o["region"] == "Biobío"]
+    combinado = combinar_histogramas(histogramas, sector="Salud", region="Biobío")
+    esperados = [0] * len(LIMITES_SUELDO)
+    for o in filtradas:
+        esperados[tramo_sueldo(o["sueldo"])] += 1
+
+    assert combinado["conteos"] == esperados
+    assert combinado["total"] == len(filtradas)
+    assert combinado["suma"] == sum(o["sueldo"] for o in filtradas)
+
+
+def test_construir_por_lotes_equivale_a_una_pasada():
+    ofertas = _ofertas(1_000)
+    por_lotes = construir_histogramas(ofertas[:400])
+    construir_histogramas(ofertas[400:], histogramas=por_lotes)
+
+    assert combinar_histogramas(por_lotes) == combinar_histogramas(construir_histogramas(ofertas))
@@ -0,0 +1,58 @@
+"""Pruebas del registro de secciones y su exportación a Prometheus"""
+
+import os
+import subprocess
+import sys
+
+from scripts.instrumentation import RegistroSecciones, percentil, ruta_worker
+
+
+def _registro():
+    registro = RegistroSecciones()
+    for segundos in (0.1, 0.2, 0.3, 0.4):
+        registro.registrar("cargar_datos", segundos, filas=10, cache="hit")
+    return registro
+
+
+def test_percentil_por_rango_mas_cercano():
+    valores = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+    assert percentil(valores, 0.5) == 5
+    assert percentil(valores, 0.9) == 9
+    assert percentil(valores, 0.99) == 10
+    assert percentil([], 0.5) == 0.0
+
+
+def test_cada_worker_escribe_su_archivo_con_etiqueta(tmp_path):
+    ruta = str(tmp_path / "metricas.prom")
+
+    destino = _registro().escribir_prometheus(ruta)
+
+    assert destino == ruta_worker(ruta, os.getpid())
+    assert not os.path.exists(ruta)
+    with open(destino, encoding='utf-8') as f:
+        series = [linea for linea in f if not linea.startswith("#")]
+    assert series and all(f'worker="{os.getpid()}"' in linea for linea in series)
+
+
+def test_escritura_periodica_respeta_el_intervalo(tmp_path):
+    ruta = str(tmp_path / "metricas.prom")
+    registro = _registro()
+
+    assert registro.escribir_prometheus_periodico(ruta, intervalo=60) is not None
+    assert registro.escribir_prometheus_periodico(ruta, intervalo=60) is None
+    assert registro.escribir_prometheus_periodico(ruta, intervalo=0) is not None
+
+
+def test_elimina_archivos_de_workers_terminados(tmp_path):
+    ruta = str(tmp_path / "metricas.prom")
+    terminado = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                               capture_output=True, text=True).stdout.strip()
+    huerfano = ruta_worker(ruta, terminado)
+    with open(huerfano, 'w', encoding='utf-8') as f:
+        f.write("dashboard_filas_procesadas_total 1\n")
+
+    _registro().escribir_prometheus(ruta)
+
+    assert not os.path.exists(huerfano)
+    assert os.path.exists(ruta_worker(ruta, os.getpid()))
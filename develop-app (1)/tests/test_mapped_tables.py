@@ -0,0 +1,103 @@
+"""Pruebas de las tablas binarias mapeadas en memoria"""
+
+import random
+from array import array
+
+import numpy as np
+import pytest
+
+from scripts import mapped_tables
+from scripts.generate_employment_data import generar_ofertas_laborales
+from scripts.mapped_tables import abrir_tabla, describir_campos, escribir_tabla
+from scripts.records import iterar_campos
+from scripts.storage import filtrar_ofertas, obtener_almacen
+
+REGISTROS = [
+    {"id": i, "nombre": f"Persona {i} ñandú", "grupo": ["Norte", "Sur", "Centro"][i % 3],
+     "activo": i % 2 == 0, "puntaje": i / 7, "saldo": -2 ** 40 + i, "nota": "" if i % 5 else "Educación"}
+    for i in range(40)
+]
+
+
+@pytest.fixture(params=["numpy", "stdlib"])
+def con_numpy(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(mapped_tables, "np", None)
+    return request.param == "numpy"
+
+
+@pytest.fixture
+def tabla(tmp_path, con_numpy):
+    ruta = str(tmp_path / "registros.bin")
+    escribir_tabla(ruta, REGISTROS)
+    return abrir_tabla(ruta)
+
+
+def test_ida_y_vuelta_conserva_valores_y_tipos(tabla):
+    assert len(tabla) == len(REGISTROS)
+    assert list(tabla) == REGISTROS
+    for leido, original in zip(tabla, REGISTROS):
+        assert [type(v) for v in leido.values()] == [type(v) for v in original.values()]
+    assert tabla[-1] == REGISTROS[-1]
+    assert tabla[5:9] == REGISTROS[5:9]
+    with pytest.raises(IndexError):
+        tabla[len(REGISTROS)]
+
+
+def test_campos_repetidos_se_codifican():
+    formatos = {campo["nombre"]: campo["formato"] for campo in describir_campos(REGISTROS)}
+    assert formatos["grupo"] == "H"
+    assert formatos["nombre"].endswith("s")
+    assert (formatos["id"], formatos["activo"], formatos["puntaje"]) == ("q", "?", "d")
+
+
+def test_enteros_y_decimales_mezclados_no_son_tabla(tmp_path):
+    registros = [{"valor": 1}, {"valor": 2.5}]
+    assert describir_campos(registros) is None
+
+    almacen = obtener_almacen("mmap", str(tmp_path))
+    almacen.escribir("mezclados", registros)
+    leidos = almacen.leer("mezclados")
+    assert leidos == registros
+    assert type(leidos[0]["valor"]) is int
+
+
+def test_columna(tabla, con_numpy):
+    puntajes = tabla.columna("puntaje")
+    assert list(puntajes) == [r["puntaje"] for r in REGISTROS]
+    if con_numpy:
+        # Vista sobre el mapa, sin copia
+        assert isinstance(puntajes, np.ndarray) and not puntajes.flags.owndata
+        assert not puntajes.flags.writeable
+    else:
+        assert isinstance(puntajes, array)
+    assert list(tabla.columna("saldo")) == [r["saldo"] for r in REGISTROS]
+    assert list(tabla.columna("activo")) == [r["activo"] for r in REGISTROS]
+    assert tabla.columna("grupo") == [r["grupo"] for r in REGISTROS]
+    assert tabla.columna("nombre") == [r["nombre"] for r in REGISTROS]
+    assert tabla.valores_distintos("grupo") == ["Centro", "Norte", "Sur"]
+
+    # iterar_campos lee las columnas como valores de Python
+    filas = list(iterar_campos(tabla, ("id", "saldo")))
+    assert filas == [(r["id"], r["saldo"]) for r in REGISTROS]
+    assert all(type(saldo) is int for _, saldo in filas)
+
+
+def test_filtrar_por_columnas_igual_que_por_filas(tmp_path, con_numpy):
+    random.seed(51)
+    almacen = obtener_almacen("mmap", str(tmp_path))
+    almacen.escribir("ofertas_laborales", generar_ofertas_laborales(2000, como_registros=True))
+    tabla = almacen.abrir("ofertas_laborales")
+    ofertas = almacen.leer("ofertas_laborales")
+    fechas = sorted({o["fecha"] for o in ofertas})
+
+    consultas = [
+        {"sector": "Minería", "estado": "Activa", "limite": 15},
+        {"region": "Biobío", "desde": fechas[10], "estado": "Activa"},
+        {"desde": fechas[5], "hasta": fechas[8]},
+        {"sector": "Inexistente"},
+        {"limite": 3},
+    ]
+    for filtros in consultas:
+        assert filtrar_ofertas(tabla, **filtros) == filtrar_ofertas(ofertas, **filtros)
+        assert almacen.consultar_ofertas(**filtros) == filtrar_ofertas(ofertas, **filtros)
@@ -0,0 +1,64 @@
+"""Pruebas de la página del dashboard financiero con AppTest de Streamlit"""
+
+import os
+import random
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from scripts import analyze_financial_data, generate_financial_data
+from scripts.analyze_financial_data import DATASET_RESULTADOS
+from scripts.storage import obtener_almacen
+
+RUTA_PAGINA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "pages", "1_💰_Finanzas.py")
+METRICAS = ["Ventas Totales", "Transacciones", "Ticket Promedio", "Crecimiento",
+            "Valor por Cliente", "Descuento Promedio"]
+
+
+@pytest.fixture
+def almacen():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    return obtener_almacen()
+
+
+def _ejecutar_pagina():
+    at = AppTest.from_file(RUTA_PAGINA, default_timeout=60).run()
+    assert not at.exception
+    return at
+
+
+def _verificar_dashboard(at, kpis):
+    etiquetas = [m.label for m in at.metric]
+    assert all(etiqueta in etiquetas for etiqueta in METRICAS)
+    valores = {m.label: m.value for m in at.metric}
+    assert valores["Ventas Totales"] == f"${kpis['total_ventas']:,.2f}"
+    assert valores["Transacciones"] == f"{kpis['num_transacciones']:,}"
+    assert len(at.get("plotly_chart")) == 4
+    assert [s.value for s in at.subheader] == ["🏷️ Ventas por Categoría", "⭐ Productos Más Vendidos",
+                                               "📅 Ventas por Día de la Semana", "📆 Ventas Mensuales"]
+
+
+def test_muestra_kpis_y_graficos_desde_los_resultados(almacen):
+    random.seed(61)
+    generate_financial_data.main(400, 120)
+    analyze_financial_data.main()
+
+    at = _ejecutar_pagina()
+
+    assert at.title[0].value == "💰 Dashboard Financiero"
+    assert not at.info
+    _verificar_dashboard(at, almacen.leer(DATASET_RESULTADOS)["kpis"])
+
+
+def test_sin_resultados_avisa_y_los_genera(almacen):
+    almacen.eliminar(DATASET_RESULTADOS)
+
+    at = _ejecutar_pagina()
+
+    assert at.info[0].value == "⏳ Generando y analizando datos financieros..."
+    assert at.success[0].value == "✅ Datos financieros generados correctamente"
+    assert almacen.existe(DATASET_RESULTADOS)
+    _verificar_dashboard(at, almacen.leer(DATASET_RESULTADOS)["kpis"])
@@ -0,0 +1,84 @@
+"""Pruebas de las particiones por año/mes de las transacciones"""
+
+import random
+
+import pytest
+
+from scripts.analyze_financial_data import actualizar_agregados, crear_agregados, usar_particiones
+from scripts.generate_financial_data import generar_transacciones
+from scripts.partitions import (cargar_indice, escribir_particiones, iterar_transacciones,
+                                seleccionar_particiones)
+from scripts.storage import obtener_almacen
+
+
+@pytest.fixture
+def transacciones():
+    random.seed(21)
+    return generar_transacciones(800, dias=400)
+
+
+@pytest.fixture(params=["json", "sqlite", "mmap"])
+def almacen(request, tmp_path):
+    return obtener_almacen(request.param, str(tmp_path))
+
+
+def _en_rango(transacciones, desde, hasta):
+    return sorted(t["id"] for t in transacciones
+                  if (desde is None or t["fecha"] >= desde) and (hasta is None or t["fecha"] <= hasta))
+
+
+def test_seleccion_por_traslape_de_fechas():
+    indice = [
+        {"particion": "2024-01", "fecha_min": "2024-01-03", "fecha_max": "2024-01-30"},
+        {"particion": "2024-02", "fecha_min": "2024-02-01", "fecha_max": "2024-02-28"},
+        {"particion": "2024-03", "fecha_min": "2024-03-02", "fecha_max": "2024-03-31"},
+    ]
+
+    def particiones(desde, hasta):
+        return [p["particion"] for p in seleccionar_particiones(indice, desde, hasta)]
+
+    assert particiones(None, None) == ["2024-01", "2024-02", "2024-03"]
+    assert particiones("2024-01-31", "2024-02-01") == ["2024-02"]
+    assert particiones("2024-01-30", "2024-03-02") == ["2024-01", "2024-02", "2024-03"]
+    assert particiones("2024-04-01", None) == []
+
+
+@pytest.mark.parametrize("desde, hasta", [(None, None), ("2025-01-15", "2025-04-10"), (None, "2024-12-31")])
+def test_rango_de_varias_particiones_sin_perdidas(almacen, transacciones, desde, hasta):
+    escribir_particiones(transacciones, almacen)
+
+    leidas = list(iterar_transacciones(almacen, desde, hasta))
+
+    assert sorted(t["id"] for t in leidas) == _en_rango(transacciones, desde, hasta)
+
+
+def test_agregados_desde_particiones_igualan_al_total(almacen, transacciones):
+    escribir_particiones(transacciones, almacen)
+    agregados = crear_agregados()
+    actualizar_agregados(agregados, iterar_transacciones(almacen))
+
+    completadas = [t for t in transacciones if t["estado"] == "Completado"]
+    assert agregados["num_transacciones"] == len(completadas)
+    assert agregados["total_ventas"] == pytest.approx(sum(t["monto_total"] for t in completadas))
+
+
+def test_reescribir_elimina_particiones_anteriores(almacen, transacciones):
+    escribir_particiones(transacciones, almacen)
+    recientes = [t for t in transacciones if t["fecha"] >= "2025-01-01"]
+    escribir_particiones(recientes, almacen)
+
+    datasets = {p["dataset"] for p in cargar_indice(almacen)}
+    assert not almacen.existe("transacciones_2024_12")
+    assert all(almacen.existe(dataset) for dataset in datasets)
+    assert len(list(iterar_transacciones(almacen))) == len(recientes)
+
+
+def test_se_usa_la_fuente_mas_reciente(almacen, transacciones):
+    almacen.escribir("transacciones", transacciones)
+    assert not usar_particiones(almacen)
+
+    escribir_particiones(transacciones, almacen)
+    assert usar_particiones(almacen)
+
+    almacen.escribir("transacciones", transacciones)
+    assert not usar_particiones(almacen)
@@ -0,0 +1,57 @@
+"""Pruebas de la recolección de resultados de la prueba de carga"""
+
+import multiprocessing
+import os
+import signal
+import time
+
+from benchmarks import prueba_carga
+from benchmarks.prueba_carga import recolectar_resultados
+
+contexto = multiprocessing.get_context("fork")
+
+
+def _reporta(numero, cola):
+    cola.put({"numero": numero, "latencias": {}, "cache": {}, "fallo": None})
+
+
+def _muere(numero, cola):
+    # Como si el sistema lo matara por falta de memoria
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def _se_cuelga(numero, cola):
+    time.sleep(60)
+
+
+def _lanzar(*cuerpos):
+    cola = contexto.Queue()
+    procesos = [contexto.Process(target=cuerpo, args=(numero, cola)) for numero, cuerpo in enumerate(cuerpos)]
+    for proceso in procesos:
+        proceso.start()
+    return procesos, cola
+
+
+def test_sesion_muerta_se_reporta_como_fallo(monkeypatch):
+    monkeypatch.setattr(prueba_carga, "INTERVALO_REVISION", 0.05)
+    procesos, cola = _lanzar(_reporta, _muere, _reporta)
+
+    resultados = sorted(recolectar_resultados(procesos, cola, timeout=30), key=lambda r: r["numero"])
+
+    assert [r["fallo"] is None for r in resultados] == [True, False, True]
+    assert f"código {-signal.SIGKILL}" in resultados[1]["fallo"]
+
+
+def test_sesion_colgada_vence_el_timeout(monkeypatch):
+    monkeypatch.setattr(prueba_carga, "INTERVALO_REVISION", 0.05)
+    procesos, cola = _lanzar(_reporta, _se_cuelga)
+
+    inicio = time.monotonic()
+    resultados = sorted(recolectar_resultados(procesos, cola, timeout=0.5), key=lambda r: r["numero"])
+    for proceso in procesos:
+        proceso.join(5)
+
+    assert time.monotonic() - inicio < 10
+    assert resultados[0]["fallo"] is None
+    assert "sin respuesta" in resultados[1]["fallo"]
+    assert not procesos[1].is_alive()
@@ -0,0 +1,51 @@
+"""Pruebas de los registros tipados y los lotes por columnas"""
+
+import random
+
+import pytest
+
+from scripts.analyze_financial_data import calcular_kpis, construir_resumenes_top
+from scripts.generate_financial_data import generar_transacciones
+from scripts.records import Transaccion, iterar_campos
+from scripts.rollup import construir_cubo
+from scripts.storage import obtener_almacen
+
+
+@pytest.fixture
+def transacciones():
+    random.seed(31)
+    return generar_transacciones(300, dias=120)
+
+
+@pytest.fixture
+def lote():
+    random.seed(31)
+    return generar_transacciones(300, dias=120, como_registros=True)
+
+
+def test_iterar_campos_igual_en_todas_las_representaciones(transacciones, lote):
+    campos = ("id", "cliente", "monto_total")
+    esperado = [(t["id"], t["cliente"], t["monto_total"]) for t in transacciones]
+    registros = [Transaccion.desde_dict(t) for t in transacciones]
+
+    assert list(iterar_campos(transacciones, campos)) == esperado
+    assert list(iterar_campos(registros, campos)) == esperado
+    assert list(iterar_campos(lote, campos)) == esperado
+    assert list(iterar_campos(iter(transacciones), ("estado",))) == [(t["estado"],) for t in transacciones]
+    assert list(iterar_campos([], campos)) == []
+
+
+def test_analizadores_aceptan_lotes(transacciones, lote):
+    assert calcular_kpis(lote, []) == calcular_kpis(transacciones, [])
+    assert construir_cubo(lote) == construir_cubo(transacciones)
+    resumenes = construir_resumenes_top(lote)
+    esperados = construir_resumenes_top(transacciones)
+    assert {n: r.top(5) for n, r in resumenes.items()} == {n: r.top(5) for n, r in esperados.items()}
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "parquet", "mmap"])
+def test_lote_se_guarda_sin_perdidas(backend, tmp_path, transacciones, lote):
+    almacen = obtener_almacen(backend, str(tmp_path))
+    almacen.escribir("transacciones", lote)
+
+    assert almacen.leer("transacciones") == transacciones
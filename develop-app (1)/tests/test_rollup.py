@@ -0,0 +1,82 @@
+"""Pruebas del cubo de agregación jerárquica de ventas"""
+
+import random
+
+import pytest
+
+from scripts.analyze_financial_data import calcular_crecimiento
+from scripts.generate_financial_data import generar_transacciones
+from scripts.rollup import (NIVELES, agregar_por_dia, clave_periodo, construir_cubo, consultar,
+                            cubo_desde_dias, meses_completos)
+
+
+@pytest.fixture
+def transacciones():
+    random.seed(31)
+    return generar_transacciones(1_500, dias=300)
+
+
+def _sumas_directas(transacciones, nivel, categoria=None):
+    sumas = {}
+    for t in transacciones:
+        if t["estado"] != "Completado" or (categoria is not None and t["categoria"] != categoria):
+            continue
+        fila = sumas.setdefault(clave_periodo(t["fecha"], nivel), [0.0, 0, 0])
+        fila[0] += t["monto_total"]
+        fila[1] += t["cantidad"]
+        fila[2] += 1
+    return sumas
+
+
+@pytest.mark.parametrize("nivel", NIVELES)
+def test_cada_nivel_coincide_con_la_suma_directa(transacciones, nivel):
+    cubo = construir_cubo(transacciones)
+
+    for categoria in (None, "Electrónica"):
+        esperadas = _sumas_directas(transacciones, nivel, categoria)
+        serie = consultar(cubo, nivel, categoria)
+        assert [fila["periodo"] for fila in serie] == sorted(esperadas)
+        for fila in serie:
+            ingresos, unidades, cantidad = esperadas[fila["periodo"]]
+            assert fila["ingresos"] == pytest.approx(ingresos, abs=0.01)
+            assert (fila["unidades"], fila["transacciones"]) == (unidades, cantidad)
+
+
+def test_niveles_superiores_suman_lo_mismo(transacciones):
+    cubo = construir_cubo(transacciones)
+    totales = {nivel: sum(fila["ingresos"] for fila in consultar(cubo, nivel)) for nivel in NIVELES}
+
+    for nivel in NIVELES[1:]:
+        assert totales[nivel] == pytest.approx(totales["dia"], abs=0.01 * len(cubo["dia"]))
+
+
+def test_cubo_por_lotes_igual_al_de_una_pasada(transacciones):
+    dias = agregar_por_dia(transacciones[:700])
+    agregar_por_dia(transacciones[700:], dias)
+
+    assert consultar(cubo_desde_dias(dias), "mes") == consultar(construir_cubo(transacciones), "mes")
+
+
+def test_meses_extremos_parciales():
+    cubo = cubo_desde_dias({
+        "2024-01-15": {"total": {"ingresos": 10.0, "unidades": 1, "transacciones": 1}, "por_categoria": {}},
+        "2024-02-01": {"total": {"ingresos": 10.0, "unidades": 1, "transacciones": 1}, "por_categoria": {}},
+        "2024-03-31": {"total": {"ingresos": 10.0, "unidades": 1, "transacciones": 1}, "por_categoria": {}},
+        "2024-04-10": {"total": {"ingresos": 10.0, "unidades": 1, "transacciones": 1}, "por_categoria": {}},
+    })
+
+    assert meses_completos(cubo) == {"2024-02", "2024-03"}
+
+
+def test_crecimiento_omite_meses_parciales():
+    metricas = [
+        {"ingresos": 10.0, "completo": False},
+        {"ingresos": 100.0, "completo": True},
+        {"ingresos": 120.0, "completo": True},
+        {"ingresos": 5.0, "completo": False},
+    ]
+
+    assert calcular_crecimiento(metricas) == pytest.approx(20.0)
+    assert calcular_crecimiento(metricas[:2]) == 0
+    # Métricas sin la marca (formato anterior): todas cuentan como completas
+    assert calcular_crecimiento([{"ingresos": 50.0}, {"ingresos": 75.0}]) == pytest.approx(50.0)
@@ -0,0 +1,99 @@
+"""Pruebas del índice de búsqueda de ofertas por trigramas"""
+
+import random
+
+import pytest
+
+from scripts.generate_employment_data import generar_ofertas_laborales
+from scripts.search_index import (CAMPOS_BUSQUEDA, LARGO_MINIMO_TERMINO, PESOS_CAMPOS, IndiceBusqueda,
+                                  _puntaje_termino, consulta_buscable, normalizar_texto)
+
+CONSULTAS = ["data", "ingeniero", "Educación", "educacion", "codelco", "ana de", "xyz", "de", "mineria jefe",
+             "supervisor chile", "ing de"]
+
+
+@pytest.fixture(scope="module")
+def ofertas():
+    random.seed(8)
+    return generar_ofertas_laborales(3_000)
+
+
+def _coincidencias_directas(ofertas, consulta):
+    terminos = normalizar_texto(consulta).split()
+    if not any(len(t) >= LARGO_MINIMO_TERMINO for t in terminos):
+        return set()
+    return {i for i, oferta in enumerate(ofertas)
+            if all(any(t in normalizar_texto(oferta[c]) for c in CAMPOS_BUSQUEDA) for t in terminos)}
+
+
+def _puntaje_directo(oferta, consulta):
+    terminos = [t for t in set(normalizar_texto(consulta).split()) if len(t) >= LARGO_MINIMO_TERMINO]
+    return sum(max(_puntaje_termino(normalizar_texto(oferta[c]), t) * PESOS_CAMPOS[c] for c in CAMPOS_BUSQUEDA)
+               for t in terminos)
+
+
+def _posiciones(ofertas, encontradas):
+    por_id = {id(oferta): i for i, oferta in enumerate(ofertas)}
+    return [por_id[id(oferta)] for oferta in encontradas]
+
+
+@pytest.mark.parametrize("consulta", CONSULTAS)
+def test_coincide_con_la_busqueda_directa(ofertas, consulta):
+    indice = IndiceBusqueda(ofertas)
+
+    encontradas = _posiciones(ofertas, indice.buscar(consulta))
+
+    assert len(encontradas) == len(set(encontradas))
+    assert set(encontradas) == _coincidencias_directas(ofertas, consulta)
+    assert indice.contar(consulta) == len(encontradas)
+    # De mayor a menor puntaje, sin ordenar todas las coincidencias
+    puntajes = [_puntaje_directo(ofertas[i], consulta) for i in encontradas]
+    assert puntajes == sorted(puntajes, reverse=True)
+
+
+def test_combinaciones_unicas_por_oferta(ofertas):
+    # Datos reales: casi cada oferta tiene un cargo distinto
+    unicas = [{**oferta, "cargo": f"{oferta['cargo']} {i}"} for i, oferta in enumerate(ofertas)]
+    indice = IndiceBusqueda(unicas)
+
+    assert indice.num_combinaciones == len(unicas)
+    for consulta in ("ingeniero", "analista 12"):
+        coincidentes = indice.combinaciones_coincidentes(consulta)
+        encontradas = _posiciones(unicas, indice.ofertas_de(coincidentes))
+        assert set(encontradas) == _coincidencias_directas(unicas, consulta)
+        assert indice.contar_ofertas(coincidentes) == len(encontradas)
+
+
+def test_relevancia_prioriza_el_cargo():
+    ofertas = [
+        {"cargo": "Analista Comercial", "empresa": "Minera Norte", "sector": "Minería"},
+        {"cargo": "Ingeniero de Minas", "empresa": "Codelco", "sector": "Minería"},
+        {"cargo": "Minero", "empresa": "Codelco", "sector": "Minería"},
+    ]
+    indice = IndiceBusqueda(ofertas)
+
+    assert [o["cargo"] for o in indice.buscar("miner")] == ["Minero", "Analista Comercial", "Ingeniero de Minas"]
+
+
+def test_consultas_vacias_o_sin_coincidencias(ofertas):
+    indice = IndiceBusqueda(ofertas)
+
+    assert list(indice.buscar("   ")) == []
+    # Sin términos de 3 letras no se busca: "de" coincidiría con casi todo
+    assert not consulta_buscable("de la")
+    assert indice.contar("de la") == 0
+    assert indice.contar("zzzqqq") == 0
+    assert IndiceBusqueda([]).contar("data") == 0
+
+
+def test_conteo_con_limite_y_resultados_reutilizables(ofertas):
+    indice = IndiceBusqueda(ofertas)
+    total = indice.contar("ingeniero")
+    coincidentes = indice.combinaciones_coincidentes("ingeniero")
+
+    pagina = _posiciones(ofertas, (o for o, _ in zip(indice.ofertas_de(coincidentes), range(15))))
+    assert indice.contar_ofertas(coincidentes, limite=100) == 100
+    # Recorrer de nuevo entrega lo mismo, desde el principio
+    assert _posiciones(ofertas, indice.ofertas_de(coincidentes))[:15] == pagina
+    assert indice.contar_ofertas(coincidentes) == total
+    assert indice.contar_ofertas(coincidentes, limite=total + 1) == total
@@ -0,0 +1,108 @@
+"""Pruebas de las cotas de error de HyperLogLog y Space-Saving"""
+
+import random
+
+import pytest
+
+from scripts.sketches import HyperLogLog, SpaceSaving
+
+
+@pytest.mark.parametrize("cantidad", [100, 5_000, 100_000])
+def test_hyperloglog_dentro_de_tres_errores_estandar(cantidad):
+    contador = HyperLogLog(error_relativo=0.01)
+    contador.actualizar(f"cliente-{i}" for i in range(cantidad))
+    # Los duplicados no cambian la estimación
+    contador.actualizar(f"cliente-{i}" for i in range(0, cantidad, 3))
+
+    assert abs(contador.estimar() - cantidad) <= 3 * contador.error_estandar * cantidad
+
+
+def test_hyperloglog_combinar_equivale_a_la_union():
+    a = HyperLogLog(error_relativo=0.02)
+    b = HyperLogLog(error_relativo=0.02)
+    union = HyperLogLog(error_relativo=0.02)
+    a.actualizar(range(0, 30_000))
+    b.actualizar(range(20_000, 50_000))
+    union.actualizar(range(0, 50_000))
+
+    assert a.combinar(b).registros == union.registros
+    assert a.estimar() == union.estimar()
+
+
+def test_hyperloglog_serializacion():
+    contador = HyperLogLog(error_relativo=0.05)
+    contador.actualizar(range(1_000))
+    copia = HyperLogLog.desde_dict(contador.a_dict())
+
+    assert copia.precision == contador.precision
+    assert copia.estimar() == contador.estimar()
+
+
+def test_hyperloglog_rechaza_precisiones_distintas():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=10).combinar(HyperLogLog(precision=12))
+
+
+def _flujo_zipf(cantidad, elementos, semilla):
+    """Pares (elemento, peso) con frecuencias de cola larga"""
+    aleatorio = random.Random(semilla)
+    pesos = [1 / (rango + 1) for rango in range(elementos)]
+    return [(f"p{aleatorio.choices(range(elementos), pesos)[0]}", aleatorio.randint(1, 10))
+            for _ in range(cantidad)]
+
+
+def _conteos_reales(pares):
+    reales = {}
+    for elemento, peso in pares:
+        reales[elemento] = reales.get(elemento, 0) + peso
+    return reales
+
+
+def _verificar_cotas(resumen, reales):
+    assert resumen.peso_total == sum(reales.values())
+    for elemento, (estimado, error) in resumen.contadores.items():
+        # Nunca subestima y se excede a lo más en su error
+        assert reales.get(elemento, 0) <= estimado <= reales.get(elemento, 0) + error
+        assert error <= resumen.error_maximo
+    for elemento, real in reales.items():
+        assert real <= resumen.estimar(elemento)
+
+
+def test_space_saving_cotas_de_error():
+    pares = _flujo_zipf(20_000, 2_000, semilla=1)
+    resumen = SpaceSaving(capacidad=100)
+    resumen.actualizar(pares)
+
+    _verificar_cotas(resumen, _conteos_reales(pares))
+
+
+def test_space_saving_top_garantizado_es_real():
+    pares = _flujo_zipf(20_000, 2_000, semilla=2)
+    reales = _conteos_reales(pares)
+    resumen = SpaceSaving(capacidad=200)
+    resumen.actualizar(pares)
+
+    top_real = set(sorted(reales, key=reales.get, reverse=True)[:5])
+    garantizados = [fila["elemento"] for fila in resumen.top(5) if fila["garantizado"]]
+    assert garantizados
+    assert set(garantizados) <= top_real
+
+
+def test_space_saving_combinar_mantiene_las_cotas():
+    pares_a = _flujo_zipf(10_000, 1_500, semilla=3)
+    pares_b = _flujo_zipf(10_000, 1_500, semilla=4)
+    a = SpaceSaving(capacidad=100)
+    b = SpaceSaving(capacidad=100)
+    a.actualizar(pares_a)
+    b.actualizar(pares_b)
+
+    _verificar_cotas(a.combinar(b), _conteos_reales(pares_a + pares_b))
+
+
+def test_space_saving_serializacion_restaura_tuplas():
+    resumen = SpaceSaving(capacidad=10)
+    resumen.actualizar([((1, "Laptop Pro"), 3), ((2, "Mouse"), 1)])
+    copia = SpaceSaving.desde_dict(resumen.a_dict())
+
+    assert copia.estimar((1, "Laptop Pro")) == 3
+    assert copia.top(2) == resumen.top(2)
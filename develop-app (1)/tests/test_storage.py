@@ -0,0 +1,34 @@
+"""Pruebas de ida y vuelta de la capa de almacenamiento"""
+
+import pytest
+
+from scripts.storage import obtener_almacen
+
+REGISTROS_MEZCLADOS = [
+    {"id": 1, "valor": 1, "codigo": "A", "nota": None},
+    {"id": 2, "valor": 2.5, "codigo": 7, "nota": None},
+    {"id": 3, "valor": None, "codigo": "C", "nota": 0.0},
+]
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "mmap"])
+def test_columnas_con_tipos_mezclados_conservan_sus_tipos(backend, tmp_path):
+    almacen = obtener_almacen(backend, str(tmp_path))
+    almacen.escribir("mezclados", REGISTROS_MEZCLADOS)
+
+    leidos = almacen.leer("mezclados")
+    assert leidos == REGISTROS_MEZCLADOS
+    for leido, original in zip(leidos, REGISTROS_MEZCLADOS):
+        assert [type(v) for v in leido.values()] == [type(v) for v in original.values()]
+
+
+def test_sqlite_declara_tipos_segun_todos_los_valores(tmp_path):
+    almacen = obtener_almacen("sqlite", str(tmp_path))
+    almacen.escribir("mezclados", REGISTROS_MEZCLADOS)
+    almacen.escribir("booleanos", [{"id": 1, "activo": True}, {"id": 2, "activo": False}])
+
+    columnas = {fila[1]: fila[2] for fila in almacen.conexion.execute('PRAGMA table_info("mezclados")')}
+    assert columnas == {"id": "INTEGER", "valor": "", "codigo": "", "nota": "REAL"}
+    # SQLite no distingue booleanos de enteros: se guardan como documento
+    assert not almacen._es_tabla("booleanos")
+    assert almacen.leer("booleanos") == [{"id": 1, "activo": True}, {"id": 2, "activo": False}]
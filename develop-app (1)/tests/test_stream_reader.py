@@ -0,0 +1,35 @@
+"""Pruebas de la lectura incremental de archivos JSON"""
+
+import json
+
+import pytest
+
+from scripts.stream_reader import iterar_lotes, iterar_registros
+
+
+@pytest.mark.parametrize("tamano_bloque", [1, 2, 3, 5, 64])
+def test_numeros_cortados_en_el_borde_del_bloque(tmp_path, tamano_bloque):
+    ruta = tmp_path / "numeros.json"
+    valores = [1, 22, 333, -4444, 5.25, 1e10, 0, 123456789]
+    ruta.write_text(json.dumps(valores), encoding="utf-8")
+
+    assert list(iterar_registros(str(ruta), tamano_bloque)) == valores
+
+
+@pytest.mark.parametrize("tamano_bloque", [1, 7, 1 << 16])
+def test_arreglo_y_json_lines_dan_los_mismos_registros(tmp_path, tamano_bloque):
+    registros = [{"id": i, "monto": i * 1.5, "cliente": f"Cliente {i} ñ", "activo": i % 2 == 0}
+                 for i in range(50)]
+    arreglo = tmp_path / "arreglo.json"
+    lineas = tmp_path / "lineas.jsonl"
+    arreglo.write_text(json.dumps(registros, indent=2), encoding="utf-8")
+    lineas.write_text("\n".join(json.dumps(r) for r in registros) + "\n", encoding="utf-8")
+
+    assert list(iterar_registros(str(arreglo), tamano_bloque)) == registros
+    assert list(iterar_registros(str(lineas), tamano_bloque)) == registros
+
+
+def test_iterar_lotes():
+    assert [len(lote) for lote in iterar_lotes(range(25), 10)] == [10, 10, 5]
+    with pytest.raises(ValueError):
+        list(iterar_lotes([], 0))